@@ -0,0 +1,235 @@
+"""
+Load tests of the task API against a seeded dataset. Results are saved as JSON, so that regressions can be
+spotted by comparing runs of two commits.
+
+seed: creates `bench-<n>` users and tasks built by `TaskFactory`. Owners of tasks follow a Zipf distribution,
+      `--anonymous` of them have none. Datasets larger than 100k tasks reuse the same factory-built texts.
+run: serves the project on gunicorn gevent workers (or uses `--url`) and sends `--requests` requests per scenario.
+     Reports requests/s, latency percentiles and the number of queries per request, measured by replaying
+     every scenario once in-process.
+compare: prints changes between two results and fails when requests/s or p99 latency regressed by more than
+         `--threshold` or queries per request grew.
+
+Usage (from the project root, against a migrated database configured via POSTGRES_* env vars):
+    python benchmarks/api.py seed --tasks 100000 --users 1000
+    python benchmarks/api.py run --concurrency 50 --requests 2000 --output results-$(git rev-parse --short HEAD).json
+    python benchmarks/api.py compare results-abc1234.json results-def5678.json
+"""
+
+import load  # patches the standard library for gevent first, so it is imported before anything else
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+from contextlib import nullcontext
+from datetime import timedelta
+from itertools import islice
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import factory
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from tasks.models import Task
+from tasks.tests.factories import TaskFactory
+from users.tests.factories import UserFactory
+
+USERNAME_PREFIX = 'bench-'
+PASSWORD = 'BenchmarkPassword1#'
+DISTINCT_TASKS = 100_000
+SCENARIOS = ('list_anonymous', 'list', 'filter', 'search', 'create', 'login')
+COMPARED_METRICS = ('rps', 'p50_ms', 'p99_ms', 'queries')
+
+
+def progress(message):
+    sys.stderr.write(f'{message}\n')
+
+
+def seed(args):
+    factory.random.reseed_random(args.seed)
+    rng = random.Random(args.seed)
+
+    first = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        UserFactory.build(
+            username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.com', password=password
+        )
+        for i in range(first, first + args.users)
+    )
+    owners = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id').values_list('id', flat=True))
+    weights = [1 / rank**args.skew for rank in range(1, len(owners) + 1)]
+    progress(f'{len(owners)} users')
+
+    texts = factory.build_batch(dict, min(args.tasks, DISTINCT_TASKS), FACTORY_CLASS=TaskFactory)
+    started_at = timezone.now() - timedelta(days=args.days)
+    step = timedelta(days=args.days) / args.tasks
+
+    def build(i):
+        owner = None if rng.random() < args.anonymous else rng.choices(owners, weights)[0]
+        created_at = started_at + step * i
+        return Task(**texts[i % len(texts)], created_by_id=owner, created_at=created_at, updated_at=created_at)
+
+    tasks = (build(i) for i in range(args.tasks))
+    created = 0
+    while batch := list(islice(tasks, args.batch_size)):
+        Task.objects.bulk_create(batch)
+        created += len(batch)
+        progress(f'{created}/{args.tasks} tasks')
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {Task._meta.db_table}')  # noqa: SLF001
+
+
+def get_scenarios():
+    user = User.objects.filter(username=f'{USERNAME_PREFIX}0').first()
+    if user is None:
+        raise SystemExit('No benchmark users, run `seed` first')
+
+    token, _ = Token.objects.get_or_create(user=user)
+    name = Task.objects.get_available_for_user(user).values_list('name', flat=True).first() or 'task'
+    auth = {'Authorization': f'Token {token.key}'}
+    json_auth = {**auth, 'Content-Type': 'application/json'}
+    task = json.dumps({'name': 'Benchmark task', 'description': 'Created by the benchmark'}).encode()
+    credentials = json.dumps({'username': user.username, 'password': PASSWORD}).encode()
+    return {
+        'list_anonymous': load.HTTPRequest(path='/api/tasks/'),
+        'list': load.HTTPRequest(path='/api/tasks/', headers=auth),
+        'filter': load.HTTPRequest(path='/api/tasks/?status=done&order_by=-created_at', headers=auth),
+        'search': load.HTTPRequest(path=f'/api/tasks/?search={name.split()[0]}', headers=auth),
+        'create': load.HTTPRequest('POST', '/api/tasks/', json_auth, task),
+        'login': load.HTTPRequest('POST', '/api/auth/login/', {'Content-Type': 'application/json'}, credentials),
+    }
+
+
+def count_queries(request):
+    """
+    Replays `request` through the test client, the first time warms up caches like on a running server.
+    """
+    headers = {header: value for header, value in request.headers.items() if header != 'Content-Type'}
+    content_type = request.headers.get('Content-Type', 'application/octet-stream')
+    client = Client()
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        client.generic(request.method, request.path, request.body or b'', content_type, headers=headers)
+        with CaptureQueriesContext(connection) as queries:
+            client.generic(request.method, request.path, request.body or b'', content_type, headers=headers)
+    return len(queries)
+
+
+def get_commit():
+    result = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=False)
+    return result.stdout.strip() or None
+
+
+def run(args):
+    scenarios = {name: request for name, request in get_scenarios().items() if name in args.scenarios}
+    if args.url:
+        url = urlsplit(args.url)
+        host, port, server = url.hostname, url.port or 80, nullcontext()
+    else:
+        host, port = '127.0.0.1', args.port
+        options = ('-w', str(args.workers), f'--worker-connections={args.concurrency * 2}')
+        server = load.serve('config.wsgi', 'gevent', port, options=options)
+
+    results = {}
+    with server:
+        for name, request in scenarios.items():
+            load.run_load(port, args.concurrency, args.concurrency, request=request, host=host)
+            results[name] = {
+                **load.run_load(port, args.concurrency, args.requests, request=request, host=host),
+                'queries': count_queries(request),
+            }
+            progress(f'{name}: {results[name]}')
+
+    output = {
+        'meta': {
+            'commit': get_commit(),
+            'date': timezone.now().isoformat(),
+            'server': args.url or f'gunicorn gevent, {args.workers} worker(s)',
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'tasks': Task.objects.count(),
+            'users': User.objects.count(),
+        },
+        'scenarios': results,
+    }
+    with open(args.output, 'w') if args.output else nullcontext(sys.stdout) as file:
+        json.dump(output, file, indent=2)
+        file.write('\n')
+
+
+def compare(args):
+    with open(args.baseline) as baseline, open(args.current) as current:
+        old, new = json.load(baseline)['scenarios'], json.load(current)['scenarios']
+
+    regressions = []
+    for name in filter(old.__contains__, new):
+        changes = []
+        for metric in COMPARED_METRICS:
+            before, after = old[name][metric], new[name][metric]
+            change = (after - before) / before if before else 0
+            changes.append(f'{metric} {before} -> {after} ({change:+.1%})')
+            if (
+                (metric == 'rps' and change < -args.threshold)
+                or (metric == 'p99_ms' and change > args.threshold)
+                or (metric == 'queries' and after > before)
+            ):
+                regressions.append(f'{name} {metric}')
+        sys.stdout.write(f'{name}: {", ".join(changes)}\n')
+
+    if regressions:
+        sys.stdout.write(f'Regressions: {", ".join(sorted(regressions))}\n')
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(required=True)
+
+    seed_parser = subparsers.add_parser('seed')
+    seed_parser.set_defaults(handler=seed)
+    seed_parser.add_argument('--tasks', type=int, default=10_000)
+    seed_parser.add_argument('--users', type=int, default=100)
+    seed_parser.add_argument('--anonymous', type=float, default=0.2, help='share of tasks without owner')
+    seed_parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of tasks per user')
+    seed_parser.add_argument('--days', type=int, default=365, help='tasks are created over that many days')
+    seed_parser.add_argument('--batch-size', type=int, default=10_000)
+    seed_parser.add_argument('--seed', type=int, default=0)
+
+    run_parser = subparsers.add_parser('run')
+    run_parser.set_defaults(handler=run)
+    run_parser.add_argument('--concurrency', type=int, default=50)
+    run_parser.add_argument('--requests', type=int, default=2000, help='requests per scenario')
+    run_parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    run_parser.add_argument('--workers', type=int, default=1)
+    run_parser.add_argument('--port', type=int, default=8765)
+    run_parser.add_argument('--url', help='base URL of a running server, none is started then')
+    run_parser.add_argument('--output', help='JSON file to write the results to instead of stdout')
+
+    compare_parser = subparsers.add_parser('compare')
+    compare_parser.set_defaults(handler=compare)
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='tolerated relative change')
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares requests/s and latencies of a single gunicorn worker serving the list, retrieve and auth-check endpoints:
+- `gevent`: `config.wsgi` on a gevent worker with the database connection pool, the default deployment
+- `asgi_sync`: `config.asgi` on a uvicorn worker, views run in a thread per request
+- `asgi_async`: `config.asgi` on a uvicorn worker with API_ASYNC_VIEWS, views run on the event loop
+
+A `benchmark` user owning `--tasks` tasks is created on first run.
+
+Usage (from the project root, against a migrated database configured via POSTGRES_* env vars):
+    python benchmarks/asgi.py --concurrency 50 --requests 2000
+"""
+
+import load  # patches the standard library for gevent first, so it is imported before anything else
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+from tasks.models import Task
+
+SERVERS = {
+    'gevent': ('config.wsgi', 'gevent', {'POSTGRES_POOL': 'yes', 'API_ASYNC_VIEWS': 'no'}),
+    'asgi_sync': ('config.asgi', 'uvicorn.workers.UvicornWorker', {'POSTGRES_POOL': 'no', 'API_ASYNC_VIEWS': 'no'}),
+    'asgi_async': ('config.asgi', 'uvicorn.workers.UvicornWorker', {'POSTGRES_POOL': 'no', 'API_ASYNC_VIEWS': 'yes'}),
+}
+
+
+def seed(tasks):
+    user, _ = User.objects.get_or_create(username='benchmark')
+    token, _ = Token.objects.get_or_create(user=user)
+    missing = tasks - Task.objects.filter(created_by=user).count()
+    Task.objects.bulk_create(
+        Task(name=f'Benchmark task #{i}', description='', created_by=user) for i in range(max(missing, 0))
+    )
+    return token.key, Task.objects.filter(created_by=user).values_list('id', flat=True).first()
+
+
+def benchmark(server, scenarios, args):
+    module, worker_class, env = SERVERS[server]
+    options = ('-w', '1', f'--worker-connections={args.concurrency * 2}')
+    with load.serve(module, worker_class, args.port, env=env, options=options):
+        results = {}
+        for name, request in scenarios.items():
+            load.run_load(args.port, args.concurrency, args.concurrency, request=request)
+            results[name] = load.run_load(args.port, args.concurrency, args.requests, request=request)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=list(SERVERS))
+    args = parser.parse_args()
+
+    key, task_id = seed(args.tasks)
+    headers = {'Authorization': f'Token {key}'}
+    scenarios = {
+        'list': load.HTTPRequest(path='/api/tasks/', headers=headers),
+        'retrieve': load.HTTPRequest(path=f'/api/tasks/{task_id}/', headers=headers),
+        'auth_check': load.HTTPRequest(path='/api/auth/auth-check/', headers=headers),
+    }
+    results = {server: benchmark(server, scenarios, args) for server in args.servers}
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Compares operations/s of the cache backends a worker can use without an external service:
+- `locmem`: Django's LocMemCache, private to every process
+- `file`: Django's FileBasedCache, shared through a directory
+- `shared_memory`: `core.cache.SharedMemoryCache`, shared through a memory-mapped file
+
+`get` reads keys that were set before, `get_miss` keys that were not, `set` overwrites them. Every scenario runs in
+`--processes` forked processes at once and reports their total operations/s.
+
+Usage (from the project root):
+    python benchmarks/cache.py --operations 20000 --value-size 100 --processes 2
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.cache import SharedMemoryCache
+
+KEYS = 1000
+
+
+def make_caches(directory):
+    return {
+        'locmem': LocMemCache('benchmark', {'OPTIONS': {'MAX_ENTRIES': KEYS * 2}}),
+        'file': FileBasedCache(os.path.join(directory, 'file'), {'OPTIONS': {'MAX_ENTRIES': KEYS * 2}}),
+        'shared_memory': SharedMemoryCache(
+            os.path.join(directory, 'shared_memory'), {'OPTIONS': {'MAX_SIZE': 64 * 1024 * 1024}}
+        ),
+    }
+
+
+def run_operations(cache, scenario, operations, value, results):
+    keys = [f'{"missing" if scenario == "get_miss" else "key"}:{i % KEYS}' for i in range(operations)]
+    operation = cache.set if scenario == 'set' else cache.get
+    args = (value,) if scenario == 'set' else ()
+    started_at = time.perf_counter()
+    for key in keys:
+        operation(key, *args)
+    results.put(time.perf_counter() - started_at)
+
+
+def benchmark(cache, scenario, args):
+    value = os.urandom(args.value_size)
+    for i in range(KEYS):
+        cache.set(f'key:{i}', value)
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_operations, args=(cache, scenario, args.operations, value, results))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    durations = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return round(sum(args.operations / duration for duration in durations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=20000, help='operations per process and scenario')
+    parser.add_argument('--value-size', type=int, default=100, help='bytes of every cached value')
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir='/dev/shm' if os.path.isdir('/dev/shm') else None) as directory:
+        results = {
+            name: {scenario: benchmark(cache, scenario, args) for scenario in ('get', 'get_miss', 'set')}
+            for name, cache in make_caches(directory).items()
+        }
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Compares requests/s of the tasks list endpoint served by a single gevent worker with and without the
+database connection pool (`POSTGRES_POOL`).
+
+Usage (from the project root, against a migrated database configured via POSTGRES_* env vars):
+    python benchmarks/db_pool.py --concurrency 50 --requests 2000
+"""
+
+import load  # patches the standard library for gevent first, so it is imported before anything else
+
+import argparse
+import json
+import sys
+
+
+def benchmark(pool_enabled, args):
+    env = {'POSTGRES_POOL': 'yes' if pool_enabled else 'no'}
+    options = ('-w', '1', f'--worker-connections={args.concurrency * 2}')
+    with load.serve('config.wsgi', 'gevent', args.port, env=env, options=options):
+        load.run_load(args.port, args.concurrency, args.concurrency)
+        return load.run_load(args.port, args.concurrency, args.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {
+        'without_pool': benchmark(pool_enabled=False, args=args),
+        'with_pool': benchmark(pool_enabled=True, args=args),
+    }
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares render times of DRF's `JSONRenderer` and `ORJSONRenderer` on task list pages of 100, 1k and 10k tasks.
+Pages are built from unsaved tasks by `TaskModelSerializer`, so no database is needed.
+
+Usage (from the project root):
+    python benchmarks/json_renderer.py --repeat 20
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import argparse
+import json
+import statistics
+import timeit
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSONRenderer
+from tasks.models import Task
+from tasks.serializers import TaskModelSerializer
+
+SIZES = (100, 1000, 10000)
+STATUSES = (Task.STATUS.to_do, Task.STATUS.done)
+
+
+def make_page(size):
+    now = timezone.now()
+    tasks = [
+        Task(
+            id=i,
+            name=f'Task #{i} — ünïcødé',
+            description='Lorem ipsum dolor sit amet, "consectetur" adipiscing elit.\n' * (i % 3),
+            status=STATUSES[i % len(STATUSES)],
+            created_at=now - timedelta(seconds=i, microseconds=i),
+        )
+        for i in range(size, 0, -1)
+    ]
+    return {
+        'next': 'http://testserver/api/tasks/?cursor=cD0x',
+        'previous': None,
+        'results': TaskModelSerializer(tasks, many=True).data,
+    }
+
+
+def measure(renderer, page, repeat):
+    timings = timeit.repeat(lambda: renderer.render(page), number=1, repeat=repeat)
+    return {'median_ms': round(statistics.median(timings) * 1000, 3), 'min_ms': round(min(timings) * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    for size in SIZES:
+        page = make_page(size)
+        stdlib, fast = JSONRenderer(), ORJSONRenderer()
+        if stdlib.render(page) != fast.render(page):
+            raise RuntimeError(f'Renderers disagree on a page of {size} tasks')
+        results[size] = {
+            'bytes': len(stdlib.render(page)),
+            'stdlib': measure(stdlib, page, args.repeat),
+            'orjson': measure(fast, page, args.repeat),
+        }
+        results[size]['speedup'] = round(results[size]['stdlib']['median_ms'] / results[size]['orjson']['median_ms'], 1)
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Load generation shared by the benchmarks: gunicorn servers started in a subprocess and gevent clients
+sending requests over keep-alive connections. Importing this module patches the standard library for gevent,
+so it must be imported before anything else.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from http.client import HTTPConnection
+from typing import NamedTuple
+
+import gevent
+from gevent.pool import Pool
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def wait_for_server(port, timeout=30, path='/api/tasks/', host='127.0.0.1'):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = HTTPConnection(host, port, timeout=1)
+            connection.request('GET', path)
+            connection.getresponse().read()
+            return
+        except OSError:
+            gevent.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not start in {timeout}s')
+
+
+@contextmanager
+def serve(module, worker_class, port, env=None, options=()):
+    """
+    Runs `gunicorn <module>` with the project configuration and extra command line `options` until the block exits.
+    Throttling is disabled unless `env` enables it, the clients would exhaust its limits otherwise.
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'gunicorn',
+            module,
+            '-c',
+            'gunicorn.conf.py',
+            '-k',
+            worker_class,
+            f'--bind=127.0.0.1:{port}',
+            *options,
+        ],
+        env={**os.environ, 'API_THROTTLE_ENABLED': 'no', **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(port)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class HTTPRequest(NamedTuple):
+    method: str = 'GET'
+    path: str = '/api/tasks/'
+    headers: dict = {}
+    body: bytes | None = None
+
+
+def run_load(port, concurrency, requests, request=HTTPRequest(), host='127.0.0.1'):
+    """
+    Sends `requests` copies of `request` from `concurrency` clients, responses other than 2xx are counted as errors.
+    """
+    latencies = []
+    errors = 0
+
+    def worker(count):
+        nonlocal errors
+        connection = HTTPConnection(host, port, timeout=30)
+        for _ in range(count):
+            started_at = time.perf_counter()
+            connection.request(request.method, request.path, body=request.body, headers=request.headers)
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - started_at)
+            if not 200 <= response.status < 300:  # noqa: PLR2004
+                errors += 1
+
+    pool = Pool(concurrency)
+    started_at = time.perf_counter()
+    per_worker, remainder = divmod(requests, concurrency)
+    for i in range(concurrency):
+        pool.spawn(worker, per_worker + (1 if i < remainder else 0))
+    pool.join(raise_error=True)
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        **{f'p{p}_ms': round(latencies[max(int(len(latencies) * p / 100) - 1, 0)] * 1000, 2) for p in PERCENTILES},
+        'max_ms': round(latencies[-1] * 1000, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+    }
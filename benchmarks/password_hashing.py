@@ -0,0 +1,86 @@
+"""
+Measures latencies of the tasks list endpoint served by a single gevent worker while clients log in concurrently,
+with password hashes computed by the worker greenlets (`PASSWORD_HASHING_WORKERS=0`) and by the hashing threads:
+- `idle`: list requests only
+- `login_storm`: list requests sent while `--login-concurrency` clients keep logging in
+
+A `benchmark` user owning `--tasks` tasks is created on first run.
+
+Usage (from the project root, against a migrated database configured via POSTGRES_* env vars):
+    python benchmarks/password_hashing.py --concurrency 20 --requests 2000 --login-concurrency 5
+"""
+
+import load  # patches the standard library for gevent first, so it is imported before anything else
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import gevent
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+from tasks.models import Task
+
+PASSWORD = 'benchmark-password'
+
+
+def seed(tasks):
+    user, _ = User.objects.get_or_create(username='benchmark')
+    user.set_password(PASSWORD)
+    user.save(update_fields=['password'])
+    token, _ = Token.objects.get_or_create(user=user)
+    missing = tasks - Task.objects.filter(created_by=user).count()
+    Task.objects.bulk_create(
+        Task(name=f'Benchmark task #{i}', description='', created_by=user) for i in range(max(missing, 0))
+    )
+    return token.key
+
+
+def benchmark(hashing_workers, list_request, login_request, args):
+    env = {'POSTGRES_POOL': 'yes', 'PASSWORD_HASHING_WORKERS': str(hashing_workers)}
+    options = ('-w', '1', f'--worker-connections={(args.concurrency + args.login_concurrency) * 2}')
+    with load.serve('config.wsgi', 'gevent', args.port, env=env, options=options):
+        load.run_load(args.port, args.concurrency, args.concurrency, request=list_request)
+        results = {'idle': load.run_load(args.port, args.concurrency, args.requests, request=list_request)}
+
+        storm = gevent.spawn(load.run_load, args.port, args.login_concurrency, args.logins, request=login_request)
+        results['login_storm'] = load.run_load(args.port, args.concurrency, args.requests, request=list_request)
+        results['logins'] = storm.get()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=20, help='clients sending list requests')
+    parser.add_argument('--requests', type=int, default=2000, help='list requests per scenario')
+    parser.add_argument('--login-concurrency', type=int, default=5, help='clients logging in')
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--hashing-workers', type=int, default=2, help='PASSWORD_HASHING_WORKERS to compare to 0')
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Token {seed(args.tasks)}'}
+    list_request = load.HTTPRequest(path='/api/tasks/', headers=headers)
+    credentials = json.dumps({'username': 'benchmark', 'password': PASSWORD}).encode()
+    login_request = load.HTTPRequest('POST', '/api/auth/login/', {'Content-Type': 'application/json'}, credentials)
+
+    results = {
+        'in_greenlets': benchmark(0, list_request, login_request, args),
+        'hashing_threads': benchmark(args.hashing_workers, list_request, login_request, args),
+    }
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
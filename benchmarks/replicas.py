@@ -0,0 +1,87 @@
+"""
+Checks read-your-writes consistency and measures the tasks list of a single gevent worker reading from the
+primary only and from the read replicas at `--replicas`:
+- `primary`: no replicas configured
+- `replicas`: clients are pinned to the primary for POSTGRES_REPLICA_PIN_SECONDS after they write
+- `replicas_unpinned`: `POSTGRES_REPLICA_PIN_SECONDS=0`
+
+Every scenario creates `--checks` tasks, each one followed by a list request from the same client, and counts the
+lists that miss the task just created as `stale_reads`. A `benchmark` user is created on first run.
+
+Usage (from the project root, against a migrated database configured via POSTGRES_* env vars, and a streaming
+replica of it, like the `db-replica` service of the `replica` docker-compose profile):
+    python benchmarks/replicas.py --replicas db-replica:5432 --checks 200 --concurrency 20 --requests 2000
+"""
+
+import load  # patches the standard library for gevent first, so it is imported before anything else
+
+import argparse
+import json
+import os
+import sys
+from http.client import HTTPConnection
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+
+def seed():
+    user, _ = User.objects.get_or_create(username='benchmark')
+    token, _ = Token.objects.get_or_create(user=user)
+    return {'Authorization': f'Token {token.key}', 'Content-Type': 'application/json'}
+
+
+def count_stale_reads(port, headers, checks):
+    connection = HTTPConnection('127.0.0.1', port, timeout=30)
+    stale_reads = 0
+    for i in range(checks):
+        body = json.dumps({'name': f'Replica check #{i}', 'description': 'Created by the benchmark'}).encode()
+        connection.request('POST', '/api/tasks/', body=body, headers=headers)
+        created = json.loads(connection.getresponse().read())
+        connection.request('GET', '/api/tasks/', headers=headers)
+        listed = json.loads(connection.getresponse().read())
+        if all(task['id'] != created['id'] for task in listed['results']):
+            stale_reads += 1
+    return stale_reads
+
+
+def benchmark(env, headers, args):
+    options = ('-w', '1', f'--worker-connections={args.concurrency * 2}')
+    with load.serve('config.wsgi', 'gevent', args.port, env={'POSTGRES_POOL': 'yes', **env}, options=options):
+        results = {'stale_reads': count_stale_reads(args.port, headers, args.checks)}
+        request = load.HTTPRequest(path='/api/tasks/', headers=headers)
+        load.run_load(args.port, args.concurrency, args.concurrency, request=request)
+        results['list'] = load.run_load(args.port, args.concurrency, args.requests, request=request)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--replicas', required=True, help='POSTGRES_REPLICAS, comma separated `host[:port]` items')
+    parser.add_argument('--checks', type=int, default=200, help='tasks created and listed right away per scenario')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    headers = seed()
+    results = {
+        'primary': benchmark({'POSTGRES_REPLICAS': ''}, headers, args),
+        'replicas': benchmark({'POSTGRES_REPLICAS': args.replicas}, headers, args),
+        'replicas_unpinned': benchmark(
+            {'POSTGRES_REPLICAS': args.replicas, 'POSTGRES_REPLICA_PIN_SECONDS': '0'}, headers, args
+        ),
+    }
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
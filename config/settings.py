@@ -33,6 +33,55 @@ env = environ.Env(
     POSTGRES_DB=(str, ''),
     POSTGRES_USER=(str, ''),
     POSTGRES_PASSWORD=(str, ''),
+    POSTGRES_CONN_MAX_AGE=(int, 0),
+    POSTGRES_CONN_HEALTH_CHECKS=(bool, True),
+    POSTGRES_POOL=(bool, False),
+    POSTGRES_POOL_MAX_CONNS=(int, 10),
+    POSTGRES_POOL_REUSE_CONNS=(int, 10),
+    POSTGRES_REPLICAS=(list, []),
+    POSTGRES_REPLICA_SELECTION=(str, 'round_robin'),
+    POSTGRES_REPLICA_MAX_LAG=(float, 10),
+    POSTGRES_REPLICA_LAG_CHECK_INTERVAL=(float, 1),
+    POSTGRES_REPLICA_PIN_SECONDS=(float, 5),
+    POSTGRES_REPLICA_PIN_CACHE_ALIAS=(str, 'shared'),
+    API_JSON_BACKEND=(str, 'orjson'),
+    API_ASYNC_VIEWS=(bool, False),
+    LOG_FORMAT=(str, 'json'),
+    LOG_ACCESS_SAMPLE_RATE=(float, 1.0),
+    LOG_QUEUE_MAX_SIZE=(int, 10000),
+    PASSWORD_HASHING_WORKERS=(int, 2),
+    METRICS_ENABLED=(bool, True),
+    METRICS_SCRAPE_TOKEN=(str, ''),
+    REQUEST_PROFILING_RATE=(float, 0),
+    REQUEST_PROFILING_SECRET=(str, ''),
+    REQUEST_PROFILING_BACKEND=(str, 'cprofile'),
+    REQUEST_PROFILING_DIR=(str, str(ROOT_DIR('profiles'))),
+    DATA_MIGRATION_BATCH_SIZE=(int, 10000),
+    DATA_MIGRATION_THROTTLE=(float, 0),
+    TASK_SEARCH_MODE=(str, 'fulltext'),
+    TASK_BULK_MAX_SIZE=(int, 1000),
+    TASK_EXPORT_CHUNK_SIZE=(int, 2000),
+    TASK_IMPORT_BATCH_SIZE=(int, 1000),
+    TASK_IMPORT_MAX_ERRORS=(int, 1000),
+    TASK_TOMBSTONE_RETENTION_DAYS=(int, 30),
+    SHARED_CACHE_PATH=(str, '/dev/shm/task_app_cache'),
+    SHARED_CACHE_MAX_SIZE=(int, 32 * 1024 * 1024),
+    TASK_LIST_CACHE_ENABLED=(bool, False),
+    TASK_LIST_CACHE_ALIAS=(str, 'task_list'),
+    TASK_LIST_CACHE_TTL=(int, 60),
+    TASK_LIST_CACHE_MAX_ENTRIES=(int, 1000),
+    TASK_LIST_CACHE_MAX_ENTRY_SIZE=(int, 256 * 1024),
+    TOKEN_AUTH_CACHE_MAX_SIZE=(int, 10000),
+    TOKEN_AUTH_CACHE_TTL=(int, 60),
+    TOKEN_AUTH_SHARED_CACHE_ALIAS=(str, 'shared'),
+    TOKEN_AUTH_SHARED_CACHE_TTL=(int, 300),
+    API_NUM_PROXIES=(int, 0),
+    API_THROTTLE_ENABLED=(bool, True),
+    API_THROTTLE_CACHE_ALIAS=(str, 'shared'),
+    API_THROTTLE_LOGIN_RATE=(str, '30/min'),
+    API_THROTTLE_REGISTER_RATE=(str, '20/hour'),
+    API_THROTTLE_TASK_WRITE_ANON_RATE=(str, '60/min'),
+    API_THROTTLE_TASK_WRITE_USER_RATE=(str, '600/min'),
 )
 
 DEBUG = env.bool('DJANGO_DEBUG')
@@ -47,15 +96,20 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
+    'core',
     'tasks',
     'users',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestIDMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +138,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -95,9 +150,90 @@ DATABASES = {
         'PASSWORD': env('POSTGRES_PASSWORD'),
         'HOST': env('POSTGRES_HOST'),
         'PORT': env('POSTGRES_PORT'),
+        'CONN_MAX_AGE': env('POSTGRES_CONN_MAX_AGE'),
+        'CONN_HEALTH_CHECKS': env('POSTGRES_CONN_HEALTH_CHECKS'),
     }
 }
 
+# Per-worker connection pool for gevent workers, psycopg2 is made cooperative in `gunicorn.conf.py`.
+# Persistent connections (CONN_MAX_AGE) are only safe with sync workers, under gevent every greenlet
+# would keep its own connection open, so they are disabled in favor of the pool.
+if env('POSTGRES_POOL'):
+    DATABASES['default'].update(
+        {
+            'ENGINE': 'django_db_geventpool.backends.postgresql_psycopg2',
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'MAX_CONNS': env('POSTGRES_POOL_MAX_CONNS'),
+                'REUSE_CONNS': env('POSTGRES_POOL_REUSE_CONNS'),
+            },
+        }
+    )
+
+# Read replicas
+# Streaming replicas of `default` at POSTGRES_REPLICAS, `host` or `host:port` items, are the `replica_<n>` aliases.
+# Safe-method requests read the MODELS from one of them, picked by `round_robin` or `least_lag` among those lagging at
+# most MAX_LAG seconds, as measured by every process each LAG_CHECK_INTERVAL seconds. Clients that sent an unsafe
+# request in the last PIN_SECONDS read from `default`, to see their own writes. Clients are told apart by their
+# Authorization header, or by their address without one. Tests read replicas through `default`.
+for index, address in enumerate(env('POSTGRES_REPLICAS')):
+    host, _, port = address.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': int(port or DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+DATABASE_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias.startswith('replica_')],
+    # the change feed reads tombstones, tasks and the snapshot its sync tokens start from on the same replica
+    'MODELS': ('tasks.Task', 'tasks.TaskTombstone', 'authtoken.Token'),
+    'SELECTION': env('POSTGRES_REPLICA_SELECTION'),
+    'MAX_LAG': env('POSTGRES_REPLICA_MAX_LAG'),
+    'LAG_CHECK_INTERVAL': env('POSTGRES_REPLICA_LAG_CHECK_INTERVAL'),
+    'PIN_SECONDS': env('POSTGRES_REPLICA_PIN_SECONDS'),
+    'PIN_CACHE_ALIAS': env('POSTGRES_REPLICA_PIN_CACHE_ALIAS'),
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# `shared` is mapped from a file by all workers of the host, it takes SHARED_CACHE_MAX_SIZE bytes of memory
+# when the file is on a tmpfs like /dev/shm
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'core.cache.SharedMemoryCache',
+        'LOCATION': env('SHARED_CACHE_PATH'),
+        'OPTIONS': {
+            'MAX_SIZE': env('SHARED_CACHE_MAX_SIZE'),
+        },
+    },
+    'task_list': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task_list',
+        'TIMEOUT': env('TASK_LIST_CACHE_TTL'),
+        'OPTIONS': {
+            'MAX_ENTRIES': env('TASK_LIST_CACHE_MAX_ENTRIES'),
+        },
+    },
+}
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# PBKDF2 hashes are computed by a pool of PASSWORD_HASHING_WORKERS native threads per process, so that logins do not
+# block the gevent hub, with 0 the requesting thread hashes them. The others are the default hashers of Django.
+PASSWORD_HASHERS = [
+    'core.hashing.OffloadedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASHING_WORKERS = env('PASSWORD_HASHING_WORKERS')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -115,19 +251,37 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Records are formatted by the logging greenlet and written to stderr by a thread of each process, so that slow
+# log writes do not block the gevent hub. LOG_FORMAT is `json` or `verbose`, and access records of gunicorn
+# below 5xx are sampled at LOG_ACCESS_SAMPLE_RATE
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
+        'json': {
+            '()': 'core.logs.JSONFormatter',
+        },
         'verbose': {
             'format': '%(asctime)s %(levelname)s [%(name)s:%(lineno)s] %(module)s %(process)d %(thread)d %(message)s'
-        }
+        },
+    },
+    'filters': {
+        'request_context': {
+            '()': 'core.logs.RequestContextFilter',
+        },
+        'access_sampling': {
+            '()': 'core.logs.AccessLogFilter',
+            'rate': env('LOG_ACCESS_SAMPLE_RATE'),
+        },
     },
     'handlers': {
         'console': {
             'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            '()': 'core.logs.QueueHandler',
+            'stream': 'ext://sys.stderr',
+            'max_size': env('LOG_QUEUE_MAX_SIZE'),
+            'formatter': env('LOG_FORMAT'),
+            'filters': ['request_context'],
         }
     },
     'loggers': {
@@ -179,13 +333,95 @@ ADMIN_SITE_HEADER = 'Task App'
 ADMIN_SITE_TITLE = 'Task App'
 
 # DRF
+# `orjson` renders and parses the same bytes as the stock `stdlib` classes, only faster
+API_JSON_BACKENDS = {
+    'stdlib': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+    'orjson': ('core.renderers.ORJSONRenderer', 'core.parsers.ORJSONParser'),
+}
+API_JSON_RENDERER, API_JSON_PARSER = API_JSON_BACKENDS[env('API_JSON_BACKEND')]
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        API_JSON_RENDERER,
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        API_JSON_PARSER,
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
-    'DEFAULT_AUTHENTICATION_CLASSES': ('rest_framework.authentication.TokenAuthentication',),
+    'DEFAULT_AUTHENTICATION_CLASSES': ('users.authentication.CachedTokenAuthentication',),
+    'DEFAULT_THROTTLE_CLASSES': ('core.throttling.TokenBucketThrottle',),
+    # Reverse proxies in front of the app, clients are identified by the X-Forwarded-For address the last of them
+    # added, by the address of the connection with 0. Other X-Forwarded-For addresses are set by the clients.
+    'NUM_PROXIES': env('API_NUM_PROXIES'),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
+# Serve views mixing in `core.views.AsyncDispatchMixin` with their coroutine handlers, enable it when running
+# `config.asgi` only: under WSGI every request would start an event loop of its own
+API_ASYNC_VIEWS = env('API_ASYNC_VIEWS')
+
+# Token authentication cache
+# Per-process LRU in front of an optional shared cache from `CACHES`, which also carries revocations to the LRUs of
+# other workers. Without one, they keep revoked tokens for up to `TTL` seconds.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': env('TOKEN_AUTH_CACHE_MAX_SIZE'),
+    'TTL': env('TOKEN_AUTH_CACHE_TTL'),
+    'SHARED_CACHE_ALIAS': env('TOKEN_AUTH_SHARED_CACHE_ALIAS'),
+    'SHARED_TTL': env('TOKEN_AUTH_SHARED_CACHE_TTL'),
+}
+
+# Throttling
+# Token buckets of views with a `throttle_scope`, `<scope>_user` rates limit authenticated requests per user and
+# `<scope>_anon` rates the other ones per client address, empty rates do not limit. The cache has to provide an atomic
+# `update()`, checked at startup, like `shared` which also makes the limits apply to all workers of a host together.
+API_THROTTLE = {
+    'ENABLED': env('API_THROTTLE_ENABLED'),
+    'CACHE_ALIAS': env('API_THROTTLE_CACHE_ALIAS'),
+    'RATES': {
+        'login_anon': env('API_THROTTLE_LOGIN_RATE'),
+        'register_anon': env('API_THROTTLE_REGISTER_RATE'),
+        'task_write_anon': env('API_THROTTLE_TASK_WRITE_ANON_RATE'),
+        'task_write_user': env('API_THROTTLE_TASK_WRITE_USER_RATE'),
+    },
+}
+
+# Tasks
+# `fulltext` uses the indexed `search_vector` column, `substring` keeps plain ILIKE matching
+TASK_SEARCH_MODE = env('TASK_SEARCH_MODE')
+# Maximum number of items accepted by a single bulk request
+TASK_BULK_MAX_SIZE = env('TASK_BULK_MAX_SIZE')
+# Rows fetched from the server-side cursor and rendered at once by the streaming export
+TASK_EXPORT_CHUNK_SIZE = env('TASK_EXPORT_CHUNK_SIZE')
+# Rows validated and inserted at once by imports, and the number of row errors kept in an import report
+TASK_IMPORT_BATCH_SIZE = env('TASK_IMPORT_BATCH_SIZE')
+TASK_IMPORT_MAX_ERRORS = env('TASK_IMPORT_MAX_ERRORS')
+# Days tombstones of deleted tasks are kept for the change feed, older sync tokens are rejected
+TASK_TOMBSTONE_RETENTION_DAYS = env('TASK_TOMBSTONE_RETENTION_DAYS')
+# Read-through cache of list responses, entries larger than MAX_ENTRY_SIZE bytes are not cached.
+# Versions live in the same cache, so it has to be shared between workers, like `shared`, to invalidate all of them.
+TASK_LIST_CACHE = {
+    'ENABLED': env('TASK_LIST_CACHE_ENABLED'),
+    'ALIAS': env('TASK_LIST_CACHE_ALIAS'),
+    'TTL': env('TASK_LIST_CACHE_TTL'),
+    'MAX_ENTRY_SIZE': env('TASK_LIST_CACHE_MAX_ENTRY_SIZE'),
+}
+
+# Request metrics and profiling
+# Per-route metrics of every worker are served at /metrics/ to scrapes sent with `Authorization: Bearer
+# <METRICS_SCRAPE_TOKEN>`, not at all without a token. Requests sent with `X-Profile: <HEADER_SECRET>`
+# and a RATE share of the others are profiled with `cprofile` or `pyinstrument`, captures are written to DIR
+METRICS_ENABLED = env('METRICS_ENABLED')
+METRICS_SCRAPE_TOKEN = env('METRICS_SCRAPE_TOKEN')
+REQUEST_PROFILING = {
+    'RATE': env('REQUEST_PROFILING_RATE'),
+    'HEADER_SECRET': env('REQUEST_PROFILING_SECRET'),
+    'BACKEND': env('REQUEST_PROFILING_BACKEND'),
+    'DIR': env('REQUEST_PROFILING_DIR'),
+}
+
+# Batched data migrations
+# Primary keys updated per committed batch, and seconds slept between batches
+DATA_MIGRATION_BATCH_SIZE = env('DATA_MIGRATION_BATCH_SIZE')
+DATA_MIGRATION_THROTTLE = env('DATA_MIGRATION_THROTTLE')
 
 # Spectacular
 SPECTACULAR_SETTINGS = {
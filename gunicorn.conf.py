@@ -20,6 +20,7 @@ GUNICORN_LOGGERS = {
     },
     'gunicorn.access': {
         'handlers': ['console'],
+        'filters': ['access_sampling'],
         'propagate': False,
         'level': 'INFO',
     },
@@ -27,3 +28,21 @@ GUNICORN_LOGGERS = {
 
 LOGGING['loggers'].update(GUNICORN_LOGGERS)
 logconfig_dict = LOGGING
+
+
+def post_fork(server, worker):
+    if 'gevent' in server.cfg.worker_class_str:
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+        worker.log.info('Made psycopg2 cooperative')
+
+
+def worker_exit(server, worker):
+    from django.db import connections
+
+    from core.logs import stop_queue_listeners
+
+    for connection in connections.all(initialized_only=True):
+        getattr(connection, 'closeall', connection.close)()
+    stop_queue_listeners()
@@ -1,17 +1,49 @@
+import shutil
+import tempfile
+from pathlib import Path
+
 import pytest
-from rest_framework.test import APIClient
+from django.conf import settings
+from django.core.cache import caches
+from core.testing import BudgetedAPIClient
 
+from tasks.tests.budgets import BUDGETS as TASK_BUDGETS
+from users.tests.budgets import BUDGETS as USER_BUDGETS
 from users.tests.factories import UserFactory, TEST_USER_PASSWORD
 
+# Replica alias for routing tests, it reads the test database of `default`
+settings.DATABASES['replica_test'] = {**settings.DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+# File of the `shared` cache for this session, so that tests neither clear the cache of the app running on the host
+# nor share entries with other test runs
+SHARED_CACHE_DIR = tempfile.mkdtemp(prefix='task_app_test_cache-')
+settings.CACHES['shared']['LOCATION'] = str(Path(SHARED_CACHE_DIR) / 'cache')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def remove_shared_cache():
+    yield
+    shutil.rmtree(SHARED_CACHE_DIR, ignore_errors=True)
+
 
 @pytest.fixture(autouse=True)
 def enable_db_access(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for cache in caches.all(initialized_only=True):
+        cache.clear()
+
+
 @pytest.fixture
-def api_client():
-    return APIClient()
+def api_client(request):
+    client = BudgetedAPIClient()
+    client.budgets = {**TASK_BUDGETS, **USER_BUDGETS}
+    client.check_timings = request.node.get_closest_marker('perf') is not None
+    return client
 
 
 @pytest.fixture
@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+    verbose_name = _('Core app')
+
+    def ready(self):
+        from django.conf import settings
+
+        from core import hashing  # noqa: F401
+        from core.instrumentation import instrument_serializers
+        from core.throttling import get_bucket_cache
+
+        # serializer times are only reported by the metrics middleware
+        if settings.METRICS_ENABLED:
+            instrument_serializers()
+        # fail at startup rather than with every throttled request
+        if settings.API_THROTTLE['ENABLED']:
+            get_bucket_cache()
@@ -0,0 +1,411 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import time
+from threading import Lock
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MAGIC = b'SHMCACHE'
+# magic, stripes, entries of a stripe, chunk size
+FILE_HEADER = struct.Struct('<8sIII')
+FILE_HEADER_SIZE = 64
+# first free chunk, free chunks
+STRIPE_HEADER = struct.Struct('<iI')
+# key hash, expires at (0 never), last access, first chunk, entry size, key size
+ENTRY = struct.Struct('<8sdQiII4x')
+EXPIRES_AT = struct.Struct('<d')
+ACCESSED_AT = struct.Struct('<Q')
+NEXT_CHUNK = struct.Struct('<i')
+HASH_SIZE = 8
+EMPTY_HASH = bytes(HASH_SIZE)
+
+# Segments mapped by this process, by file and layout
+_segments = {}
+_segments_lock = Lock()
+
+
+class StripeLock:
+    """
+    Locks a stripe for the threads of the process with `lock`, and for other processes with a shared or exclusive
+    `fcntl` record lock on byte `position` of the file. Record locks belong to the process, so its threads share
+    the thread lock for both modes.
+    """
+
+    def __init__(self, fd, position, lock, exclusive):
+        self.fd = fd
+        self.position = position
+        self.lock = lock
+        self.mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            fcntl.lockf(self.fd, self.mode, 1, self.position)
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, self.position)
+        self.lock.release()
+
+
+class SharedMemorySegment:
+    """
+    Fixed-size key/value store in a memory-mapped file, shared by every process mapping the same file.
+
+    The file is split into stripes, the hash of a key picks the stripe its entry lives in. A stripe holds an
+    open addressing index of entries by the 64-bit hash of their key and a pool of chunks of `chunk_size` bytes.
+    Entries, the key followed by the value, are written to a chain of free chunks, so a stripe holds at most as
+    many entries as chunks and its index, twice that large, stays at most half full.
+
+    Stripes are locked with `fcntl` record locks, shared by readers and exclusive for writers, and with a thread
+    lock within the process. When a write needs chunks a stripe does not have free, expired entries and then the
+    least recently read ones are evicted, at least 1/`evict_fraction` of the stripe at once so that scans of
+    the stripe stay rare. Access times are updated by readers under the shared lock, concurrent readers of an
+    entry race harmlessly to store it.
+
+    The file is laid out again when it was created with other options, which breaks processes still mapping
+    it, so all of them have to be restarted together when the options change.
+    """
+
+    evict_fraction = 16
+
+    def __init__(self, path, max_size, stripes, chunk_size):
+        self.path = path
+        self.stripes = stripes
+        self.chunk_size = chunk_size
+        self.payload_size = chunk_size - NEXT_CHUNK.size
+        self.capacity = (max_size - FILE_HEADER_SIZE) // stripes // (2 * ENTRY.size + chunk_size)
+        if self.capacity < 1:
+            raise ValueError(f'{max_size} bytes do not fit a chunk of {chunk_size} bytes in {stripes} stripes')
+        self.index_size = 2 * self.capacity
+        self.chunks_offset = STRIPE_HEADER.size + self.index_size * ENTRY.size
+        self.stripe_size = self.chunks_offset + self.capacity * chunk_size
+        self.size = FILE_HEADER_SIZE + stripes * self.stripe_size
+        self.pid = os.getpid()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self.map()
+        except BaseException:
+            os.close(self.fd)
+            raise
+        locks = [Lock() for _ in range(stripes)]
+        self.read_locks = [StripeLock(self.fd, stripe + 1, locks[stripe], False) for stripe in range(stripes)]
+        self.write_locks = [StripeLock(self.fd, stripe + 1, locks[stripe], True) for stripe in range(stripes)]
+
+    def map(self):
+        header = FILE_HEADER.pack(MAGIC, self.stripes, self.capacity, self.chunk_size)
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            if os.pread(self.fd, FILE_HEADER.size, 0) != header or os.fstat(self.fd).st_size != self.size:
+                os.ftruncate(self.fd, 0)
+                os.ftruncate(self.fd, self.size)
+                self.mmap = mmap.mmap(self.fd, self.size)
+                for stripe in range(self.stripes):
+                    self.reset(self.get_offset(stripe))
+                self.mmap[: FILE_HEADER.size] = header
+            else:
+                self.mmap = mmap.mmap(self.fd, self.size)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, 0)
+
+    def close(self):
+        self.mmap.close()
+        os.close(self.fd)
+
+    def get_offset(self, stripe):
+        return FILE_HEADER_SIZE + stripe * self.stripe_size
+
+    @staticmethod
+    def get_position(offset, slot):
+        return offset + STRIPE_HEADER.size + slot * ENTRY.size
+
+    def locate(self, key):
+        digest = hashlib.blake2b(key, digest_size=HASH_SIZE).digest()
+        if digest == EMPTY_HASH:
+            digest = b'\x01' + digest[1:]
+        return digest, int.from_bytes(digest) % self.stripes
+
+    def get_home(self, digest):
+        return int.from_bytes(digest) // self.stripes % self.index_size
+
+    def reset(self, offset):
+        start = self.get_position(offset, 0)
+        self.mmap[start : start + self.index_size * ENTRY.size] = bytes(self.index_size * ENTRY.size)
+        chunks = offset + self.chunks_offset
+        for chunk in range(self.capacity):
+            NEXT_CHUNK.pack_into(self.mmap, chunks + chunk * self.chunk_size, chunk + 1)
+        STRIPE_HEADER.pack_into(self.mmap, offset, 0, self.capacity)
+
+    def find(self, offset, digest, key=None):
+        """
+        Returns the slot of the entry of `key` with the hash `digest`, or of the first entry with that hash
+        without `key`, and the position of the slot. The slot is the first free one after the entries probed
+        when there is no such entry, -1 is returned instead of it then.
+        """
+        slot = self.get_home(digest)
+        while True:
+            position = self.get_position(offset, slot)
+            stored = self.mmap[position : position + HASH_SIZE]
+            if stored == EMPTY_HASH:
+                return -1, position
+            if stored == digest and (key is None or self.read(position, offset, key_only=True) == key):
+                return slot, position
+            slot = (slot + 1) % self.index_size
+
+    def read(self, position, offset, key_only=False):
+        _, _, _, chunk, size, key_size = ENTRY.unpack_from(self.mmap, position)
+        if key_only:
+            size = key_size
+        chunks = offset + self.chunks_offset
+        parts = []
+        while size > 0:
+            position = chunks + chunk * self.chunk_size
+            length = min(size, self.payload_size)
+            parts.append(self.mmap[position + NEXT_CHUNK.size : position + NEXT_CHUNK.size + length])
+            size -= length
+            (chunk,) = NEXT_CHUNK.unpack_from(self.mmap, position)
+        return b''.join(parts)
+
+    def is_expired(self, position, now):
+        expires_at = EXPIRES_AT.unpack_from(self.mmap, position + HASH_SIZE)[0]
+        return 0 < expires_at <= now
+
+    def count_chunks(self, size):
+        return max(-(-size // self.payload_size), 1)
+
+    def store(self, offset, digest, key, value, expires_at):
+        data = key + value
+        count = self.count_chunks(len(data))
+        if count > self.capacity:
+            return False
+        if STRIPE_HEADER.unpack_from(self.mmap, offset)[1] < count:
+            self.evict(offset, count)
+
+        first_free, free = STRIPE_HEADER.unpack_from(self.mmap, offset)
+        chunks = offset + self.chunks_offset
+        chunk = first_free
+        for start in range(0, len(data), self.payload_size):
+            position = chunks + chunk * self.chunk_size
+            part = data[start : start + self.payload_size]
+            self.mmap[position + NEXT_CHUNK.size : position + NEXT_CHUNK.size + len(part)] = part
+            (chunk,) = NEXT_CHUNK.unpack_from(self.mmap, position)
+        STRIPE_HEADER.pack_into(self.mmap, offset, chunk, free - count)
+
+        _, position = self.find(offset, digest, key)
+        ENTRY.pack_into(
+            self.mmap, position, digest, expires_at or 0, time.monotonic_ns(), first_free, len(data), len(key)
+        )
+        return True
+
+    def remove(self, offset, slot):
+        position = self.get_position(offset, slot)
+        _, _, _, first, size, _ = ENTRY.unpack_from(self.mmap, position)
+        first_free, free = STRIPE_HEADER.unpack_from(self.mmap, offset)
+        chunks = offset + self.chunks_offset
+        count = self.count_chunks(size)
+        last = first
+        for _ in range(count - 1):
+            (last,) = NEXT_CHUNK.unpack_from(self.mmap, chunks + last * self.chunk_size)
+        NEXT_CHUNK.pack_into(self.mmap, chunks + last * self.chunk_size, first_free)
+        STRIPE_HEADER.pack_into(self.mmap, offset, first, free + count)
+
+        # entries probed past the removed one move back into the hole, lookups stop at the first free slot
+        hole = slot
+        while True:
+            slot = (slot + 1) % self.index_size
+            position = self.get_position(offset, slot)
+            digest = self.mmap[position : position + HASH_SIZE]
+            if digest == EMPTY_HASH:
+                break
+            if (slot - self.get_home(digest)) % self.index_size >= (slot - hole) % self.index_size:
+                hole_position = self.get_position(offset, hole)
+                self.mmap[hole_position : hole_position + ENTRY.size] = self.mmap[position : position + ENTRY.size]
+                hole = slot
+        position = self.get_position(offset, hole)
+        self.mmap[position : position + HASH_SIZE] = EMPTY_HASH
+
+    def evict(self, offset, count):
+        """
+        Frees at least `count` chunks of the stripe at `offset`.
+        """
+        start = self.get_position(offset, 0)
+        now = time.time()
+        entries = sorted(
+            (0 if 0 < expires_at <= now else accessed_at, digest)
+            for digest, expires_at, accessed_at, *_ in ENTRY.iter_unpack(
+                self.mmap[start : start + self.index_size * ENTRY.size]
+            )
+            if digest != EMPTY_HASH
+        )
+        target = min(max(count, self.capacity // self.evict_fraction), self.capacity)
+        for accessed_at, digest in entries:
+            if accessed_at and STRIPE_HEADER.unpack_from(self.mmap, offset)[1] >= target:
+                break
+            self.remove(offset, self.find(offset, digest)[0])
+
+    def get(self, key):
+        digest, stripe = self.locate(key)
+        offset = self.get_offset(stripe)
+        with self.read_locks[stripe]:
+            slot, position = self.find(offset, digest, key)
+            if slot == -1 or self.is_expired(position, time.time()):
+                return None
+            ACCESSED_AT.pack_into(self.mmap, position + HASH_SIZE + EXPIRES_AT.size, time.monotonic_ns())
+            return self.read(position, offset)[len(key) :]
+
+    def set(self, key, value, expires_at, only_new=False):
+        """
+        Stores `value` under `key` until `expires_at`, None for never. Returns False when the key was kept
+        because of `only_new`, or when the entry is larger than a stripe, an older value is deleted then.
+        """
+        digest, stripe = self.locate(key)
+        offset = self.get_offset(stripe)
+        with self.write_locks[stripe]:
+            slot, position = self.find(offset, digest, key)
+            if slot != -1:
+                if only_new and not self.is_expired(position, time.time()):
+                    return False
+                self.remove(offset, slot)
+            return self.store(offset, digest, key, value, expires_at)
+
+    def update(self, key, func, create=False, expires_at=None):
+        """
+        Replaces the value of `key` with `func(value)` and returns the new value, None when the key is missing.
+        With `create`, a missing key is stored with `func(None)` and the entry expires at `expires_at` either way,
+        otherwise it keeps its expiry.
+        """
+        digest, stripe = self.locate(key)
+        offset = self.get_offset(stripe)
+        with self.write_locks[stripe]:
+            slot, position = self.find(offset, digest, key)
+            if slot == -1 or self.is_expired(position, time.time()):
+                if not create:
+                    return None
+                value = func(None)
+            else:
+                if not create:
+                    expires_at = EXPIRES_AT.unpack_from(self.mmap, position + HASH_SIZE)[0]
+                value = func(self.read(position, offset)[len(key) :])
+            if slot != -1:
+                self.remove(offset, slot)
+            return value if self.store(offset, digest, key, value, expires_at) else None
+
+    def touch(self, key, expires_at):
+        digest, stripe = self.locate(key)
+        offset = self.get_offset(stripe)
+        with self.write_locks[stripe]:
+            slot, position = self.find(offset, digest, key)
+            if slot == -1 or self.is_expired(position, time.time()):
+                return False
+            EXPIRES_AT.pack_into(self.mmap, position + HASH_SIZE, expires_at or 0)
+            return True
+
+    def delete(self, key):
+        digest, stripe = self.locate(key)
+        offset = self.get_offset(stripe)
+        with self.write_locks[stripe]:
+            slot, position = self.find(offset, digest, key)
+            if slot == -1:
+                return False
+            expired = self.is_expired(position, time.time())
+            self.remove(offset, slot)
+            return not expired
+
+    def clear(self):
+        for stripe in range(self.stripes):
+            with self.write_locks[stripe]:
+                self.reset(self.get_offset(stripe))
+
+
+def get_segment(path, max_size, stripes, chunk_size):
+    key = (path, max_size, stripes, chunk_size)
+    segment = _segments.get(key)
+    # thread locks held while forking stay locked in the child, forked processes map the file again
+    if segment is None or segment.pid != os.getpid():
+        with _segments_lock:
+            segment = _segments.get(key)
+            if segment is None or segment.pid != os.getpid():
+                segment = _segments[key] = SharedMemorySegment(*key)
+    return segment
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Cache shared by all processes of a host through `SharedMemorySegment`, mapped from the file at LOCATION,
+    preferably on a tmpfs like /dev/shm. OPTIONS:
+    - MAX_SIZE: size of the file in bytes, all entries and their bookkeeping fit in it
+    - STRIPES: independently locked parts of the cache
+    - CHUNK_SIZE: allocation unit of entries, an entry takes at least one chunk and at most one stripe
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.segment_options = (
+            location,
+            int(options.get('MAX_SIZE', 64 * 1024 * 1024)),
+            int(options.get('STRIPES', 16)),
+            int(options.get('CHUNK_SIZE', 1024)),
+        )
+
+    @property
+    def segment(self):
+        return get_segment(*self.segment_options)
+
+    def encode_key(self, key, version):
+        return self.make_and_validate_key(key, version=version).encode()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        return self.segment.set(self.encode_key(key, version), pickled, self.get_backend_timeout(timeout), True)
+
+    def get(self, key, default=None, version=None):
+        pickled = self.segment.get(self.encode_key(key, version))
+        return default if pickled is None else pickle.loads(pickled)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        self.segment.set(self.encode_key(key, version), pickled, self.get_backend_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.segment.touch(self.encode_key(key, version), self.get_backend_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        def add_delta(pickled):
+            return pickle.dumps(pickle.loads(pickled) + delta, self.pickle_protocol)
+
+        key = self.encode_key(key, version)
+        pickled = self.segment.update(key, add_delta)
+        if pickled is None:
+            raise ValueError(f"Key '{key.decode()}' not found")
+        return pickle.loads(pickled)
+
+    def update(self, key, func, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Atomically replaces the value of `key` with `func(value)`, `func(None)` when it is missing, stores it for
+        `timeout` and returns it.
+        """
+
+        def apply(pickled):
+            return pickle.dumps(func(None if pickled is None else pickle.loads(pickled)), self.pickle_protocol)
+
+        key = self.encode_key(key, version)
+        pickled = self.segment.update(key, apply, True, self.get_backend_timeout(timeout))
+        return None if pickled is None else pickle.loads(pickled)
+
+    def has_key(self, key, version=None):
+        return self.segment.get(self.encode_key(key, version)) is not None
+
+    def delete(self, key, version=None):
+        return self.segment.delete(self.encode_key(key, version))
+
+    def clear(self):
+        self.segment.clear()
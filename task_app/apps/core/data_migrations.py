@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+
+from core.models import DataMigrationProgress
+
+
+class BatchedUpdate:
+    """
+    `RunPython` code updating rows of a model with one set-based `UPDATE ... WHERE pk BETWEEN` per range of
+    `batch_size` primary keys, in primary key order.
+
+    Every batch is committed together with the last processed primary key in `DataMigrationProgress`, so the
+    migration must be declared with `atomic = False` and depend on `('core', '0001_initial')`. A run that was
+    interrupted resumes after the last committed batch, the progress record is removed once all rows up to the
+    largest primary key seen at start are updated.
+    `DATA_MIGRATION_THROTTLE` seconds are slept between batches to leave room for regular traffic.
+
+    `updates` are keyword arguments of `QuerySet.update()` and `condition` an optional `Q` narrowing the rows,
+    both are evaluated against the historical model. `name` identifies the progress record, so forward and
+    reverse code need distinct names.
+    """
+
+    def __init__(self, name, model, updates, condition=None, batch_size=None):
+        self.name = name
+        self.model = model
+        self.updates = updates
+        self.condition = condition
+        self.batch_size = batch_size or settings.DATA_MIGRATION_BATCH_SIZE
+
+    def __call__(self, apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.in_atomic_block:
+            raise RuntimeError(f'{self.name} commits per batch, declare the migration with atomic = False')
+
+        progress = DataMigrationProgress.objects.using(connection.alias)
+        model = apps.get_model(self.model)
+        queryset = model._base_manager.using(connection.alias)  # noqa: SLF001
+        if self.condition is not None:
+            queryset = queryset.filter(self.condition)
+
+        bounds = queryset.aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+        last_pk = progress.filter(name=self.name).values_list('last_pk', flat=True).first()
+        start = bounds['min_pk'] if last_pk is None else max(bounds['min_pk'] or 0, last_pk + 1)
+
+        while bounds['max_pk'] is not None and start <= bounds['max_pk']:
+            end = start + self.batch_size - 1
+            with transaction.atomic(using=connection.alias):
+                queryset.filter(pk__range=(start, end)).update(**self.updates)
+                progress.update_or_create(name=self.name, defaults={'last_pk': end})
+            start = end + 1
+            if settings.DATA_MIGRATION_THROTTLE:
+                time.sleep(settings.DATA_MIGRATION_THROTTLE)
+
+        progress.filter(name=self.name).delete()
@@ -0,0 +1,113 @@
+import concurrent.futures
+import os
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from gevent.monkey import get_original, is_module_patched
+from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+
+from core.metrics import DURATION_BUCKETS, format_histogram, metrics
+
+# worker threads update the counters, gevent locks can only be used by greenlets of the hub that created them
+allocate_lock = get_original('_thread', 'allocate_lock')
+
+
+class HashingExecutor:
+    """
+    Runs password hashing on at most `max_workers` native threads of every process, callers wait for the result.
+    Hashing is pure CPU work, on a gevent worker it would block every greenlet of the process until it is done.
+    hashlib releases the GIL while hashing, so greenlets keep being served, and `max_workers` bounds how much
+    CPU a login storm takes from them. Hashes wait in a queue when all threads are busy.
+
+    With `max_workers` 0 hashes are computed by the calling thread.
+    """
+
+    def __init__(self, max_workers, buckets=DURATION_BUCKETS):
+        self.max_workers = max_workers
+        self.buckets = buckets
+        self.queued = 0
+        self.running = 0
+        self.wait_buckets = [0] * (len(buckets) + 1)
+        self.wait_time = 0.0
+        self.hash_buckets = [0] * (len(buckets) + 1)
+        self.hash_time = 0.0
+        self._executor = None
+        self._pid = None
+        self._lock = allocate_lock()
+
+    def get_executor(self):
+        # pools are not inherited by forked workers, and gevent pools belong to the hub of the thread creating them
+        if self._executor is None or self._pid != os.getpid():
+            executor_class = (
+                NativeThreadPoolExecutor if is_module_patched('threading') else concurrent.futures.ThreadPoolExecutor
+            )
+            self._executor = executor_class(self.max_workers, thread_name_prefix='password-hashing')
+            self._pid = os.getpid()
+        return self._executor
+
+    def run(self, fn, *args):
+        if not self.max_workers:
+            return self.call(fn, args, time.perf_counter())
+        with self._lock:
+            self.queued += 1
+        return self.get_executor().submit(self.call, fn, args, time.perf_counter()).result()
+
+    def call(self, fn, args, submitted_at):
+        started_at = time.perf_counter()
+        waited = started_at - submitted_at
+        with self._lock:
+            if self.max_workers:
+                self.queued -= 1
+            self.running += 1
+            self.wait_buckets[bisect_left(self.buckets, waited)] += 1
+            self.wait_time += waited
+        try:
+            return fn(*args)
+        finally:
+            duration = time.perf_counter() - started_at
+            with self._lock:
+                self.running -= 1
+                self.hash_buckets[bisect_left(self.buckets, duration)] += 1
+                self.hash_time += duration
+
+    def clear(self):
+        with self._lock:
+            self.wait_buckets = [0] * (len(self.buckets) + 1)
+            self.wait_time = 0.0
+            self.hash_buckets = [0] * (len(self.buckets) + 1)
+            self.hash_time = 0.0
+
+    def render(self):
+        with self._lock:
+            return [
+                '# HELP password_hashing_queued Password hashes waiting for a hashing thread.',
+                '# TYPE password_hashing_queued gauge',
+                f'password_hashing_queued {self.queued}',
+                '# HELP password_hashing_running Password hashes being computed.',
+                '# TYPE password_hashing_running gauge',
+                f'password_hashing_running {self.running}',
+                '# HELP password_hashing_wait_seconds Time password hashes waited for a hashing thread.',
+                '# TYPE password_hashing_wait_seconds histogram',
+                *format_histogram('password_hashing_wait_seconds', '', self.buckets, self.wait_buckets, self.wait_time),
+                '# HELP password_hashing_seconds Time spent computing password hashes.',
+                '# TYPE password_hashing_seconds histogram',
+                *format_histogram('password_hashing_seconds', '', self.buckets, self.hash_buckets, self.hash_time),
+            ]
+
+
+hashing_executor = HashingExecutor(settings.PASSWORD_HASHING_WORKERS)
+metrics.register(hashing_executor)
+
+
+class OffloadedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2PasswordHasher computing hashes on `hashing_executor`, hashes are the same as those of the stock hasher.
+    Covers `authenticate()`, including the hash computed for unknown users, and `set_password()`.
+    The inherited `harden_runtime()` hashes through `encode()` as well, offloading it again would have it wait
+    for a hashing thread from one of them.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return hashing_executor.run(super().encode, password, salt, iterations)
@@ -0,0 +1,122 @@
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import NamedTuple
+
+from django.db import connections
+from rest_framework import serializers
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+class Budget(NamedTuple):
+    """
+    Upper bounds of the work done by a request, times are in milliseconds. `None` leaves a metric unbounded.
+    Tests declare them per view class and action (or lowercase HTTP method for plain APIViews), see `core.testing`.
+    """
+
+    queries: int | None = None
+    db_time: float | None = None
+    serializer_time: float | None = None
+    duration: float | None = None
+
+
+class RequestStats:
+    """
+    Work done while `collect()` is active: SQL statements and the time spent running them,
+    and the time spent in (de)serialization. Times are in seconds.
+    Serialization is added to the stats of enclosing `collect()` blocks as well.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.duration = 0.0
+        self.serializing = False
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started_at
+            self.queries += 1
+
+    def exceeded(self, budget):
+        """
+        Returns messages for the metrics of `budget` that are exceeded.
+        """
+        measured = {
+            'queries': self.queries,
+            'db_time': self.db_time * 1000,
+            'serializer_time': self.serializer_time * 1000,
+            'duration': self.duration * 1000,
+        }
+        return [
+            f'{metric} {measured[metric]:.6g} > {limit}'
+            for metric, limit in budget._asdict().items()
+            if limit is not None and measured[metric] > limit
+        ]
+
+
+@contextmanager
+def collect():
+    stats = RequestStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    started_at = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats.execute_wrapper))
+            yield stats
+    finally:
+        stats.duration = time.perf_counter() - started_at
+        _current_stats.reset(token)
+
+
+def serialization(func):
+    """
+    Adds the time spent in `func` to `serializer_time` of the collected stats, nested calls are counted once.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = _current_stats.get()
+        if stats is None or stats.serializing:
+            return func(*args, **kwargs)
+
+        stats.serializing = True
+        started_at = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            stats.serializing = False
+            while stats is not None:
+                stats.serializer_time += elapsed
+                stats = stats.parent
+
+    return wrapper
+
+
+def instrument_serializers():
+    """
+    Times `is_valid()` and `.data` of DRF serializers as serialization, serializers are only patched once.
+    """
+    if hasattr(serializers.BaseSerializer.is_valid, '__wrapped__'):
+        return
+    serializers.BaseSerializer.is_valid = serialization(serializers.BaseSerializer.is_valid)
+    for serializer_class in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+        serializer_class.data = property(serialization(serializer_class.data.fget))
+
+
+def get_view_budget(budgets, view_func, method):
+    """
+    Returns the budget in `budgets` of the view resolved to `view_func`, viewsets key them by action.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    return budgets.get(view_class, {}).get(actions.get(method.lower(), method.lower()))
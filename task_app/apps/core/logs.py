@@ -0,0 +1,196 @@
+import atexit
+import datetime
+import logging
+import logging.handlers
+import os
+import random
+import re
+import time
+import uuid
+from collections.abc import Mapping
+from contextvars import ContextVar
+from weakref import WeakSet
+
+import orjson
+from gevent.monkey import get_original
+
+# gevent patches threads into greenlets, the listener needs an OS thread so that writes do not block the hub
+start_new_thread, allocate_lock, RLock = get_original('_thread', ('start_new_thread', 'allocate_lock', 'RLock'))
+SimpleQueue = get_original('queue', 'SimpleQueue')
+
+_current_request = ContextVar('log_request', default=None)
+_queue_handlers = WeakSet()
+
+REQUEST_ID_PATTERN = re.compile(r'[\w.-]{1,64}', re.ASCII)
+LOG_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request'}
+
+
+def start_request(request):
+    """
+    Tags `request` with the `X-Request-ID` it was sent with, or a new one, and makes it the current request
+    of log records. Returns the token for `end_request()`.
+    """
+    request_id = request.headers.get('X-Request-ID', '')
+    request.request_id = request_id if REQUEST_ID_PATTERN.fullmatch(request_id) else uuid.uuid4().hex
+    request.started_at = time.perf_counter()
+    return _current_request.set(request)
+
+
+def end_request(token):
+    _current_request.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds `request_id` and `duration_ms`, the time since the request started, to records logged while
+    serving a request or passed one, like those of `django.request`.
+    """
+
+    def filter(self, record):
+        request = getattr(record, 'request', None) or _current_request.get()
+        if hasattr(request, 'request_id'):
+            record.request_id = request.request_id
+            record.duration_ms = round((time.perf_counter() - request.started_at) * 1000, 3)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes a `rate` share of records below WARNING.
+    """
+
+    def __init__(self, rate=1.0, name=''):
+        super().__init__(name)
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class AccessLogFilter(SamplingFilter):
+    """
+    Samples gunicorn access records, server errors are always kept,
+    and adds the request fields from their atoms to them.
+    """
+
+    def filter(self, record):
+        atoms = record.args if isinstance(record.args, Mapping) else {}
+        status = int(atoms.get('s') or 0)
+        if status < 500 and not super().filter(record):  # noqa: PLR2004
+            return False
+        if atoms:
+            record.method = atoms['m']
+            record.path = atoms['U']
+            record.status = status
+            record.size = atoms['B']
+            record.duration_ms = atoms['D'] / 1000
+            record.request_id = atoms.get('{x-request-id}o')
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as JSON lines, `extra` fields and those added by filters are included.
+    """
+
+    def format(self, record):
+        payload = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.UTC).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+        }
+        payload.update((key, value) for key, value in vars(record).items() if key not in LOG_RECORD_FIELDS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return orjson.dumps(payload, default=str).decode()
+
+
+class QueueListener(logging.handlers.QueueListener):
+    def start(self):
+        self.pid = os.getpid()
+        self._stopped = allocate_lock()
+        self._stopped.acquire()
+        start_new_thread(self._run, ())
+
+    def _run(self):
+        try:
+            self._monitor()
+        finally:
+            self._stopped.release()
+
+    def stop(self):
+        self.enqueue_sentinel()
+        self._stopped.acquire()
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Formats records in the logging thread or greenlet and writes them to `stream` from a thread of its own.
+    When more than `max_size` records wait to be written, new ones are dropped and counted.
+
+    The listener thread is started by the first record of every process and stopped, after writing the
+    records left, when the handler is closed or by `stop_queue_listeners()`.
+    """
+
+    def __init__(self, stream=None, max_size=10000):
+        super().__init__(SimpleQueue())
+        self.target = logging.StreamHandler(stream)
+        self.target.lock = RLock()
+        self.max_size = max_size
+        self.dropped = 0
+        self.listener = None
+        _queue_handlers.add(self)
+
+    def emit(self, record):
+        if self.listener is None or self.listener.pid != os.getpid():
+            self.start()
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            super().emit(self.dropped_record(dropped))
+        super().emit(record)
+
+    def dropped_record(self, dropped):
+        return logging.makeLogRecord(
+            {
+                'name': __name__,
+                'levelno': logging.WARNING,
+                'levelname': logging.getLevelName(logging.WARNING),
+                'msg': f'Dropped {dropped} log records, the log queue was full',
+            }
+        )
+
+    def start(self):
+        # after a fork the queue can still hold records the parent has not written yet
+        self.queue = SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def stop(self):
+        with self.lock:
+            if self.listener is not None and self.listener.pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+def stop_queue_listeners():
+    """
+    Writes the records queued by all `QueueHandler`s of the process and stops their listeners.
+    """
+    for handler in list(_queue_handlers):
+        handler.stop()
+
+
+atexit.register(stop_queue_listeners)
@@ -0,0 +1,122 @@
+from bisect import bisect_left
+from collections import Counter
+from threading import Lock
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# (name, help, attribute of RouteMetrics)
+ROUTE_COUNTERS = (
+    ('http_request_db_queries_total', 'SQL statements run by requests.', 'queries'),
+    ('http_request_db_seconds_total', 'Time spent running SQL statements.', 'db_time'),
+    ('http_request_serializer_seconds_total', 'Time spent in (de)serialization.', 'serializer_time'),
+    ('http_response_size_bytes_total', 'Size of response bodies, streaming responses are not counted.', 'size'),
+)
+
+
+def format_histogram(name, labels, buckets, counts, total):
+    """
+    Lines of a histogram sample, `counts` holds the observations of every bucket and of `+Inf`, not cumulated.
+    """
+    lines = []
+    cumulative = 0
+    for bound, count in zip((*buckets, '+Inf'), counts, strict=True):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+    labels = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{labels} {total}')
+    lines.append(f'{name}_count{labels} {cumulative}')
+    return lines
+
+
+def format_labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels.items()
+    )
+    return ','.join(f'{name}="{value}"' for name, value in escaped)
+
+
+class RouteMetrics:
+    def __init__(self, buckets):
+        self.statuses = Counter()
+        self.buckets = [0] * (len(buckets) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.size = 0
+
+    @property
+    def count(self):
+        return self.statuses.total()
+
+
+class MetricsRegistry:
+    """
+    Per-process aggregates of requests by route name and method, rendered in the Prometheus text format.
+    Every gunicorn worker keeps its own registry, so a scrape reports the worker that served it.
+
+    Objects added with `register()` render metrics of their own after those of requests.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.collectors = []
+        self._routes = {}
+        self._lock = Lock()
+
+    def register(self, collector):
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    def observe(self, route, method, status, stats, size=None):
+        with self._lock:
+            metrics = self._routes.get((route, method))
+            if metrics is None:
+                metrics = self._routes[(route, method)] = RouteMetrics(self.buckets)
+            metrics.statuses[status] += 1
+            metrics.buckets[bisect_left(self.buckets, stats.duration)] += 1
+            metrics.duration += stats.duration
+            metrics.queries += stats.queries
+            metrics.db_time += stats.db_time
+            metrics.serializer_time += stats.serializer_time
+            metrics.size += size or 0
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+    def render(self):
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                '# HELP http_requests_total Requests by route, method and status code.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (route, method), metrics in routes:
+                for status, count in sorted(metrics.statuses.items()):
+                    labels = format_labels({'route': route, 'method': method, 'status': status})
+                    lines.append(f'http_requests_total{{{labels}}} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds Time spent handling requests.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (route, method), metrics in routes:
+                labels = format_labels({'route': route, 'method': method})
+                lines += format_histogram(
+                    'http_request_duration_seconds', labels, self.buckets, metrics.buckets, metrics.duration
+                )
+
+            for name, help_text, attribute in ROUTE_COUNTERS:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (route, method), metrics in routes:
+                    labels = format_labels({'route': route, 'method': method})
+                    lines.append(f'{name}{{{labels}}} {getattr(metrics, attribute)}')
+
+        for collector in self.collectors:
+            lines += collector.render()
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
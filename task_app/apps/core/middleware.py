@@ -0,0 +1,173 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.throttling import BaseThrottle
+
+from core.instrumentation import collect
+from core.logs import end_request, start_request
+from core.metrics import metrics
+from core.profiling import RequestProfiler
+from core.replicas import collect_issued_credentials, reading_from, select_replica
+
+
+class RequestIDMiddleware:
+    """
+    Tags requests with an id, the `X-Request-ID` they were sent with or a new one, that is added to the records
+    logged while serving them and returned in the `X-Request-ID` response header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        token = start_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        token = start_request(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, SQL count and time, serialization time and response size of every request in
+    `core.metrics.metrics` by route name, and profiles the requests sampled by `core.profiling.RequestProfiler`.
+    Keep it first in MIDDLEWARE so that the other middleware is measured as well.
+    """
+
+    sync_capable = True
+    async_capable = True
+    profile_header = 'X-Profile-Capture'
+
+    def __init__(self, get_response):
+        self.enabled = settings.METRICS_ENABLED
+        self.profiler = RequestProfiler.from_settings()
+        if not self.enabled and not self.profiler.enabled:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        capture, filename = self.profiler.start(request), None
+        with collect() as stats:
+            try:
+                response = self.get_response(request)
+            finally:
+                route = self.get_route(request)
+                if capture is not None:
+                    filename = self.profiler.save(capture, route)
+        return self.process_response(request, response, route, stats, filename)
+
+    async def __acall__(self, request):
+        capture, filename = self.profiler.start(request), None
+        with collect() as stats:
+            try:
+                response = await self.get_response(request)
+            finally:
+                route = self.get_route(request)
+                if capture is not None:
+                    filename = self.profiler.save(capture, route)
+        return self.process_response(request, response, route, stats, filename)
+
+    def process_response(self, request, response, route, stats, filename):
+        if self.enabled:
+            size = None if response.streaming else len(response.content)
+            metrics.observe(route, request.method, response.status_code, stats, size)
+        if filename and self.profiler.is_requested(request):
+            response[self.profile_header] = filename
+        return response
+
+    @staticmethod
+    def get_route(request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        return resolver_match.view_name if resolver_match is not None else 'unmatched'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serves reads of safe-method requests from a replica of DATABASE_REPLICAS through `core.replicas.ReplicaRouter`.
+    Clients are pinned to the primary for PIN_SECONDS after an unsafe request so that they read their own writes.
+    A client is told apart by its Authorization header, or by the address it is throttled by without one, which
+    honours NUM_PROXIES. Credentials passed to `core.replicas.issue_credentials()`, like tokens created at login,
+    are pinned along with the client. Pins are kept in the PIN_CACHE_ALIAS cache.
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = frozenset(('GET', 'HEAD', 'OPTIONS'))
+    key_prefix = 'replica-pin:'
+
+    def __init__(self, get_response):
+        config = settings.DATABASE_REPLICAS
+        if not config['ALIASES']:
+            raise MiddlewareNotUsed
+        self.pin_seconds = config['PIN_SECONDS']
+        self.cache = caches[config['PIN_CACHE_ALIAS']]
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        with reading_from(self.get_replica(request)), collect_issued_credentials() as issued:
+            response = self.get_response(request)
+        self.pin(request, issued)
+        return response
+
+    async def __acall__(self, request):
+        # lag measurements query the replicas, which cannot be done on the event loop
+        with reading_from(await sync_to_async(self.get_replica)(request)), collect_issued_credentials() as issued:
+            response = await self.get_response(request)
+        await sync_to_async(self.pin)(request, issued)
+        return response
+
+    def get_pin_key(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if authorization:
+            return self.get_credentials_pin_key(authorization)
+        return f'{self.key_prefix}address:{BaseThrottle().get_ident(request)}'
+
+    def get_credentials_pin_key(self, authorization):
+        return f'{self.key_prefix}{hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()}'
+
+    def get_replica(self, request):
+        if request.method not in self.safe_methods or self.cache.get(self.get_pin_key(request)):
+            return None
+        return select_replica()
+
+    def pin(self, request, issued_credentials=()):
+        if self.pin_seconds and request.method not in self.safe_methods:
+            keys = [self.get_pin_key(request), *map(self.get_credentials_pin_key, issued_credentials)]
+            self.cache.set_many(dict.fromkeys(keys, True), timeout=self.pin_seconds)
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:00
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataMigrationProgress',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Name')),
+                ('last_pk', models.BigIntegerField(verbose_name='Last processed primary key')),
+                ('updated_at', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='Updated at')),
+            ],
+            options={
+                'verbose_name': 'Data migration progress',
+                'verbose_name_plural': 'Data migrations progress',
+                'db_table': 'core_data_migration_progress',
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from model_utils.fields import AutoLastModifiedField
+
+
+class DataMigrationProgress(models.Model):
+    """
+    Last primary key processed by a batched data migration, kept until the migration completes.
+    Migrations running a `BatchedUpdate` depend on `core.0001_initial`, which creates the table.
+    """
+
+    name = models.CharField(max_length=255, primary_key=True, verbose_name=_('Name'))
+    last_pk = models.BigIntegerField(verbose_name=_('Last processed primary key'))
+    updated_at = AutoLastModifiedField(verbose_name=_('Updated at'))
+
+    class Meta:
+        db_table = 'core_data_migration_progress'
+        verbose_name = _('Data migration progress')
+        verbose_name_plural = _('Data migrations progress')
+
+    def __str__(self):
+        return f'{self.name} at {self.last_pk}'
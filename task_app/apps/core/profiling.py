@@ -0,0 +1,102 @@
+import cProfile
+import random
+import time
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.crypto import constant_time_compare
+
+
+class CProfileCapture:
+    extension = 'prof'
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def save(self, path):
+        self.profiler.disable()
+        self.profiler.dump_stats(path)
+
+
+class PyinstrumentCapture:
+    extension = 'html'
+
+    def __init__(self):
+        from pyinstrument import Profiler
+
+        self.profiler = Profiler()
+        self.profiler.start()
+
+    def save(self, path):
+        self.profiler.stop()
+        Path(path).write_text(self.profiler.output_html())
+
+
+CAPTURES = {
+    'cprofile': CProfileCapture,
+    'pyinstrument': PyinstrumentCapture,
+}
+
+
+class RequestProfiler:
+    """
+    Profiles requests sent with the `X-Profile: <HEADER_SECRET>` header and a random `RATE` share of the others,
+    captures are written to `DIR` and named after the route. At most one request per process is profiled at
+    a time, under gevent a capture also covers greenlets that ran concurrently.
+    """
+
+    header = 'HTTP_X_PROFILE'
+
+    def __init__(self, rate=0, header_secret='', backend='cprofile', directory='.'):
+        if backend not in CAPTURES:
+            raise ImproperlyConfigured(f'Unknown profiling backend {backend!r}, choose one of {", ".join(CAPTURES)}')
+        if backend == 'pyinstrument' and (rate or header_secret):
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError as exc:
+                raise ImproperlyConfigured('Install pyinstrument to use the pyinstrument profiling backend') from exc
+
+        self.rate = rate
+        self.header_secret = header_secret
+        self.capture_class = CAPTURES[backend]
+        self.directory = Path(directory)
+        self.enabled = bool(rate or header_secret)
+        self._lock = Lock()
+
+    @classmethod
+    def from_settings(cls):
+        config = settings.REQUEST_PROFILING
+        return cls(config['RATE'], config['HEADER_SECRET'], config['BACKEND'], config['DIR'])
+
+    def is_requested(self, request):
+        return bool(self.header_secret) and constant_time_compare(request.META.get(self.header, ''), self.header_secret)
+
+    def start(self, request):
+        """
+        Returns a running capture when `request` is sampled, None otherwise.
+        """
+        if not self.enabled or not (self.is_requested(request) or random.random() < self.rate):
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self.capture_class()
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def save(self, capture, route):
+        """
+        Stops `capture` and returns the name of the file it was written to.
+        """
+        try:
+            name = f'{time.strftime("%Y%m%d-%H%M%S")}-{time.time_ns() % 10**9:09d}-{route.replace(":", "-")}'
+            path = self.directory / f'{name}.{capture.extension}'
+            self.directory.mkdir(parents=True, exist_ok=True)
+            capture.save(path)
+            return path.name
+        finally:
+            self._lock.release()
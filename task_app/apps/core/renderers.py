@@ -0,0 +1,96 @@
+import csv
+import io
+import re
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# orjson writes floats differently from `float.__repr__` in exponent notation (`1e16` vs `1e+16`) and for small
+# numbers it writes out positionally (`0.00001` vs `1e-05`). Output containing either fragment is rendered by
+# `JSONRenderer`, a match inside a string only costs that fallback. The patterns are kept to a literal prefix,
+# anything starting with a character class makes the scan slower than orjson itself.
+FLOAT_EXPONENT_RE = re.compile(rb'e[-\d]')
+FLOAT_POSITIONAL_SMALL = b'0.0000'
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement of `JSONRenderer` backed by orjson, producing the same bytes.
+
+    Datetimes, decimals, lazy translation strings and other values without an identical native orjson encoding
+    are handed to the DRF encoder. Output orjson cannot reproduce (indentation, ASCII-only or non-compact
+    separators, exponent floats, integers over 64 bits) is rendered by `JSONRenderer` itself.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if FLOAT_POSITIONAL_SMALL in ret or FLOAT_EXPONENT_RE.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict javascript subset escaping as `JSONRenderer`
+        if b'\xe2\x80' in ret:
+            for separator, escaped in LINE_SEPARATORS:
+                ret = ret.replace(separator, escaped)
+        return ret
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders a list of objects as newline delimited JSON, one object per line.
+    Renders chunks of a stream as well, since every chunk ends with a newline.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+    json_renderer_class = ORJSONRenderer
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        json_renderer = self.json_renderer_class()
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(json_renderer.render(row) + b'\n' for row in rows)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renders a list of flat objects as CSV with a header row.
+
+    Columns are taken from `header` of the renderer context, or from the keys of the first object. Chunks of a
+    stream after the first one are rendered with `write_header` set to False in the context.
+    """
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        rows = data if isinstance(data, list) else [data]
+        header = renderer_context.get('header') or (list(rows[0]) if rows else [])
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=header, extrasaction='ignore')
+        if renderer_context.get('write_header', True):
+            writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
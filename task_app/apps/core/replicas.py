@@ -0,0 +1,146 @@
+import itertools
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from core.metrics import metrics
+
+# seconds the replica is behind, 0 while it has replayed everything it received, NULL on a primary
+LAG_QUERY = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END
+"""
+
+_current_replica = ContextVar('replica', default=None)
+_issued_credentials = ContextVar('issued_credentials', default=None)
+
+
+class ReplicaLag:
+    """
+    Replication lag of every replica in seconds, measured by every process at most once per `interval`, by the
+    request that finds the measurements outdated. Replicas that cannot be queried lag infinitely.
+    """
+
+    def __init__(self):
+        self.lags = {}
+        self.checked_at = -math.inf
+
+    def get(self, aliases, interval):
+        now = time.monotonic()
+        if now - self.checked_at >= interval:
+            # concurrent requests keep using the previous measurements meanwhile
+            self.checked_at = now
+            self.lags = {alias: self.measure(alias) for alias in aliases}
+        return self.lags
+
+    @staticmethod
+    def measure(alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                return float(cursor.fetchone()[0])
+        except DatabaseError:
+            return math.inf
+
+    def clear(self):
+        self.lags = {}
+        self.checked_at = -math.inf
+
+    def render(self):
+        lines = [
+            '# HELP database_replica_lag_seconds Replication lag of read replicas, +Inf when unreachable.',
+            '# TYPE database_replica_lag_seconds gauge',
+        ]
+        lines += [f'database_replica_lag_seconds{{database="{alias}"}} {lag}' for alias, lag in self.lags.items()]
+        return lines
+
+
+replica_lag = ReplicaLag()
+metrics.register(replica_lag)
+_selections = itertools.count()
+
+
+def select_replica():
+    """
+    Returns the alias of a replica of DATABASE_REPLICAS lagging at most MAX_LAG seconds, by round robin or the least
+    lagging one depending on SELECTION, None when there is none.
+    """
+    config = settings.DATABASE_REPLICAS
+    if not config['ALIASES']:
+        return None
+    lags = replica_lag.get(config['ALIASES'], config['LAG_CHECK_INTERVAL'])
+    aliases = [alias for alias in config['ALIASES'] if lags.get(alias, math.inf) <= config['MAX_LAG']]
+    if not aliases:
+        return None
+    if config['SELECTION'] == 'least_lag':
+        return min(aliases, key=lags.__getitem__)
+    return aliases[next(_selections) % len(aliases)]
+
+
+@contextmanager
+def reading_from(alias):
+    """
+    Routes reads of the DATABASE_REPLICAS models to the `alias` replica in the block, to the primary with None.
+    """
+    token = _current_replica.set(alias)
+    try:
+        yield
+    finally:
+        _current_replica.reset(token)
+
+
+@contextmanager
+def collect_issued_credentials():
+    """
+    Collects the Authorization headers passed to `issue_credentials()` in the block.
+    """
+    issued = []
+    token = _issued_credentials.set(issued)
+    try:
+        yield issued
+    finally:
+        _issued_credentials.reset(token)
+
+
+def issue_credentials(authorization):
+    """
+    Pins requests sent with `authorization`, credentials issued by the current request, along with its client,
+    so that their first requests read the credentials from the primary too.
+    """
+    issued = _issued_credentials.get()
+    if issued is not None:
+        issued.append(authorization)
+
+
+class ReplicaRouter:
+    """
+    Sends reads of the DATABASE_REPLICAS models to the replica chosen for the current request by
+    `core.middleware.ReplicaRoutingMiddleware`, everything else goes to the primary. Writes of these models always
+    go to the primary, also for instances read from a replica, and migrations are applied to the primary only.
+    """
+
+    def db_for_read(self, model, **_hints):
+        alias = _current_replica.get()
+        if alias is None or model._meta.label not in settings.DATABASE_REPLICAS['MODELS']:  # noqa: SLF001
+            return None
+        return alias
+
+    def db_for_write(self, model, **_hints):
+        if model._meta.label in settings.DATABASE_REPLICAS['MODELS']:  # noqa: SLF001
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **_hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS['ALIASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:  # noqa: SLF001
+            return True
+        return None
+
+    def allow_migrate(self, db, _app_label, **_hints):
+        if db in settings.DATABASE_REPLICAS['ALIASES']:
+            return False
+        return None
@@ -0,0 +1,40 @@
+from django.urls import Resolver404
+from rest_framework.test import APIClient
+
+from core.instrumentation import Budget, collect, get_view_budget, instrument_serializers
+
+
+# serializer times are collected by `core.apps` with METRICS_ENABLED only
+instrument_serializers()
+
+
+class BudgetedAPIClient(APIClient):
+    """
+    APIClient that keeps the `RequestStats` of every request in `response.stats` and fails with an AssertionError
+    when a request exceeds its `Budget` in `budgets`, which maps view classes to budgets by action or method.
+    Queries run while a streaming response is consumed happen after the request and are not counted. Time budgets
+    are only checked with `check_timings`, which the `api_client` fixture sets for tests marked `perf`, wall time
+    is too noisy for the rest of the suite.
+    """
+
+    budgets = {}
+    check_budgets = True
+    check_timings = False
+
+    def request(self, **kwargs):
+        with collect() as stats:
+            response = super().request(**kwargs)
+        response.stats = stats
+
+        if self.check_budgets:
+            method = response.request['REQUEST_METHOD']
+            try:
+                budget = get_view_budget(self.budgets, response.resolver_match.func, method)
+            except Resolver404:
+                budget = None
+            if budget is not None and not self.check_timings:
+                budget = Budget(queries=budget.queries)
+            if budget is not None and (exceeded := stats.exceeded(budget)):
+                path = response.request['PATH_INFO']
+                raise AssertionError(f'{method} {path} exceeded its budget: {", ".join(exceeded)}')
+        return response
@@ -0,0 +1,142 @@
+import multiprocessing
+from unittest import mock
+
+import pytest
+
+from core.cache import SharedMemoryCache, SharedMemorySegment
+
+
+def make_cache(tmp_path, **options):
+    options = {'MAX_SIZE': 64 * 1024, 'STRIPES': 4, 'CHUNK_SIZE': 256, **options}
+    return SharedMemoryCache(str(tmp_path / 'cache'), {'OPTIONS': options})
+
+
+def set_from_another_process(cache, key, value):
+    process = multiprocessing.get_context('fork').Process(target=cache.set, args=(key, value))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+
+class TestSharedMemoryCache:
+    def test_get_set_delete(self, tmp_path):
+        cache = make_cache(tmp_path)
+        assert cache.get('missing', 'default') == 'default'
+        cache.set('key', {'value': 1})
+        cache.set('none', None)
+        assert cache.get('key') == {'value': 1}
+        assert cache.get('none', 'default') is None
+        assert cache.has_key('none')
+
+        assert cache.delete('key')
+        assert not cache.delete('key')
+        assert cache.get('key') is None
+
+    def test_values_spanning_chunks(self, tmp_path):
+        cache = make_cache(tmp_path)
+        value = bytes(range(256)) * 10
+        cache.set('large', value)
+        cache.set('large', value[:100])
+        cache.set('other', value)
+        assert cache.get('large') == value[:100]
+        assert cache.get('other') == value
+
+    def test_add_incr_touch(self, tmp_path):
+        cache = make_cache(tmp_path)
+        assert cache.add('counter', 1)
+        assert not cache.add('counter', 5)
+        assert cache.incr('counter', 2) == 3
+        assert cache.get('counter') == 3
+        with pytest.raises(ValueError, match="Key ':1:missing' not found"):
+            cache.incr('missing')
+
+        with mock.patch('core.cache.time.time', return_value=1000):
+            cache.set('expiring', 'value', timeout=10)
+            assert cache.touch('expiring', timeout=100)
+        with mock.patch('core.cache.time.time', return_value=1050):
+            assert cache.get('expiring') == 'value'
+        with mock.patch('core.cache.time.time', return_value=1100):
+            assert cache.get('expiring') is None
+            assert not cache.touch('expiring')
+            assert cache.add('expiring', 'new')
+
+    def test_clear(self, tmp_path):
+        cache = make_cache(tmp_path)
+        cache.set_many({f'key{i}': i for i in range(20)})
+        cache.clear()
+        assert cache.get_many([f'key{i}' for i in range(20)]) == {}
+
+    def test_least_recently_read_entries_are_evicted(self, tmp_path):
+        cache = make_cache(tmp_path, MAX_SIZE=16 * 1024, STRIPES=1)
+        slots = cache.segment.capacity
+        for i in range(slots):
+            cache.set(f'key{i}', i)
+        assert cache.get('key0') == 0
+
+        cache.set('new', 'value')
+        assert cache.get('new') == 'value'
+        assert cache.get('key0') == 0
+        assert cache.get('key1') is None
+        assert len(cache.get_many([f'key{i}' for i in range(slots)])) < slots
+
+    def test_expired_entries_are_evicted_first(self, tmp_path):
+        cache = make_cache(tmp_path, MAX_SIZE=16 * 1024, STRIPES=1)
+        slots = cache.segment.capacity
+        for i in range(slots - 1):
+            cache.set(f'key{i}', i, timeout=None)
+        with mock.patch('core.cache.time.time', return_value=1000):
+            cache.set('expiring', 'value', timeout=10)
+        with mock.patch.object(cache.segment, 'evict_fraction', slots):
+            cache.set('new', 'value')
+        assert cache.get('key0') == 0
+        assert cache.get('new') == 'value'
+        assert not cache.segment.delete(cache.make_key('expiring').encode())
+
+    def test_entries_larger_than_a_stripe_are_not_stored(self, tmp_path):
+        cache = make_cache(tmp_path)
+        cache.set('key', 'small')
+        cache.set('key', b'x' * 64 * 1024)
+        assert cache.get('key') is None
+
+    def test_processes_share_entries(self, tmp_path):
+        cache = make_cache(tmp_path)
+        cache.get('warm-up')
+        set_from_another_process(cache, 'key', 'from child')
+        assert cache.get('key') == 'from child'
+        assert make_cache(tmp_path).get('key') == 'from child'
+
+    def test_file_is_laid_out_again_for_other_options(self, tmp_path):
+        path = str(tmp_path / 'cache')
+        segment = SharedMemorySegment(path, 64 * 1024, 4, 256)
+        segment.set(b'key', b'value', None)
+        segment.close()
+        assert SharedMemorySegment(path, 64 * 1024, 4, 256).get(b'key') == b'value'
+        assert SharedMemorySegment(path, 64 * 1024, 2, 256).get(b'key') is None
+
+    def test_update_is_atomic_across_processes(self, tmp_path):
+        cache = make_cache(tmp_path)
+        assert cache.update('counter', lambda value: (value or 0) + 1) == 1
+
+        context = multiprocessing.get_context('fork')
+
+        def increment():
+            for _ in range(200):
+                cache.update('counter', lambda value: value + 1)
+
+        processes = [context.Process(target=increment) for _ in range(2)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert cache.get('counter') == 401
+
+    def test_update_renews_the_expiry(self, tmp_path):
+        cache = make_cache(tmp_path)
+        with mock.patch('core.cache.time.time', return_value=1000):
+            cache.update('key', lambda value: 'first', timeout=10)
+        with mock.patch('core.cache.time.time', return_value=1005):
+            assert cache.update('key', lambda value: value + ' second', timeout=10) == 'first second'
+        with mock.patch('core.cache.time.time', return_value=1012):
+            assert cache.get('key') == 'first second'
+        with mock.patch('core.cache.time.time', return_value=1016):
+            assert cache.update('key', lambda value: value or 'new', timeout=10) == 'new'
@@ -0,0 +1,84 @@
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.db.migrations import RunPython
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Q, Value
+from django.test.utils import CaptureQueriesContext
+
+from core.data_migrations import BatchedUpdate
+from core.models import DataMigrationProgress
+from tasks.models import Task
+from tasks.tests.factories import TaskFactory
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def run(migration):
+    with connection.schema_editor(atomic=False) as schema_editor:
+        migration(apps, schema_editor)
+
+
+class TestBatchedUpdate:
+    @pytest.fixture
+    def tasks(self):
+        return TaskFactory.create_batch(5, name='before', status=Task.STATUS.to_do)
+
+    def test_rows_are_updated_in_primary_key_batches(self, tasks):
+        migration = BatchedUpdate('test', 'tasks.Task', {'name': Value('after')}, batch_size=2)
+        with CaptureQueriesContext(connection) as queries:
+            run(migration)
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "tasks_task"')]
+        assert len(updates) == 3
+        assert all('BETWEEN' in sql for sql in updates)
+        assert set(Task.objects.values_list('name', flat=True)) == {'after'}
+        assert not DataMigrationProgress.objects.exists()
+
+    def test_condition_narrows_rows(self, tasks):
+        run(BatchedUpdate('test', 'tasks.Task', {'name': Value('after')}, condition=Q(pk=tasks[2].pk), batch_size=2))
+        assert list(Task.objects.filter(name='after')) == [tasks[2]]
+
+    def test_interrupted_run_resumes_after_last_batch(self, tasks, settings):
+        settings.DATA_MIGRATION_THROTTLE = 0.01
+        migration = BatchedUpdate('test', 'tasks.Task', {'name': Value('after')}, batch_size=2)
+        with mock.patch('core.data_migrations.time.sleep', side_effect=[None, KeyboardInterrupt]):
+            with pytest.raises(KeyboardInterrupt):
+                run(migration)
+
+        progress = DataMigrationProgress.objects.get(name='test')
+        assert progress.last_pk == tasks[0].pk + 3
+        assert Task.objects.filter(name='after').count() == 4
+
+        # Rows of committed batches are not touched again
+        Task.objects.filter(pk=tasks[0].pk).update(name='reverted')
+        with mock.patch('core.data_migrations.time.sleep') as sleep:
+            run(migration)
+
+        sleep.assert_called_once_with(0.01)
+        assert Task.objects.get(pk=tasks[0].pk).name == 'reverted'
+        assert Task.objects.filter(name='after').count() == 4
+        assert not DataMigrationProgress.objects.exists()
+
+    def test_empty_table(self):
+        run(BatchedUpdate('test', 'tasks.Task', {'name': Value('after')}))
+        assert not DataMigrationProgress.objects.exists()
+
+    def test_atomic_migration_is_rejected(self):
+        with connection.schema_editor(atomic=True) as schema_editor:
+            with pytest.raises(RuntimeError, match='atomic = False'):
+                BatchedUpdate('test', 'tasks.Task', {'name': Value('after')})(apps, schema_editor)
+
+    def test_migrations_depend_on_progress_table(self):
+        loader = MigrationLoader(connection)
+        batched = [
+            key
+            for key, migration in loader.disk_migrations.items()
+            for operation in migration.operations
+            if isinstance(operation, RunPython) and isinstance(operation.code, BatchedUpdate)
+        ]
+        assert batched
+        for key in batched:
+            assert ('core', '0001_initial') in loader.graph.forwards_plan(key), key
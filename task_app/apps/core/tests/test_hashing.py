@@ -0,0 +1,92 @@
+import threading
+import time
+from unittest import mock
+
+import gevent
+import pytest
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.urls import reverse
+
+from core.hashing import HashingExecutor, OffloadedPBKDF2PasswordHasher, hashing_executor
+from core.metrics import metrics
+from users.tests.factories import UserFactory
+
+
+class FastHasher(OffloadedPBKDF2PasswordHasher):
+    iterations = 1000
+
+
+@pytest.fixture(autouse=True)
+def clear_hashing_metrics():
+    hashing_executor.clear()
+    yield
+    hashing_executor.clear()
+
+
+class TestHashingExecutor:
+    @pytest.mark.parametrize('max_workers', (0, 2))
+    def test_results_and_metrics(self, max_workers):
+        executor = HashingExecutor(max_workers, buckets=(0.1, 1))
+        assert executor.run(pow, 2, 10) == 1024
+        assert executor.run(pow, 2, 3) == 8
+        assert (executor.queued, executor.running) == (0, 0)
+
+        lines = executor.render()
+        assert 'password_hashing_wait_seconds_bucket{le="+Inf"} 2' in lines
+        assert 'password_hashing_seconds_count 2' in lines
+        assert 'password_hashing_queued 0' in lines
+
+    def test_exceptions_are_raised_to_the_caller(self):
+        executor = HashingExecutor(1)
+        with pytest.raises(ZeroDivisionError):
+            executor.run(divmod, 1, 0)
+        assert executor.running == 0
+
+    def test_greenlets_run_while_hashing_under_gevent(self):
+        executor = HashingExecutor(1)
+        ticks = []
+
+        def tick():
+            while True:
+                ticks.append(time.perf_counter())
+                gevent.sleep(0.001)
+
+        with mock.patch('core.hashing.is_module_patched', return_value=True):
+            ticker = gevent.spawn(tick)
+            hashed = gevent.spawn(executor.run, PBKDF2PasswordHasher().encode, 'password', 'salt', 2_000_000)
+            hashed.join()
+            ticker.kill()
+        assert hashed.value.startswith('pbkdf2_sha256$2000000$salt$')
+        assert len(ticks) > 10
+
+
+class TestOffloadedPBKDF2PasswordHasher:
+    def test_hashes_match_the_stock_hasher(self):
+        encoded = FastHasher().encode('password', 'salt')
+        assert encoded == PBKDF2PasswordHasher().encode('password', 'salt', iterations=1000)
+        assert FastHasher().verify('password', encoded)
+        assert not FastHasher().verify('other', encoded)
+
+    def test_hardening_older_hashes_does_not_deadlock(self):
+        executor = HashingExecutor(1)
+        encoded = PBKDF2PasswordHasher().encode('password', 'salt', iterations=100)
+        with mock.patch('core.hashing.hashing_executor', executor):
+            hardening = threading.Thread(target=FastHasher().harden_runtime, args=('wrong', encoded), daemon=True)
+            hardening.start()
+            hardening.join(timeout=10)
+        assert not hardening.is_alive()
+        assert (executor.queued, executor.running) == (0, 0)
+        assert 'password_hashing_seconds_count 1' in executor.render()
+
+    def test_passwords_are_hashed_on_the_executor(self):
+        assert check_password('password', make_password('password'))
+        assert 'password_hashing_seconds_count 2' in metrics.render().splitlines()
+
+    def test_login_hashes_on_the_executor(self, api_client):
+        user = UserFactory(password=make_password('password'))
+        hashing_executor.clear()
+        response = api_client.post(
+            reverse('api:users:login'), {'username': user.username, 'password': 'password'}, format='json'
+        )
+        assert response.status_code == 200
+        assert 'password_hashing_seconds_count 1' in metrics.render().splitlines()
@@ -0,0 +1,94 @@
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+
+from core.instrumentation import Budget, RequestStats, collect, get_view_budget, serialization
+from tasks.models import Task
+from tasks.serializers import TaskImportSerializer, TaskModelSerializer
+from tasks.tests.budgets import BUDGETS as TASK_BUDGETS
+from tasks.tests.factories import TaskFactory
+from tasks.views import TaskGenericViewSet
+from users.tests.budgets import BUDGETS as USER_BUDGETS
+from users.views import UserAuthenticationCheckAPIView
+
+
+class TestCollect:
+    def test_queries_and_db_time_are_recorded(self):
+        with collect() as stats:
+            list(Task.objects.all())
+            Task.objects.count()
+        assert stats.queries == 2
+        assert stats.db_time > 0
+        assert stats.duration >= stats.db_time
+
+    def test_nothing_is_recorded_outside(self):
+        with collect() as stats:
+            pass
+        list(Task.objects.all())
+        assert stats.queries == 0
+
+    def test_serializer_time_counts_nested_calls_once(self):
+        inner = serialization(mock.Mock(return_value=1))
+        outer = serialization(lambda: inner() + inner())
+        with collect() as stats, mock.patch('core.instrumentation.time.perf_counter', side_effect=[0, 1, 3, 10]):
+            assert outer() == 2
+        assert stats.serializer_time == 1
+
+    @pytest.mark.parametrize('many', (False, True))
+    def test_drf_serializers_are_timed(self, many):
+        task = TaskFactory()
+        with collect() as stats:
+            assert TaskModelSerializer([task] if many else task, many=many).data
+        assert stats.serializer_time > 0
+
+        with collect() as stats:
+            assert TaskImportSerializer(data={'name': 'name', 'description': 'description'}).is_valid()
+        assert stats.serializer_time > 0
+
+
+class TestBudget:
+    def test_exceeded_metrics_are_reported(self):
+        stats = RequestStats()
+        stats.queries = 3
+        stats.duration = 0.2
+        assert stats.exceeded(Budget(queries=3, duration=250)) == []
+        assert stats.exceeded(Budget(queries=2, db_time=1, duration=100)) == ['queries 3 > 2', 'duration 200 > 100']
+
+    def test_view_budget_is_resolved_by_action_or_method(self):
+        view = TaskGenericViewSet.as_view({'get': 'list', 'post': 'create'})
+        budgets = {**TASK_BUDGETS, **USER_BUDGETS}
+        assert get_view_budget(budgets, view, 'GET') == TASK_BUDGETS[TaskGenericViewSet]['list']
+        assert get_view_budget(budgets, view, 'POST') == TASK_BUDGETS[TaskGenericViewSet]['create']
+        assert get_view_budget(budgets, UserAuthenticationCheckAPIView.as_view(), 'GET') == Budget(queries=1)
+        assert get_view_budget(budgets, UserAuthenticationCheckAPIView.as_view(), 'POST') is None
+        assert get_view_budget({}, view, 'GET') is None
+
+
+class TestBudgetedAPIClient:
+    list_action_url = reverse('api:tasks:tasks-list')
+
+    def test_stats_are_attached_to_responses(self, api_client):
+        TaskFactory.create_batch(2)
+        response = api_client.get(self.list_action_url)
+        assert response.stats.queries == 2
+        assert response.stats.serializer_time > 0
+
+    def test_exceeded_budget_fails(self, api_client):
+        with mock.patch.dict(TASK_BUDGETS[TaskGenericViewSet], {'list': Budget(queries=1)}):
+            with pytest.raises(AssertionError, match=r'GET /api/tasks/ exceeded its budget: queries 2 > 1'):
+                api_client.get(self.list_action_url)
+
+            api_client.check_budgets = False
+            assert api_client.get(self.list_action_url).stats.queries == 2
+
+    def test_time_budgets_are_checked_on_demand(self, api_client):
+        with mock.patch.dict(TASK_BUDGETS[TaskGenericViewSet], {'list': Budget(queries=2, duration=0)}):
+            assert api_client.get(self.list_action_url).status_code == 200
+
+            api_client.check_timings = True
+            with pytest.raises(AssertionError, match=r'GET /api/tasks/ exceeded its budget: duration'):
+                api_client.get(self.list_action_url)
+
+    def test_unresolved_path_has_no_budget(self, api_client):
+        assert api_client.get('/missing/').status_code == 404
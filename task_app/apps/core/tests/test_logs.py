@@ -0,0 +1,115 @@
+import io
+import json
+import logging
+import sys
+from unittest import mock
+
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.logs import (
+    AccessLogFilter,
+    JSONFormatter,
+    QueueHandler,
+    RequestContextFilter,
+    end_request,
+    start_request,
+)
+
+
+def make_record(msg='message', args=None, level=logging.INFO, **extra):
+    record = logging.LogRecord('test', level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def access_record(status=200):
+    atoms = {'m': 'GET', 'U': '/api/tasks/', 's': str(status), 'B': 120, 'D': 2500, '{x-request-id}o': 'abc'}
+    return make_record('%(m)s %(U)s %(s)s', (atoms,))
+
+
+class TestJSONFormatter:
+    def test_record_fields_and_extra_are_included(self):
+        payload = json.loads(JSONFormatter().format(make_record('%s tasks', (3,), request_id='abc')))
+        assert payload['level'] == 'INFO'
+        assert payload['logger'] == 'test'
+        assert payload['message'] == '3 tasks'
+        assert payload['request_id'] == 'abc'
+
+    def test_exception_is_included(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('test', logging.ERROR, __file__, 1, 'failed', None, True)
+            record.exc_info = sys.exc_info()
+        payload = json.loads(JSONFormatter().format(record))
+        assert 'ValueError: boom' in payload['exc_info']
+
+
+class TestRequestContext:
+    def test_request_id_is_added_while_serving_a_request(self):
+        request = RequestFactory().get('/', HTTP_X_REQUEST_ID='upstream-1')
+        token = start_request(request)
+        record = make_record()
+        RequestContextFilter().filter(record)
+        end_request(token)
+        assert record.request_id == 'upstream-1'
+        assert record.duration_ms >= 0
+
+        record = make_record()
+        RequestContextFilter().filter(record)
+        assert not hasattr(record, 'request_id')
+
+    @pytest.mark.parametrize('sent', ('', 'x' * 65, 'a b'))
+    def test_invalid_request_ids_are_replaced(self, sent):
+        request = RequestFactory().get('/', HTTP_X_REQUEST_ID=sent)
+        end_request(start_request(request))
+        assert len(request.request_id) == 32
+
+    def test_request_id_is_returned(self, api_client):
+        response = api_client.get(reverse('api:tasks:tasks-list'), HTTP_X_REQUEST_ID='upstream-1')
+        assert response['X-Request-ID'] == 'upstream-1'
+        assert api_client.get(reverse('api:tasks:tasks-list'))['X-Request-ID'] != 'upstream-1'
+
+
+class TestAccessLogFilter:
+    def test_request_fields_are_added(self):
+        record = access_record()
+        assert AccessLogFilter().filter(record)
+        assert (record.method, record.path, record.status, record.size) == ('GET', '/api/tasks/', 200, 120)
+        assert record.duration_ms == 2.5
+        assert record.request_id == 'abc'
+
+    def test_sampling_keeps_server_errors(self):
+        access_filter = AccessLogFilter(rate=0.1)
+        with mock.patch('core.logs.random.random', side_effect=[0.05, 0.5]):
+            assert access_filter.filter(access_record())
+            assert not access_filter.filter(access_record())
+            assert access_filter.filter(access_record(status=502))
+
+
+class TestQueueHandler:
+    def test_records_are_written_by_the_listener(self):
+        stream = io.StringIO()
+        handler = QueueHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        handler.handle(make_record('first'))
+        handler.handle(make_record('second'))
+        handler.stop()
+        assert [json.loads(line)['message'] for line in stream.getvalue().splitlines()] == ['first', 'second']
+
+    def test_records_are_dropped_when_the_queue_is_full(self):
+        stream = io.StringIO()
+        handler = QueueHandler(stream, max_size=1)
+        handler.start()
+        handler.listener.stop()  # nothing takes records off the queue
+        handler.handle(make_record('first'))
+        handler.handle(make_record('dropped'))
+        assert handler.dropped == 1
+
+        handler.queue.get()
+        handler.listener.start()
+        handler.handle(make_record('second'))
+        handler.close()
+        assert stream.getvalue().splitlines() == ['Dropped 1 log records, the log queue was full', 'second']
@@ -0,0 +1,115 @@
+import pstats
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from django.urls import reverse
+
+from core.instrumentation import RequestStats
+from core.metrics import MetricsRegistry, metrics
+from core.profiling import RequestProfiler
+from tasks.tests.factories import TaskFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.clear()
+    yield
+    metrics.clear()
+
+
+def profiling(tmp_path, **config):
+    return override_settings(
+        REQUEST_PROFILING={'RATE': 0, 'HEADER_SECRET': '', 'BACKEND': 'cprofile', 'DIR': str(tmp_path), **config}
+    )
+
+
+class TestMetricsRegistry:
+    def test_render(self):
+        registry = MetricsRegistry(buckets=(0.1, 1))
+        stats = RequestStats()
+        stats.queries, stats.db_time, stats.serializer_time, stats.duration = 2, 0.01, 0.02, 0.5
+        registry.observe('api:tasks:tasks-list', 'GET', 200, stats, size=100)
+        registry.observe('api:tasks:tasks-list', 'GET', 304, stats)
+        labels = 'route="api:tasks:tasks-list",method="GET"'
+        lines = registry.render().splitlines()
+        assert f'http_requests_total{{{labels},status="200"}} 1' in lines
+        assert f'http_requests_total{{{labels},status="304"}} 1' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 0' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="1"}} 2' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+        assert f'http_request_duration_seconds_sum{{{labels}}} 1.0' in lines
+        assert f'http_request_duration_seconds_count{{{labels}}} 2' in lines
+        assert f'http_request_db_queries_total{{{labels}}} 4' in lines
+        assert f'http_response_size_bytes_total{{{labels}}} 100' in lines
+        assert '# TYPE http_request_duration_seconds histogram' in lines
+
+
+class TestRequestMetricsMiddleware:
+    @pytest.fixture(autouse=True)
+    def scrape_token(self, settings):
+        settings.METRICS_SCRAPE_TOKEN = 'scrape'
+
+    def test_requests_are_recorded_by_route(self, api_client):
+        TaskFactory.create_batch(2)
+        response = api_client.get(reverse('api:tasks:tasks-list'))
+        api_client.get('/missing/')
+
+        body = api_client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape').content.decode()
+        labels = 'route="api:tasks:tasks-list",method="GET"'
+        assert f'http_requests_total{{{labels},status="200"}} 1' in body
+        assert f'http_request_duration_seconds_count{{{labels}}} 1' in body
+        assert f'http_request_db_queries_total{{{labels}}} {response.stats.queries}' in body
+        assert f'http_response_size_bytes_total{{{labels}}} {len(response.content)}' in body
+        assert 'http_requests_total{route="unmatched",method="GET",status="404"} 1' in body
+
+    @pytest.mark.parametrize('authorization', (None, 'Bearer guess', 'scrape'))
+    def test_unauthorized_scrapes_are_forbidden(self, authorization, api_client):
+        headers = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+        response = api_client.get(reverse('metrics'), **headers)
+        assert response.status_code == 403
+        assert b'http_requests_total' not in response.content
+
+    @override_settings(METRICS_SCRAPE_TOKEN='')
+    def test_not_served_without_token(self, api_client):
+        assert api_client.get(reverse('metrics')).status_code == 404
+        assert api_client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code == 404
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self, api_client):
+        api_client.get(reverse('api:tasks:tasks-list'))
+        assert api_client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape').status_code == 404
+        assert 'tasks-list' not in metrics.render()
+
+
+class TestRequestProfiling:
+    def test_requests_sent_with_the_secret_header_are_profiled(self, api_client, tmp_path):
+        with profiling(tmp_path, HEADER_SECRET='secret'):
+            response = api_client.get(reverse('api:tasks:tasks-list'), HTTP_X_PROFILE='secret')
+            assert 'X-Profile-Capture' not in api_client.get(reverse('api:tasks:tasks-list'), HTTP_X_PROFILE='guess')
+
+        filename = response['X-Profile-Capture']
+        assert filename.endswith('-api-tasks-tasks-list.prof')
+        assert [path.name for path in tmp_path.iterdir()] == [filename]
+        assert pstats.Stats(str(tmp_path / filename)).total_calls > 0
+
+    def test_sampled_requests_are_profiled(self, api_client, tmp_path):
+        with profiling(tmp_path, RATE=0.5), mock.patch('core.profiling.random.random', side_effect=[0.4, 0.6]):
+            response = api_client.get(reverse('api:tasks:tasks-list'))
+            api_client.get(reverse('api:tasks:tasks-list'))
+
+        assert 'X-Profile-Capture' not in response
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_one_request_is_profiled_at_a_time(self, tmp_path):
+        profiler = RequestProfiler(rate=1, directory=tmp_path)
+        capture = profiler.start(mock.Mock())
+        assert profiler.start(mock.Mock()) is None
+        profiler.save(capture, 'route')
+        profiler.save(profiler.start(mock.Mock()), 'route')
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_unknown_backend(self):
+        with pytest.raises(ImproperlyConfigured):
+            RequestProfiler(backend='perf')
@@ -0,0 +1,80 @@
+import io
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from tasks.models import Task
+from tasks.tests.factories import TaskFactory
+
+
+class TestORJSONRenderer:
+    @pytest.mark.parametrize(
+        'data',
+        (
+            {'created_at': datetime(2024, 2, 29, 23, 59, 59, 123456, tzinfo=timezone.utc)},
+            [datetime(2024, 1, 1), date(2024, 1, 1), time(12, 30, 15, 5), timedelta(days=1, seconds=5)],
+            {'status': Task.STATUS.done, 'choices': list(Task.STATUS), 'label': _('Not found.')},
+            {'detail': _('Not found.'), 'errors': [{'id': [_('Not found.')]}]},
+            ReturnDict({'id': 1, 'name': 'ünïcødé ✓ "quoted" \\ / slash'}, serializer=None),
+            {'text': 'line\nbreak\ttab \x00\x1f\x7f \u2028 \u2029 \U0001f600'},
+            {'decimal': Decimal('1.10'), 'uuid': UUID(int=1), 'set': [], 'tuple': (1, 2), 'bool': True},
+            {'float': [0.1, 1.5, -0.0, 1e16, 1e-5, 2.5e-7, 1.5e300, 123456789.123], 'big': 2**70},
+            {1: 'non string key'},
+            [],
+            '',
+        ),
+    )
+    def test_output_matches_json_renderer(self, data):
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_none_renders_empty(self):
+        assert ORJSONRenderer().render(None) == b''
+
+    @pytest.mark.parametrize('media_type', ('application/json; indent=4', 'application/json; indent=2'))
+    def test_indented_output_matches_json_renderer(self, media_type):
+        data = {'results': [{'id': 1, 'name': 'task'}]}
+        assert ORJSONRenderer().render(data, media_type) == JSONRenderer().render(data, media_type)
+
+    def test_task_list_response_matches_json_renderer(self, api_client):
+        TaskFactory.create_batch(5)
+        TaskFactory(name='ünïcødé ', created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+        response = api_client.get(reverse('api:tasks:tasks-list'))
+        assert isinstance(response.accepted_renderer, ORJSONRenderer)
+        assert response.content == JSONRenderer().render(response.data)
+
+
+class TestORJSONParser:
+    def parse(self, content, encoding='utf-8'):
+        return ORJSONParser().parse(io.BytesIO(content), parser_context={'encoding': encoding})
+
+    @pytest.mark.parametrize(
+        'content',
+        (b'{"name": "\xc3\xbcn\xc3\xafc\xc3\xb8d\xc3\xa9", "ids": [1, 2.5, null, true]}', b'[]', b'"\\u2028"'),
+    )
+    def test_output_matches_json_parser(self, content):
+        expected = JSONParser().parse(io.BytesIO(content), parser_context={'encoding': 'utf-8'})
+        assert self.parse(content) == expected
+
+    def test_other_charsets_are_decoded(self):
+        assert self.parse('{"name": "ünïcødé"}'.encode('latin-1'), encoding='latin-1') == {'name': 'ünïcødé'}
+
+    @pytest.mark.parametrize('content', (b'{"name": ', b'[NaN]', b'[Infinity]', b'\xff'))
+    def test_invalid_json_raises_parse_error(self, content):
+        with pytest.raises(ParseError, match='JSON parse error'):
+            self.parse(content)
+
+    def test_json_request_body(self, api_client):
+        response = api_client.post(reverse('api:tasks:tasks-list'), data={'name': 'ünïcødé', 'description': '✓'}, format='json')
+        assert response.status_code == 201
+        assert Task.objects.get().name == 'ünïcødé'
@@ -0,0 +1,233 @@
+import math
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.metrics import metrics
+from core.middleware import ReplicaRoutingMiddleware
+from core.replicas import ReplicaRouter, reading_from, replica_lag, select_replica
+from tasks.models import Task
+from tasks.tests.factories import TaskFactory
+from users.authentication import CachedTokenAuthentication
+from users.tests.factories import TEST_USER_PASSWORD, UserFactory
+
+
+def replica_settings(aliases=('replica_test',), **config):
+    config = {
+        'ALIASES': list(aliases),
+        'MODELS': ('tasks.Task', 'tasks.TaskTombstone', 'authtoken.Token'),
+        'SELECTION': 'round_robin',
+        'MAX_LAG': 10,
+        'LAG_CHECK_INTERVAL': 60,
+        'PIN_SECONDS': 5,
+        'PIN_CACHE_ALIAS': 'shared',
+        **config,
+    }
+    return override_settings(DATABASE_REPLICAS=config)
+
+
+pytestmark = pytest.mark.django_db(databases=['default', 'replica_test'])
+# the connection of a mirror only sees committed rows
+replica_test_db = pytest.mark.django_db(transaction=True, databases=['default', 'replica_test'])
+
+
+@pytest.fixture(autouse=True)
+def clear_replica_lag():
+    replica_lag.clear()
+    yield
+    replica_lag.clear()
+
+
+class TestSelectReplica:
+    @replica_settings(aliases=('replica_a', 'replica_b', 'replica_c'))
+    def test_round_robin_skips_lagging_replicas(self):
+        lags = {'replica_a': 0, 'replica_b': 30, 'replica_c': 1}
+        with mock.patch.object(replica_lag, 'measure', side_effect=lags.__getitem__):
+            selected = [select_replica() for _ in range(4)]
+        assert sorted(selected) == ['replica_a', 'replica_a', 'replica_c', 'replica_c']
+
+    @replica_settings(aliases=('replica_a', 'replica_b'), SELECTION='least_lag')
+    def test_least_lag(self):
+        lags = {'replica_a': 2, 'replica_b': 0.5}
+        with mock.patch.object(replica_lag, 'measure', side_effect=lags.__getitem__):
+            assert select_replica() == 'replica_b'
+        assert 'database_replica_lag_seconds{database="replica_b"} 0.5' in metrics.render().splitlines()
+
+    @replica_settings(aliases=('replica_a',))
+    def test_primary_without_replicas_in_sync(self):
+        with mock.patch.object(replica_lag, 'measure', return_value=math.inf):
+            assert select_replica() is None
+
+    @replica_settings(aliases=('replica_a',), LAG_CHECK_INTERVAL=10)
+    def test_lag_is_measured_once_per_interval(self):
+        with mock.patch.object(replica_lag, 'measure', return_value=0) as measure:
+            with mock.patch('core.replicas.time.monotonic', return_value=100):
+                select_replica()
+                select_replica()
+            with mock.patch('core.replicas.time.monotonic', return_value=111):
+                select_replica()
+        assert measure.call_count == 2
+
+    @replica_settings()
+    def test_lag_of_a_primary_is_zero(self):
+        assert replica_lag.measure('replica_test') == 0
+
+
+@replica_test_db
+class TestReplicaRouter:
+    @replica_settings()
+    def test_reads_of_replicated_models_in_a_replica_block(self):
+        router = ReplicaRouter()
+        assert router.db_for_read(Task) is None
+        with reading_from('replica_test'):
+            assert router.db_for_read(Task) == 'replica_test'
+            assert router.db_for_read(UserFactory._meta.model) is None
+            assert router.db_for_write(Task) == 'default'
+        assert not router.allow_migrate('replica_test', 'tasks')
+
+    @replica_settings()
+    def test_instances_read_from_a_replica_are_saved_to_the_primary(self):
+        task = TaskFactory()
+        with reading_from('replica_test'):
+            task = Task.objects.get(pk=task.pk)
+            assert task._state.db == 'replica_test'
+            task.name = 'updated'
+            with CaptureQueriesContext(connections['default']) as queries:
+                task.save()
+        assert len(queries) == 1
+
+
+@replica_test_db
+class TestReplicaRoutingMiddleware:
+    list_url = reverse('api:tasks:tasks-list')
+
+    @pytest.fixture(autouse=True)
+    def measure_replica_lag(self):
+        replica_lag.get(['replica_test'], 60)
+
+    def count_queries(self, api_client, method, url, **kwargs):
+        with CaptureQueriesContext(connections['replica_test']) as replica_queries:
+            response = getattr(api_client, method)(url, **kwargs)
+        return response, len(replica_queries)
+
+    @replica_settings()
+    def test_safe_requests_read_from_replicas(self, api_client, user):
+        TaskFactory(created_by=user)
+        api_client.force_authenticate(user)
+        response, replica_queries = self.count_queries(api_client, 'get', self.list_url)
+        assert response.status_code == 200
+        assert replica_queries == 2
+
+    @replica_settings()
+    def test_clients_read_their_writes_from_the_primary(self, api_client, user):
+        api_client.force_authenticate(user)
+        payload = {'name': 'task', 'description': 'description'}
+        response, replica_queries = self.count_queries(api_client, 'post', self.list_url, data=payload, format='json')
+        assert response.status_code == 201
+        assert replica_queries == 0
+
+        response, replica_queries = self.count_queries(api_client, 'get', self.list_url)
+        assert response.status_code == 200
+        assert response.data['results'][0]['name'] == 'task'
+        assert replica_queries == 0
+
+        with mock.patch('core.cache.time.time', return_value=2**40):
+            _, replica_queries = self.count_queries(api_client, 'get', self.list_url)
+        assert replica_queries == 2
+
+    @replica_settings()
+    def test_pins_follow_the_token_or_the_address(self, api_client, user):
+        api_client.check_budgets = False
+        response = api_client.post(
+            reverse('api:users:login'), {'username': user.username, 'password': TEST_USER_PASSWORD}, format='json'
+        )
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {response.data["token"]}')
+        _, replica_queries = self.count_queries(api_client, 'get', self.list_url)
+        assert replica_queries == 0
+
+        payload = {'name': 'task', 'description': 'description'}
+        api_client.post(self.list_url, payload, format='json', REMOTE_ADDR='10.0.0.2')
+        _, replica_queries = self.count_queries(api_client, 'get', self.list_url, REMOTE_ADDR='10.0.0.3')
+        assert replica_queries == 0
+        api_client.credentials()
+        _, replica_queries = self.count_queries(api_client, 'get', self.list_url, REMOTE_ADDR='10.0.0.3')
+        assert replica_queries > 0
+
+    @replica_settings()
+    def test_writes_do_not_pin_other_clients_of_the_address(self, api_client, user):
+        token = Token.objects.create(user=user)
+        # the list budget leaves out the token lookup of the first request with a token
+        CachedTokenAuthentication().authenticate_credentials(token.key)
+        api_client.post(self.list_url, {'name': 'task', 'description': 'description'}, format='json')
+        _, replica_queries = self.count_queries(api_client, 'get', self.list_url)
+        assert replica_queries == 0
+
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        _, replica_queries = self.count_queries(api_client, 'get', self.list_url)
+        assert replica_queries > 0
+
+    @replica_settings()
+    def test_change_feed_reads_from_one_replica(self, api_client):
+        changes_url = reverse('api:tasks:tasks-changes')
+        task = TaskFactory()
+        since = api_client.get(changes_url).data['since']
+        task_id = task.id
+        task.delete()
+
+        with CaptureQueriesContext(connections['default']) as primary_queries:
+            response, replica_queries = self.count_queries(api_client, 'get', changes_url, data={'since': since})
+        assert response.data['deleted'] == [task_id]
+        assert replica_queries == 3
+        assert len(primary_queries) == 0
+
+    @replica_settings()
+    def test_registered_clients_read_their_token_from_the_primary(self, api_client):
+        api_client.check_budgets = False
+        payload = {
+            'username': 'registered',
+            'first_name': 'first',
+            'last_name': 'last',
+            'email': 'registered@example.com',
+            'password': TEST_USER_PASSWORD,
+            'password2': TEST_USER_PASSWORD,
+        }
+        response = api_client.post(reverse('api:users:register'), payload, format='json', REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == 201
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {response.data["token"]}')
+        _, replica_queries = self.count_queries(api_client, 'get', self.list_url, REMOTE_ADDR='10.0.0.3')
+        assert replica_queries == 0
+
+    @replica_settings()
+    def test_anonymous_clients_are_told_apart_by_forwarded_addresses(self, api_client):
+        payload = {'name': 'task', 'description': 'description'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            api_client.post(self.list_url, payload, format='json', HTTP_X_FORWARDED_FOR='10.0.0.2')
+            _, replica_queries = self.count_queries(api_client, 'get', self.list_url, HTTP_X_FORWARDED_FOR='10.0.0.3')
+            assert replica_queries > 0
+            _, replica_queries = self.count_queries(api_client, 'get', self.list_url, HTTP_X_FORWARDED_FOR='10.0.0.2')
+            assert replica_queries == 0
+
+    @replica_settings()
+    def test_async_requests_measure_lag_off_the_event_loop(self):
+        replica_lag.clear()
+
+        async def get_response(_request):
+            return HttpResponse(ReplicaRouter().db_for_read(Task))
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = async_to_sync(middleware)(RequestFactory().get(self.list_url))
+        assert response.content == b'replica_test'
+        assert replica_lag.lags == {'replica_test': 0}
+
+    def test_unused_without_replicas(self, api_client):
+        with CaptureQueriesContext(connections['replica_test']) as replica_queries:
+            assert api_client.get(self.list_url).status_code == 200
+        assert len(replica_queries) == 0
@@ -0,0 +1,119 @@
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from django.urls import reverse
+
+from core.throttling import TokenBucket, get_bucket_cache, parse_rate
+from tasks.tests.factories import TaskFactory
+from users.tests.factories import UserFactory
+
+
+def throttle_settings(enabled=True, **rates):
+    return override_settings(API_THROTTLE={'ENABLED': enabled, 'CACHE_ALIAS': 'shared', 'RATES': rates})
+
+
+class TestTokenBucket:
+    @pytest.mark.parametrize(
+        ('rate', 'expected'), (('10/s', (10, 1)), ('30/min', (30, 60)), ('5/hour', (5, 3600)), ('1/day', (1, 86400)))
+    )
+    def test_parse_rate(self, rate, expected):
+        assert parse_rate(rate) == expected
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(capacity=2, period=10)
+        state, wait = bucket.take(None, 100)
+        assert (state, wait) == ((1, 100), 0)
+        state, wait = bucket.take(state, 100)
+        assert wait == 0
+        state, wait = bucket.take(state, 101)
+        assert wait == pytest.approx(4)
+        state, wait = bucket.take(state, 105)
+        assert wait == 0
+        assert state[0] == pytest.approx(0)
+
+    def test_idle_bucket_refills_up_to_its_capacity(self):
+        bucket = TokenBucket(capacity=3, period=3)
+        assert bucket.take((0, 0), 1000) == ((2, 1000), 0)
+
+
+class TestTokenBucketThrottle:
+    def login(self, api_client, **kwargs):
+        return api_client.post(
+            reverse('api:users:login'), {'username': 'missing', 'password': 'password'}, format='json', **kwargs
+        )
+
+    @throttle_settings(login_anon='2/min')
+    def test_login_is_limited_per_client_address(self, api_client):
+        assert self.login(api_client).status_code == 400
+        assert self.login(api_client).status_code == 400
+        response = self.login(api_client)
+        assert response.status_code == 429
+        assert 0 < int(response['Retry-After']) <= 30
+        assert self.login(api_client, REMOTE_ADDR='10.0.0.2').status_code == 400
+
+    @throttle_settings(register_anon='1/hour')
+    def test_forged_forwarded_addresses_do_not_get_new_buckets(self, api_client):
+        url = reverse('api:users:register')
+        statuses = [
+            api_client.post(url, {}, format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code for i in range(3)
+        ]
+        assert statuses == [400, 429, 429]
+
+    @throttle_settings(register_anon='1/hour')
+    def test_forwarded_address_added_by_the_proxy(self, api_client):
+        url = reverse('api:users:register')
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            statuses = [
+                api_client.post(url, {}, format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 192.0.2.1').status_code
+                for i in range(2)
+            ]
+        assert statuses == [400, 429]
+
+    @throttle_settings(login_anon='1/min')
+    def test_tokens_do_not_lift_limits_without_a_user_rate(self, api_client, user):
+        api_client.force_authenticate(user)
+        assert self.login(api_client).status_code == 400
+        assert self.login(api_client).status_code == 429
+
+    @throttle_settings(login_anon='1/min')
+    def test_buckets_refill_over_time(self, api_client):
+        with mock.patch('core.throttling.time.time', return_value=1000):
+            assert self.login(api_client).status_code == 400
+            assert self.login(api_client).status_code == 429
+        with mock.patch('core.throttling.time.time', return_value=1060):
+            assert self.login(api_client).status_code == 400
+
+    @throttle_settings(task_write_anon='1/min', task_write_user='2/min')
+    def test_task_writes_are_limited_per_user(self, api_client, user):
+        url = reverse('api:tasks:tasks-list')
+        payload = {'name': 'task', 'description': 'description'}
+        assert api_client.post(url, payload, format='json').status_code == 201
+        assert api_client.post(url, payload, format='json').status_code == 429
+
+        for authenticated in (user, UserFactory()):
+            api_client.force_authenticate(authenticated)
+            assert api_client.post(url, payload, format='json').status_code == 201
+            assert api_client.post(url, payload, format='json').status_code == 201
+        assert api_client.post(url, payload, format='json').status_code == 429
+
+    @throttle_settings(task_write_anon='1/min')
+    def test_task_reads_are_not_limited(self, api_client):
+        task = TaskFactory()
+        for _ in range(3):
+            assert api_client.get(reverse('api:tasks:tasks-list')).status_code == 200
+            assert api_client.get(reverse('api:tasks:tasks-detail', args=(task.pk,))).status_code == 200
+
+    @throttle_settings(enabled=False, login_anon='1/min')
+    def test_disabled_throttling(self, api_client):
+        for _ in range(3):
+            assert self.login(api_client).status_code == 400
+
+    def test_cache_without_atomic_update_is_rejected(self):
+        with throttle_settings(login_anon='1/min'):
+            assert get_bucket_cache() is not None
+        with override_settings(API_THROTTLE={'ENABLED': True, 'CACHE_ALIAS': 'default', 'RATES': {}}):
+            with pytest.raises(ImproperlyConfigured, match="'default' cache of API_THROTTLE"):
+                get_bucket_cache()
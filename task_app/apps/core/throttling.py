@@ -0,0 +1,96 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parses DRF's `<requests>/<period>` rates like `10/min`, the period is given by its first letter.
+    """
+    requests, period = rate.split('/')
+    return int(requests), PERIODS[period[0]]
+
+
+def get_bucket_cache():
+    """
+    Returns the API_THROTTLE['CACHE_ALIAS'] cache, which has to provide an atomic `update()` like `SharedMemoryCache`.
+    """
+    alias = settings.API_THROTTLE['CACHE_ALIAS']
+    cache = caches[alias]
+    if not callable(getattr(cache, 'update', None)):
+        raise ImproperlyConfigured(
+            f'The {alias!r} cache of API_THROTTLE does not provide an atomic update(), use core.cache.SharedMemoryCache'
+        )
+    return cache
+
+
+class TokenBucket:
+    """
+    Holds up to `capacity` tokens, refilled evenly over `period` seconds, every request takes one. The state of a
+    bucket is the `(tokens, updated_at)` pair of its last request, a missing state is a full bucket.
+    """
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+
+    def take(self, state, now):
+        """
+        Returns the state after a request at `now` and the seconds until one token is available, 0 when the request
+        took one.
+        """
+        tokens, updated_at = state or (self.capacity, now)
+        tokens = min(self.capacity, tokens + max(now - updated_at, 0) * self.refill_rate)
+        if tokens >= 1:
+            return (tokens - 1, now), 0
+        return (tokens, now), (1 - tokens) / self.refill_rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Limits requests to views with a `throttle_scope` by the API_THROTTLE['RATES'] of that scope:
+    - `<scope>_user` applies to authenticated requests, per user
+    - `<scope>_anon` applies to the other requests, and to authenticated ones without a `<scope>_user` rate,
+      per client address
+
+    Buckets live in the API_THROTTLE['CACHE_ALIAS'] cache, which updates them atomically for all workers sharing it,
+    and expire once they are full again, so a client takes a single small entry.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_rate_and_ident(self, request, scope):
+        rates = settings.API_THROTTLE['RATES']
+        if request.user.is_authenticated and rates.get(f'{scope}_user'):
+            return f'{scope}_user', rates[f'{scope}_user'], request.user.pk
+        return f'{scope}_anon', rates.get(f'{scope}_anon'), self.get_ident(request)
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None or not settings.API_THROTTLE['ENABLED']:
+            return True
+        scope, rate, ident = self.get_rate_and_ident(request, scope)
+        if not rate:
+            return True
+
+        capacity, period = parse_rate(rate)
+        bucket = TokenBucket(capacity, period)
+        now = time.time()
+
+        def take(state):
+            state, self.wait_time = bucket.take(state, now)
+            return state
+
+        get_bucket_cache().update(self.cache_format % {'scope': scope, 'ident': ident}, take, timeout=period)
+        return self.wait_time == 0
+
+    def wait(self):
+        return self.wait_time
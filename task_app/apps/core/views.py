@@ -0,0 +1,123 @@
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+
+from core.metrics import metrics
+
+
+class AsyncDispatchMixin:
+    """
+    Serves requests with `a<handler>` coroutines when `use_async_handlers` is set, e.g. `aget` of an APIView or
+    `alist` for the `list` action of a viewset, so that they run on the event loop of the ASGI server.
+    `as_view()` defaults it to API_ASYNC_VIEWS.
+
+    `adispatch` and `ainitial` mirror `APIView.dispatch` and `APIView.initial`, authenticators providing
+    `aauthenticate` are awaited. Requests without a coroutine handler go through the sync `dispatch` in a thread,
+    as Django does for sync views under ASGI.
+    """
+
+    use_async_handlers = False
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        initkwargs.setdefault('use_async_handlers', settings.API_ASYNC_VIEWS)
+        view = super().as_view(*args, **initkwargs)
+        if initkwargs['use_async_handlers']:
+            markcoroutinefunction(view)
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.use_async_handlers:
+            return super().dispatch(request, *args, **kwargs)
+        return self.adispatch(request, *args, **kwargs)
+
+    def get_async_handler(self, request):
+        method = request.method.lower()
+        name = self.action_map.get(method, method) if hasattr(self, 'action_map') else method
+        return getattr(self, f'a{name}', None)
+
+    async def adispatch(self, request, *args, **kwargs):
+        handler = self.get_async_handler(request)
+        if handler is None:
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:  # noqa: BLE001
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, 'aauthenticate', None) or sync_to_async(authenticator.authenticate)
+            try:
+                user_auth_tuple = await authenticate(request)
+            except exceptions.APIException:
+                self.set_unauthenticated(request)
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator  # noqa: SLF001
+                request.user, request.auth = user_auth_tuple
+                return
+        self.set_unauthenticated(request)
+
+    @staticmethod
+    def set_unauthenticated(request):
+        request._authenticator = None  # noqa: SLF001
+        request.user = api_settings.UNAUTHENTICATED_USER() if api_settings.UNAUTHENTICATED_USER else None
+        request.auth = api_settings.UNAUTHENTICATED_TOKEN() if api_settings.UNAUTHENTICATED_TOKEN else None
+
+
+class AsyncGenericMixin:
+    """
+    Async counterparts of the `GenericAPIView` methods that hit the database.
+    """
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError) as exc:
+            raise Http404 from exc
+
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+
+def metrics_view(request):
+    """
+    Metrics of the worker process serving the scrape, in the Prometheus text format. Scrapes have to send
+    `Authorization: Bearer <METRICS_SCRAPE_TOKEN>`, the endpoint is not served without a token.
+    """
+    if not settings.METRICS_ENABLED or not settings.METRICS_SCRAPE_TOKEN:
+        raise Http404
+    if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_SCRAPE_TOKEN}'):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -11,6 +11,9 @@ class TaskAdmin(admin.ModelAdmin):
     search_fields = ('name', 'description')
     list_filter = ('status', 'created_at')
 
+    def get_search_results(self, request, queryset, search_term):
+        return queryset.search(search_term.split(), fields=self.search_fields), False
+
 
 admin.sites.AdminSite.site_header = settings.ADMIN_SITE_HEADER
 admin.sites.AdminSite.site_title = settings.ADMIN_SITE_TITLE
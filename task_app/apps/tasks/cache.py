@@ -0,0 +1,73 @@
+import hashlib
+import pickle
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class TaskListCache:
+    """
+    Read-through cache of task list responses.
+
+    Keys embed the version of every visibility bucket the requester can see: the shared bucket of tasks
+    without an owner and the requester's own bucket. Bumping a bucket version makes all keys built on it
+    unreachable, stale entries are left to expire. Versions are seeded from the clock so that a version
+    key evicted from the cache never comes back with a value that was already used.
+    """
+
+    key_prefix = 'tasks:list'
+    anonymous_bucket = 'anonymous'
+
+    @property
+    def enabled(self):
+        return settings.TASK_LIST_CACHE['ENABLED']
+
+    @property
+    def cache(self):
+        return caches[settings.TASK_LIST_CACHE['ALIAS']]
+
+    def get_version_key(self, bucket):
+        return f'{self.key_prefix}:version:{bucket}'
+
+    def get_buckets(self, user):
+        if user.is_authenticated:
+            return (self.anonymous_bucket, user.pk)
+        return (self.anonymous_bucket,)
+
+    def get_versions(self, buckets):
+        keys = [self.get_version_key(bucket) for bucket in buckets]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                self.cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def invalidate(self, owner_ids):
+        for owner_id in owner_ids:
+            key = self.get_version_key(self.anonymous_bucket if owner_id is None else owner_id)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.add(key, time.time_ns(), timeout=None)
+
+    def make_key(self, request):
+        buckets = self.get_buckets(request.user)
+        query = urlencode(sorted((k, v) for k, values in request.query_params.lists() for v in values))
+        parts = (request.path, *zip(buckets, self.get_versions(buckets), strict=True), query)
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+    def get(self, key):
+        payload = self.cache.get(key)
+        return None if payload is None else pickle.loads(payload)
+
+    def set(self, key, entry):
+        payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) <= settings.TASK_LIST_CACHE['MAX_ENTRY_SIZE']:
+            self.cache.set(key, payload, settings.TASK_LIST_CACHE['TTL'])
+
+
+task_list_cache = TaskListCache()
@@ -0,0 +1,97 @@
+import re
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+from tasks.models import Task, TaskTombstone
+
+
+class TaskChangeFeed:
+    """
+    Pages of the tasks visible to `user` that were created, updated or deleted since a sync token.
+
+    Rows are numbered by triggers before their transaction commits, so a transaction can commit rows numbered
+    below changes that were already synced. A sync therefore starts from the oldest transaction that was still
+    running when the previous one began (`xmin` of its snapshot), rows of transactions that committed in between
+    are sent again. Tasks that are visible are never reported as deleted, so changes sent twice are harmless.
+
+    Tokens are `<next sync>` once all changes are sent, and `<since>.<next sync>.<xid>.<seq>` while pages of
+    the current sync follow the row at (`xid`, `seq`), where syncs are `<xmin>-<unix time>`. Tombstones are
+    pruned after TASK_TOMBSTONE_RETENTION_DAYS, so tokens of older syncs are rejected and their clients have
+    to sync again without a token, which sends all visible tasks.
+    """
+
+    token_pattern = re.compile(r'(\d+)-(\d+)(?:\.(\d+)-(\d+)\.(\d+)\.(\d+))?')
+    default_error_messages = {
+        'invalid_token': _('Invalid sync token.'),
+        'expired_token': _('Sync token expired, sync again without a token.'),
+    }
+
+    def __init__(self, user, page_size):
+        self.user = user
+        self.page_size = page_size
+
+    def parse_token(self, token):
+        """
+        Returns the sync the changes start from and the one the next sync will start from, as `(xmin, time)`,
+        and the position of the last row sent. The last two are None when the sync starts with this page.
+        """
+        if token is None:
+            return (0, 0), None, None
+        match = self.token_pattern.fullmatch(token)
+        if match is None:
+            raise ValidationError({'since': [self.default_error_messages['invalid_token']]})
+        since, since_at, next_since, next_at, xid, seq = (int(group) if group else None for group in match.groups())
+        # full syncs, from 0, read no tombstones
+        if since and since_at < time.time() - settings.TASK_TOMBSTONE_RETENTION_DAYS * 86400:
+            raise ValidationError({'since': [self.default_error_messages['expired_token']]}, code='expired_token')
+        if next_since is None:
+            return (since, since_at), None, None
+        return (since, since_at), (next_since, next_at), (xid, seq)
+
+    def get_page(self, token=None):
+        (since, since_at), next_sync, position = self.parse_token(token)
+        if next_sync is None:
+            next_sync = (self.get_snapshot_xmin(), int(time.time()))
+
+        tasks = self.get_changed(Task.objects.get_available_for_user(self.user), since, position)
+        changes = [(task.change_xid, task.change_seq, task) for task in tasks]
+        if since:
+            tombstones = self.get_changed(self.get_tombstones(), since, position)
+            changes.extend((tombstone.change_xid, tombstone.change_seq, tombstone.task_id) for tombstone in tombstones)
+        changes.sort(key=lambda change: change[:2])
+
+        page = changes[: self.page_size]
+        has_more = len(changes) > self.page_size
+        return {
+            'results': [change for _, _, change in page if isinstance(change, Task)],
+            'deleted': [change for _, _, change in page if not isinstance(change, Task)],
+            'since': (
+                f'{since}-{since_at}.{next_sync[0]}-{next_sync[1]}.{page[-1][0]}.{page[-1][1]}'
+                if has_more
+                else f'{next_sync[0]}-{next_sync[1]}'
+            ),
+            'has_more': has_more,
+        }
+
+    def get_tombstones(self):
+        visible_tasks = Task.objects.get_available_for_user(self.user).filter(id=OuterRef('task_id'))
+        tombstones = TaskTombstone.objects.get_available_for_user(self.user)
+        return tombstones.filter(~Exists(visible_tasks)).only('change_xid', 'change_seq', 'task_id')
+
+    def get_changed(self, queryset, since, position):
+        queryset = queryset.filter(change_xid__gte=since)
+        if position is not None:
+            xid, seq = position
+            queryset = queryset.filter(Q(change_xid__gt=xid) | Q(change_xid=xid, change_seq__gt=seq))
+        return list(queryset.order_by('change_xid', 'change_seq')[: self.page_size + 1])
+
+    @staticmethod
+    def get_snapshot_xmin():
+        with connections[Task.objects.db].cursor() as cursor:
+            cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+            return cursor.fetchone()[0]
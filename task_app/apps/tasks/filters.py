@@ -1,5 +1,5 @@
 from django_filters import OrderingFilter
-from rest_framework.filters import BaseFilterBackend
+from rest_framework.filters import BaseFilterBackend, SearchFilter
 from django_filters.rest_framework import FilterSet
 
 from tasks.models import Task
@@ -10,6 +10,11 @@ class TaskFilterBackend(BaseFilterBackend):
         return queryset.get_available_for_user(request.user)
 
 
+class TaskSearchFilter(SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        return queryset.search(self.get_search_terms(request), fields=self.get_search_fields(view, request))
+
+
 class TaskFilterSet(FilterSet):
     order_by = OrderingFilter(fields=(('created_at', 'created_at'),))
 
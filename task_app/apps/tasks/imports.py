@@ -0,0 +1,136 @@
+import codecs
+import csv
+import io
+from itertools import islice
+
+import orjson
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from tasks.models import Task
+from tasks.serializers import TaskImportSerializer
+from tasks.signals import tasks_bulk_saved
+
+
+class NDJSONReader:
+    """
+    Reads a binary stream of newline delimited JSON objects line by line, blank lines are skipped.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __iter__(self):
+        for line_number, line in enumerate(iter(self.stream.readline, b''), start=1):
+            if line.strip():
+                yield line_number, line
+
+    @staticmethod
+    def decode(line):
+        try:
+            return orjson.loads(line)
+        except ValueError as exc:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [f'JSON parse error - {exc}']}) from exc
+
+
+class CSVReader:
+    """
+    Reads a binary UTF-8 CSV stream with a header row. Rows are numbered by the line they end on.
+    """
+
+    media_type = 'text/csv'
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __iter__(self):
+        reader = csv.DictReader(codecs.iterdecode(iter(self.stream.readline, b''), 'utf-8'))
+        for row in reader:
+            yield reader.line_num, row
+
+    @staticmethod
+    def decode(row):
+        return row
+
+
+READERS = {
+    'ndjson': NDJSONReader,
+    'csv': CSVReader,
+}
+
+
+class TaskImporter:
+    """
+    Validates rows of a reader against `TaskImportSerializer` and inserts valid ones batch by batch, so memory
+    is bounded by `batch_size` whatever the size of the stream. Invalid rows are reported by line number
+    and skipped, at most `max_errors` of them are kept in the result.
+
+    Batches are inserted with `bulk_create`, or with `COPY FROM` when `use_copy` is set.
+    """
+
+    serializer_class = TaskImportSerializer
+
+    def __init__(self, created_by=None, batch_size=None, max_errors=None, use_copy=False):
+        self.created_by = created_by
+        self.batch_size = batch_size or settings.TASK_IMPORT_BATCH_SIZE
+        self.max_errors = settings.TASK_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+        self.use_copy = use_copy
+        self.result = {'created': 0, 'failed': 0, 'errors': []}
+
+    def run(self, reader):
+        serializer = self.serializer_class()
+        rows = iter(reader)
+        while batch := list(islice(rows, self.batch_size)):
+            tasks = []
+            for line_number, raw in batch:
+                try:
+                    attrs = serializer.run_validation(reader.decode(raw))
+                except ValidationError as exc:
+                    self.add_error(line_number, exc.detail)
+                else:
+                    tasks.append(Task(created_by=self.created_by, **attrs))
+            if tasks:
+                self.insert(tasks)
+        return self.result
+
+    def add_error(self, line_number, detail):
+        self.result['failed'] += 1
+        if len(self.result['errors']) < self.max_errors:
+            self.result['errors'].append({'line': line_number, 'errors': detail})
+
+    def insert(self, tasks):
+        if self.use_copy:
+            self.copy(tasks)
+        else:
+            Task.objects.bulk_create(tasks)
+        tasks_bulk_saved.send(sender=Task, instances=tasks)
+        self.result['created'] += len(tasks)
+
+    @staticmethod
+    def copy(tasks):
+        # COPY bypasses Field.pre_save(), so timestamps are filled in here. Every value is quoted, so empty
+        # strings stay empty strings and only nullable columns read an empty value back as NULL.
+        opts = Task._meta  # noqa: SLF001
+        fields = [
+            opts.get_field(name) for name in ('name', 'description', 'status', 'created_by', 'created_at', 'updated_at')
+        ]
+        now = timezone.now()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for task in tasks:
+            task.created_at = task.updated_at = now
+            writer.writerow([field.value_from_object(task) for field in fields])
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(opts.db_table)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        null_columns = ', '.join(connection.ops.quote_name(field.column) for field in fields if field.null)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, FORCE_NULL ({null_columns}))', buffer
+            )
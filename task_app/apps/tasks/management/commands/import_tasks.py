@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.imports import READERS, TaskImporter
+
+
+class Command(BaseCommand):
+    help = 'Imports tasks from an NDJSON or CSV file. Invalid rows are reported and skipped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, "-" reads the standard input')
+        parser.add_argument('--format', choices=sorted(READERS), help='Defaults to the extension of the file')
+        parser.add_argument('--user', help='Username of the owner of imported tasks, tasks have no owner by default')
+        parser.add_argument('--batch-size', type=int, help='Rows validated and inserted at once')
+        parser.add_argument('--copy', action='store_true', help='Insert batches with COPY FROM instead of INSERT')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or Path(path).suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Unknown format "{file_format}", pass one of --format {", ".join(sorted(READERS))}')
+
+        created_by = None
+        if options['user']:
+            try:
+                created_by = User.objects.get(username=options['user'])
+            except User.DoesNotExist as exc:
+                raise CommandError(f'User "{options["user"]}" does not exist') from exc
+
+        importer = TaskImporter(
+            created_by=created_by,
+            batch_size=options['batch_size'],
+            max_errors=sys.maxsize,
+            use_copy=options['copy'],
+        )
+        if path == '-':
+            result = importer.run(READERS[file_format](sys.stdin.buffer))
+        else:
+            with open(path, 'rb') as stream:
+                result = importer.run(READERS[file_format](stream))
+
+        for error in result['errors']:
+            self.stderr.write(f'Line {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(f'Created {result["created"]} tasks, {result["failed"]} rows failed'))
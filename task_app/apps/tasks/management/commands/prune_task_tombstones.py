@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    help = 'Deletes tombstones of tasks deleted more than TASK_TOMBSTONE_RETENTION_DAYS ago. Run it daily.'
+
+    def handle(self, *args, **options):
+        # A day more than sync tokens are accepted for: tombstones are dated by the start of their transaction,
+        # which may be older than the token of a sync it was still running during
+        before = timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS + 1)
+        count = TaskTombstone.objects.prune(before)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} task tombstones'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tasks.models import TaskCounter
+
+
+class Command(BaseCommand):
+    help = 'Recounts tasks per owner and status from scratch. Writes to tasks wait until it is done.'
+
+    def handle(self, *args, **options):
+        count = TaskCounter.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} task counters'))
@@ -1,6 +1,9 @@
 # Generated by Django 5.1.1 on 2024-09-12 10:07
 
 from django.db import migrations
+from django.db.models import BooleanField, Case, CharField, F, Value, When
+
+from core.data_migrations import BatchedUpdate
 
 
 IS_DONE_TO_STATUS_MAP = {
@@ -10,24 +13,37 @@ IS_DONE_TO_STATUS_MAP = {
 STATUS_TO_IS_DONE_MAP = {v: k for k, v in IS_DONE_TO_STATUS_MAP.items()}
 
 
-def migrate_task_is_done_to_status(apps, schema_editor):
-    Task = apps.get_model('tasks', 'Task')
-    for task in Task.objects.all():
-        task.status = IS_DONE_TO_STATUS_MAP.get(task.is_done, task.status)
-        task.save()
-
-
-def migrate_task_status_to_is_done(apps, schema_editor):
-    Task = apps.get_model('tasks', 'Task')
-    for task in Task.objects.all():
-        task.is_done = STATUS_TO_IS_DONE_MAP.get(task.status, task.is_done)
-        task.save()
+migrate_task_is_done_to_status = BatchedUpdate(
+    'tasks.0003.is_done_to_status',
+    'tasks.Task',
+    updates={
+        'status': Case(
+            *(When(is_done=is_done, then=Value(status)) for is_done, status in IS_DONE_TO_STATUS_MAP.items()),
+            default=F('status'),
+            output_field=CharField(),
+        ),
+    },
+)
+
+migrate_task_status_to_is_done = BatchedUpdate(
+    'tasks.0003.status_to_is_done',
+    'tasks.Task',
+    updates={
+        'is_done': Case(
+            *(When(status=status, then=Value(is_done)) for status, is_done in STATUS_TO_IS_DONE_MAP.items()),
+            default=F('is_done'),
+            output_field=BooleanField(),
+        ),
+    },
+)
 
 
 class Migration(migrations.Migration):
+    atomic = False
 
     dependencies = [
         ('tasks', '0002_alter_task_options_task_status'),
+        ('core', '0001_initial'),
     ]
 
     operations = [
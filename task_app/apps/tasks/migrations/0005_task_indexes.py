@@ -0,0 +1,58 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0004_remove_task_is_done'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['created_by', '-id'], name='task_created_by_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['created_by', 'status', '-id'], name='task_created_by_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='task_created_by_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('created_by__isnull', True)), fields=['-id'], name='task_anon_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('created_by__isnull', True)), fields=['status', '-id'], name='task_anon_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('created_by__isnull', True)), fields=['created_at', 'id'], name='task_anon_created_at_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='task',
+                    name='created_by',
+                    field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Created by'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS tasks_task_created_by_id_1345568a;',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS tasks_task_created_by_id_1345568a ON tasks_task (created_by_id);',
+                ),
+            ],
+        ),
+    ]
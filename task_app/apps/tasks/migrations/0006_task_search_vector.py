@@ -0,0 +1,67 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+from core.data_migrations import BatchedUpdate
+
+
+# The column is nullable and filled in batches, so that adding it does not rewrite the table. New and edited rows
+# get their vector from the trigger, in the weights and configuration of `tasks.querysets.SEARCH_WEIGHTS`.
+CREATE_TRIGGER = """
+CREATE FUNCTION tasks_task_update_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', COALESCE(NEW.name, '')), 'A')
+        || setweight(to_tsvector('simple', COALESCE(NEW.description, '')), 'B');
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER tasks_task_update_search_vector BEFORE INSERT OR UPDATE OF name, description ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_update_search_vector();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER tasks_task_update_search_vector ON tasks_task;
+DROP FUNCTION tasks_task_update_search_vector();
+"""
+
+fill_search_vector = BatchedUpdate(
+    'tasks.0006.fill_search_vector',
+    'tasks.Task',
+    updates={
+        'search_vector': SearchVector('name', weight='A', config='simple')
+        + SearchVector('description', weight='B', config='simple'),
+    },
+    condition=models.Q(search_vector__isnull=True),
+)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0005_task_indexes'),
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Search vector'),
+        ),
+        migrations.RunSQL(sql=CREATE_TRIGGER, reverse_sql=DROP_TRIGGER),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:39
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='Updated at'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Statement level triggers add the net change of every INSERT, UPDATE and DELETE on tasks_task to its counters,
+# so bulk writes, COPY and the SET NULL of deleted owners upsert each counter once. Counters are upserted in key
+# order to keep concurrent writes from deadlocking.
+UPSERT_COUNTERS = """
+        INSERT INTO tasks_taskcounter AS counter (created_by_id, status, count)
+        SELECT created_by_id, status, sum(delta) FROM ({changes}) AS changes
+        GROUP BY created_by_id, status
+        HAVING sum(delta) <> 0
+        ORDER BY created_by_id, status
+        ON CONFLICT (created_by_id, status) DO UPDATE SET count = counter.count + excluded.count;
+"""
+INSERTED_TASKS = 'SELECT created_by_id, status, 1 AS delta FROM new_tasks'
+DELETED_TASKS = 'SELECT created_by_id, status, -1 AS delta FROM old_tasks'
+UPDATED_TASKS = """
+            SELECT old_tasks.created_by_id, old_tasks.status, -1 AS delta {changed}
+            UNION ALL
+            SELECT new_tasks.created_by_id, new_tasks.status, 1 AS delta {changed}
+""".format(
+    changed="""
+            FROM old_tasks JOIN new_tasks USING (id)
+            WHERE (old_tasks.created_by_id, old_tasks.status) IS DISTINCT FROM (new_tasks.created_by_id, new_tasks.status)
+"""
+)
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION tasks_task_count() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {UPSERT_COUNTERS.format(changes=INSERTED_TASKS)}
+    ELSIF TG_OP = 'DELETE' THEN
+        {UPSERT_COUNTERS.format(changes=DELETED_TASKS)}
+    ELSE
+        {UPSERT_COUNTERS.format(changes=UPDATED_TASKS)}
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER tasks_task_count_insert AFTER INSERT ON tasks_task
+    REFERENCING NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_count();
+CREATE TRIGGER tasks_task_count_update AFTER UPDATE ON tasks_task
+    REFERENCING OLD TABLE AS old_tasks NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_count();
+CREATE TRIGGER tasks_task_count_delete AFTER DELETE ON tasks_task
+    REFERENCING OLD TABLE AS old_tasks FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_count();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER tasks_task_count_insert ON tasks_task;
+DROP TRIGGER tasks_task_count_update ON tasks_task;
+DROP TRIGGER tasks_task_count_delete ON tasks_task;
+DROP FUNCTION tasks_task_count();
+"""
+
+# Creating the triggers blocks writes to tasks_task until the migration commits, so no task is missed or counted
+# twice by the initial counts
+COUNT_TASKS = """
+INSERT INTO tasks_taskcounter (created_by_id, status, count)
+SELECT created_by_id, status, count(*) FROM tasks_task GROUP BY created_by_id, status;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('to_do', 'To do'), ('done', 'Done')], max_length=100, verbose_name='Status')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+                ('created_by', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Created by')),
+            ],
+            options={
+                'verbose_name': 'Task counter',
+                'verbose_name_plural': 'Task counters',
+                'constraints': [models.UniqueConstraint(fields=('created_by', 'status'), name='task_counter_unique', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunSQL(sql=CREATE_TRIGGERS, reverse_sql=DROP_TRIGGERS),
+        migrations.RunSQL(sql=COUNT_TASKS, reverse_sql=migrations.RunSQL.noop),
+    ]
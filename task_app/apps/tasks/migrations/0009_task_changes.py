@@ -0,0 +1,119 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:05
+
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+from core.data_migrations import BatchedUpdate
+
+
+# Every inserted or updated task takes the next value of tasks_task_change_seq and the id of its transaction.
+# Deleted tasks, and tasks moving to another owner, leave a tombstone for the previous owner in the same way.
+CREATE_TRIGGERS = """
+CREATE SEQUENCE tasks_task_change_seq;
+
+CREATE FUNCTION tasks_task_track_change() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.created_by_id IS DISTINCT FROM NEW.created_by_id THEN
+        INSERT INTO tasks_tasktombstone (change_seq, change_xid, task_id, created_by_id)
+        VALUES (nextval('tasks_task_change_seq'), pg_current_xact_id()::text::bigint, OLD.id, OLD.created_by_id);
+    END IF;
+    NEW.change_seq := nextval('tasks_task_change_seq');
+    NEW.change_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$;
+
+CREATE FUNCTION tasks_task_track_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO tasks_tasktombstone (change_seq, change_xid, task_id, created_by_id)
+    SELECT nextval('tasks_task_change_seq'), pg_current_xact_id()::text::bigint, id, created_by_id FROM old_tasks;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER tasks_task_track_change BEFORE INSERT OR UPDATE ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_track_change();
+CREATE TRIGGER tasks_task_track_delete AFTER DELETE ON tasks_task
+    REFERENCING OLD TABLE AS old_tasks FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_track_delete();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER tasks_task_track_change ON tasks_task;
+DROP TRIGGER tasks_task_track_delete ON tasks_task;
+DROP FUNCTION tasks_task_track_change();
+DROP FUNCTION tasks_task_track_delete();
+DROP SEQUENCE tasks_task_change_seq;
+"""
+
+# Updated values do not matter, the trigger numbers every updated row
+number_task_changes = BatchedUpdate(
+    'tasks.0009.number_task_changes',
+    'tasks.Task',
+    updates={'change_seq': None},
+    condition=models.Q(change_seq__isnull=True),
+)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0008_task_counter'),
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('change_seq', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Change sequence')),
+                ('change_xid', models.BigIntegerField(verbose_name='Change transaction')),
+                ('task_id', models.BigIntegerField(verbose_name='Task')),
+                ('deleted_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), verbose_name='Deleted at')),
+                ('created_by', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Created by')),
+            ],
+            options={
+                'verbose_name': 'Task tombstone',
+                'verbose_name_plural': 'Task tombstones',
+                'indexes': [
+                    models.Index(fields=['created_by', 'change_xid', 'change_seq'], name='tombstone_created_by_idx'),
+                    models.Index(condition=models.Q(('created_by__isnull', True)), fields=['change_xid', 'change_seq'], name='tombstone_anon_idx'),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True, verbose_name='Change sequence'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='change_xid',
+            field=models.BigIntegerField(editable=False, null=True, verbose_name='Change transaction'),
+        ),
+        migrations.RunSQL(sql=CREATE_TRIGGERS, reverse_sql=DROP_TRIGGERS),
+        migrations.RunPython(number_task_changes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, verbose_name='Change sequence'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='change_xid',
+            field=models.BigIntegerField(editable=False, verbose_name='Change transaction'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['created_by', 'change_xid', 'change_seq'], name='task_created_by_change_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('created_by__isnull', True)), fields=['change_xid', 'change_seq'], name='task_anon_change_idx'),
+        ),
+    ]
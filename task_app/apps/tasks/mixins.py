@@ -0,0 +1,198 @@
+import hashlib
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models.expressions import RawSQL
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+from rest_framework.response import Response
+
+from tasks.cache import task_list_cache
+from tasks.models import Task, TaskTombstone
+
+
+# The oldest transaction other than the current one that is still running, NULL when there is none
+OLDEST_RUNNING_XID = 'SELECT min(xip::text::bigint) FROM pg_snapshot_xip(pg_current_snapshot()) AS xip'
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+class ConditionalGetMixin:
+    """
+    Adds strong ETag validators to `list` and `retrieve` and answers matching conditional requests with 304 before
+    the payload is serialized. The validator of a task is its `change_seq`, which triggers move on every write,
+    queryset updates and `bulk_update()` included.
+
+    The list validator is built from the user, the full query string and the latest change of every owner whose
+    tasks the user can see, read from the change indexes of tasks and tombstones (see `tasks.changes`), so it
+    costs one probe per index whatever the number of tasks. Changes are numbered before their transaction commits,
+    so while a transaction older than the latest change is still running, lists are sent without ETag. Responses get
+    no Last-Modified, its one-second precision would validate responses that missed writes made in the same second.
+    """
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request, list(self.get_latest_changes(request.user)))
+        response = etag and get_conditional_response(request, etag=etag)
+        return self.set_validators(response or super().list(request, *args, **kwargs), etag)
+
+    async def alist(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request, [change async for change in self.get_latest_changes(request.user)])
+        response = etag and get_conditional_response(request, etag=etag)
+        return self.set_validators(response or await super().alist(request, *args, **kwargs), etag)
+
+    @staticmethod
+    def get_latest_changes(user):
+        """
+        Returns `(change_xid, change_seq, oldest running xid)` of the latest task and tombstone of every owner
+        whose tasks `user` can see, in a single statement.
+        """
+        latest = [
+            model.objects.filter(owner)
+            .annotate(running_xid=RawSQL(OLDEST_RUNNING_XID, ()))
+            .order_by('-change_xid', '-change_seq')
+            .values_list('change_xid', 'change_seq', 'running_xid')[:1]
+            for model in (Task, TaskTombstone)
+            for owner in Task.objects.get_owner_filters(user)
+        ]
+        return latest[0].union(*latest[1:], all=True)
+
+    @staticmethod
+    def get_list_etag(request, changes):
+        """
+        Returns None while a transaction older than the latest change may still commit changes numbered below it.
+        """
+        if not changes:
+            return make_etag(request.user.pk, request.get_full_path())
+        xid, seq, running_xid = max(changes)
+        if running_xid is not None and running_xid < xid:
+            return None
+        return make_etag(request.user.pk, request.get_full_path(), xid, seq)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_retrieve_response(request, self.get_object())
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return self.get_retrieve_response(request, await self.aget_object())
+
+    def get_retrieve_response(self, request, instance):
+        etag = make_etag(instance.pk, instance.change_seq)
+        response = get_conditional_response(request, etag=etag) or Response(self.get_serializer(instance).data)
+        return self.set_validators(response, etag)
+
+    @staticmethod
+    def set_validators(response, etag):
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+
+class CachedListMixin:
+    """
+    Serves `list` from `task_list_cache` when it is enabled. Entries keep the validators of the response
+    they were built from, so conditional requests are answered without touching the database.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not task_list_cache.enabled:
+            return super().list(request, *args, **kwargs)
+
+        key = task_list_cache.make_key(request)
+        entry = task_list_cache.get(key)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            self.cache_response(key, response)
+            return response
+        return self.get_cached_response(request, entry)
+
+    async def alist(self, request, *args, **kwargs):
+        if not task_list_cache.enabled:
+            return await super().alist(request, *args, **kwargs)
+
+        # Django cache backends run the sync API in a thread for their async methods as well
+        key = await sync_to_async(task_list_cache.make_key)(request)
+        entry = await sync_to_async(task_list_cache.get)(key)
+        if entry is None:
+            response = await super().alist(request, *args, **kwargs)
+            await sync_to_async(self.cache_response)(key, response)
+            return response
+        return self.get_cached_response(request, entry)
+
+    @staticmethod
+    def cache_response(key, response):
+        if response.status_code == status.HTTP_200_OK:
+            headers = {'ETag': response['ETag']} if 'ETag' in response else {}
+            task_list_cache.set(key, {'headers': headers, 'data': response.data})
+
+    @staticmethod
+    def get_cached_response(request, entry):
+        response = get_conditional_response(request, etag=entry['headers'].get('ETag')) or Response(entry['data'])
+        for header, value in entry['headers'].items():
+            response[header] = value
+        return response
+
+
+class ValuesListMixin:
+    """
+    Builds `list` responses from `.values()` rows rendered by `values_serializer_class`.
+    Annotations are fetched as well, so that paginators can order by them.
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class(context=self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*serializer.values_fields, *queryset.query.annotations)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
+
+    async def alist(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class(context=self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*serializer.values_fields, *queryset.query.annotations)
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation([row async for row in queryset]))
+
+
+class StreamingExportMixin:
+    """
+    Streams the filtered queryset as `.values()` rows of `values_serializer_class`, rendered chunk by chunk
+    by the accepted renderer. Rows are read through a server-side cursor, so memory use stays flat
+    regardless of the number of exported rows.
+    """
+
+    export_filename = 'export'
+
+    def get_export_response(self, request):
+        serializer = self.values_serializer_class(context=self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset()).values(*serializer.values_fields)
+        rows = queryset.iterator(chunk_size=settings.TASK_EXPORT_CHUNK_SIZE)
+
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(self.render_export(rows, serializer, renderer), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.{renderer.format}"'
+        return response
+
+    @staticmethod
+    def render_export(rows, serializer, renderer):
+        renderer_context = {'header': serializer.field_names}
+        if header := renderer.render([], renderer_context=renderer_context):
+            yield header
+
+        renderer_context['write_header'] = False
+        while chunk := list(islice(rows, settings.TASK_EXPORT_CHUNK_SIZE)):
+            yield renderer.render(serializer.to_representation(chunk), renderer_context=renderer_context)
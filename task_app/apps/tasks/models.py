@@ -1,9 +1,12 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Now
 from django.utils.translation import gettext_lazy as _
-from model_utils import Choices
-from model_utils.fields import AutoCreatedField, StatusField
-from tasks.querysets import TaskQuerySet
+from model_utils import Choices, FieldTracker
+from model_utils.fields import AutoCreatedField, AutoLastModifiedField, StatusField
+from tasks.querysets import TaskCounterQuerySet, TaskQuerySet, TaskTombstoneQuerySet
 
 
 class Task(models.Model):
@@ -15,14 +18,115 @@ class Task(models.Model):
     description = models.TextField(verbose_name=_('Description'))
     status = StatusField(verbose_name=_('Status'))
     created_at = AutoCreatedField(verbose_name=_('Created at'))
-    created_by = models.ForeignKey(User, verbose_name=_('Created by'), on_delete=models.SET_NULL, null=True)
+    updated_at = AutoLastModifiedField(verbose_name=_('Updated at'))
+    created_by = models.ForeignKey(
+        User, verbose_name=_('Created by'), on_delete=models.SET_NULL, null=True, db_index=False
+    )
+    # Set by triggers on every insert and update, see migration 0009 and `tasks.changes`
+    change_seq = models.BigIntegerField(editable=False, verbose_name=_('Change sequence'))
+    change_xid = models.BigIntegerField(editable=False, verbose_name=_('Change transaction'))
+    # Set by a trigger on inserts and on updates of name or description, see migration 0006 and `TaskQuerySet.search`
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name=_('Search vector'))
 
     objects = TaskQuerySet.as_manager()
+    tracker = FieldTracker(fields=['created_by'])
 
     class Meta:
         verbose_name = _('Task')
         verbose_name_plural = _('Tasks')
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['created_by', '-id'], name='task_created_by_id_idx'),
+            models.Index(fields=['created_by', 'status', '-id'], name='task_created_by_status_idx'),
+            models.Index(fields=['created_by', 'created_at', 'id'], name='task_created_by_created_idx'),
+            models.Index(fields=['-id'], name='task_anon_id_idx', condition=models.Q(created_by__isnull=True)),
+            models.Index(
+                fields=['status', '-id'],
+                name='task_anon_status_idx',
+                condition=models.Q(created_by__isnull=True),
+            ),
+            models.Index(
+                fields=['created_at', 'id'],
+                name='task_anon_created_at_idx',
+                condition=models.Q(created_by__isnull=True),
+            ),
+            models.Index(fields=['created_by', 'change_xid', 'change_seq'], name='task_created_by_change_idx'),
+            models.Index(
+                fields=['change_xid', 'change_seq'],
+                name='task_anon_change_idx',
+                condition=models.Q(created_by__isnull=True),
+            ),
+            GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name} Task'
+
+
+class TaskCounter(models.Model):
+    """
+    Number of tasks per owner and status, tasks without an owner are counted in the `created_by` NULL bucket.
+    Rows are kept up to date by triggers on the task table in the transaction of every write, see migration 0008.
+    """
+
+    created_by = models.ForeignKey(
+        User,
+        verbose_name=_('Created by'),
+        on_delete=models.DO_NOTHING,
+        null=True,
+        db_index=False,
+        db_constraint=False,
+        related_name='+',
+    )
+    status = models.CharField(max_length=100, choices=Task.STATUS, verbose_name=_('Status'))
+    count = models.BigIntegerField(default=0, verbose_name=_('Count'))
+
+    objects = TaskCounterQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Task counter')
+        verbose_name_plural = _('Task counters')
+        constraints = [
+            models.UniqueConstraint(fields=['created_by', 'status'], name='task_counter_unique', nulls_distinct=False),
+        ]
+
+    def __str__(self):
+        return f'{self.created_by_id} {self.status}: {self.count}'
+
+
+class TaskTombstone(models.Model):
+    """
+    Task that was deleted, or moved away from `created_by` to another owner, recorded by triggers on the task
+    table for the change feed. Tombstones are kept for TASK_TOMBSTONE_RETENTION_DAYS, see `prune_task_tombstones`.
+    """
+
+    change_seq = models.BigIntegerField(primary_key=True, verbose_name=_('Change sequence'))
+    change_xid = models.BigIntegerField(verbose_name=_('Change transaction'))
+    task_id = models.BigIntegerField(verbose_name=_('Task'))
+    created_by = models.ForeignKey(
+        User,
+        verbose_name=_('Created by'),
+        on_delete=models.DO_NOTHING,
+        null=True,
+        db_index=False,
+        db_constraint=False,
+        related_name='+',
+    )
+    deleted_at = models.DateTimeField(db_default=Now(), verbose_name=_('Deleted at'))
+
+    objects = TaskTombstoneQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Task tombstone')
+        verbose_name_plural = _('Task tombstones')
+        indexes = [
+            models.Index(fields=['created_by', 'change_xid', 'change_seq'], name='tombstone_created_by_idx'),
+            models.Index(
+                fields=['change_xid', 'change_seq'],
+                name='tombstone_anon_idx',
+                condition=models.Q(created_by__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} Task tombstone'
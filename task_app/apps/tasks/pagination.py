@@ -0,0 +1,35 @@
+from asgiref.sync import sync_to_async
+from rest_framework.pagination import CursorPagination
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the orderings exposed by TaskFilterSet.
+    `id` is appended as a tie-breaker so that cursors stay stable for equal `created_at` values.
+    Full-text search results are ranked unless an explicit `order_by` is requested.
+
+    `apaginate_queryset` runs `paginate_queryset` through `sync_to_async`, its page query is the only part
+    that blocks.
+    """
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+    ordering_query_param = 'order_by'
+    orderings = {
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+    }
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        order_by = request.query_params.get(self.ordering_query_param)
+        if order_by in self.orderings:
+            return self.orderings[order_by]
+        if 'search_rank' in queryset.query.annotations:
+            return self.search_ordering
+        return self.ordering
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
@@ -1,8 +1,99 @@
-from django.db.models import QuerySet, Q
+import re
+from functools import reduce
+from operator import and_, or_
 
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, connections, transaction
+from django.db.models import QuerySet, Q, F, DecimalField, Count
+from django.db.models.functions import Cast
 
-class TaskQuerySet(QuerySet):
-    def get_available_for_user(self, user):
+
+# The search vector trigger of migration 0006 writes vectors in this configuration and these weights
+SEARCH_CONFIG = 'simple'
+SEARCH_WEIGHTS = {
+    'name': 'A',
+    'description': 'B',
+}
+
+
+class OwnedQuerySetMixin:
+    """
+    Visibility of rows with a `created_by` owner: users see the rows without an owner and their own ones.
+    """
+
+    @staticmethod
+    def get_owner_filters(user):
+        """
+        Returns one filter per owner whose rows `user` can see.
+        """
         if user.is_authenticated:
-            return self.filter(Q(created_by__isnull=True) | Q(created_by=user))
-        return self.filter(created_by__isnull=True)
+            return [Q(created_by__isnull=True), Q(created_by=user)]
+        return [Q(created_by__isnull=True)]
+
+    def get_available_for_user(self, user):
+        return self.filter(reduce(or_, self.get_owner_filters(user)))
+
+
+class TaskQuerySet(OwnedQuerySetMixin, QuerySet):
+    def search(self, terms, fields):
+        """
+        Matches every term as a word prefix against `search_vector`, restricted to the weights of `fields`,
+        and annotates `search_rank`. Falls back to `icontains` lookups when full-text search is disabled.
+        """
+        if not terms:
+            return self
+        words = [word for term in terms for word in re.findall(r'\w+', term)]
+        if not words or settings.TASK_SEARCH_MODE != 'fulltext' or connection.vendor != 'postgresql':
+            return self.filter(
+                reduce(and_, (reduce(or_, (Q(**{f'{field}__icontains': term}) for field in fields)) for term in terms))
+            )
+
+        weights = ''.join(SEARCH_WEIGHTS[field] for field in fields)
+        query = SearchQuery(
+            ' & '.join(f'{word}:*{weights}' for word in words),
+            search_type='raw',
+            config=SEARCH_CONFIG,
+        )
+        return self.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query),
+                output_field=DecimalField(max_digits=12, decimal_places=6),
+            )
+        )
+
+
+class TaskCounterQuerySet(OwnedQuerySetMixin, QuerySet):
+    def get_counts_by_owner(self):
+        """
+        Returns `{created_by_id: {status: count}}`.
+        """
+        counts = {}
+        for created_by_id, status, count in self.values_list('created_by', 'status', 'count'):
+            counts.setdefault(created_by_id, {})[status] = count
+        return counts
+
+    def rebuild(self):
+        """
+        Recounts all tasks, writes to the task table wait until the new counters are committed.
+        Returns the number of counters.
+        """
+        from tasks.models import Task
+
+        with transaction.atomic(using=self.db), connections[self.db].cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {Task._meta.db_table} IN SHARE MODE')  # noqa: SLF001
+            self.all().delete()
+            counts = Task.objects.using(self.db).values_list('created_by', 'status').annotate(Count('id')).order_by()
+            counters = self.bulk_create(
+                (self.model(created_by_id=owner_id, status=status, count=count) for owner_id, status, count in counts),
+                batch_size=1000,
+            )
+        return len(counters)
+
+
+class TaskTombstoneQuerySet(OwnedQuerySetMixin, QuerySet):
+    def prune(self, before):
+        """
+        Deletes the tombstones of tasks deleted before `before` in a single statement, returns their number.
+        """
+        return self.filter(deleted_at__lt=before).delete()[0]
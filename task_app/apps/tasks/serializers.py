@@ -1,7 +1,62 @@
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from core.instrumentation import serialization
 from tasks.models import Task
 from tasks.serializer_fields import CurrentUserOrNoneDefault
+from tasks.signals import tasks_bulk_saved
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """
+    Writes a list of tasks with a single `bulk_create` / `bulk_update`.
+    For updates `instance` is a queryset of editable tasks and every item must carry the `id` of one of them.
+    """
+
+    default_error_messages = {
+        'not_found': _('Not found.'),
+    }
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', settings.TASK_BULK_MAX_SIZE)
+        super().__init__(*args, **kwargs)
+        self.matched_instances = []
+
+    def to_internal_value(self, data):
+        validated_data = super().to_internal_value(data)
+        if self.instance is None:
+            return validated_data
+
+        instances = self.instance.in_bulk([attrs['id'] for attrs in validated_data if 'id' in attrs])
+        errors = [
+            {} if attrs.get('id') in instances else {'id': [self.error_messages['not_found']]}
+            for attrs in validated_data
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        self.matched_instances = [instances[attrs.pop('id')] for attrs in validated_data]
+        return validated_data
+
+    def create(self, validated_data):
+        instances = Task.objects.bulk_create([Task(**attrs) for attrs in validated_data])
+        tasks_bulk_saved.send(sender=Task, instances=instances)
+        return instances
+
+    def update(self, instance, validated_data):
+        # bulk_update() bypasses Field.pre_save(), so `updated_at` is bumped explicitly
+        updated_at = timezone.now()
+        fields = {'updated_at'}
+        for task, attrs in zip(self.matched_instances, validated_data, strict=True):
+            for attr, value in attrs.items():
+                setattr(task, attr, value)
+            task.updated_at = updated_at
+            fields.update(attrs)
+        Task.objects.bulk_update(self.matched_instances, fields=sorted(fields))
+        tasks_bulk_saved.send(sender=Task, instances=self.matched_instances)
+        return self.matched_instances
 
 
 class TaskModelSerializer(serializers.ModelSerializer):
@@ -10,3 +65,112 @@ class TaskModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ('id', 'name', 'description', 'status', 'created_by', 'created_at')
+        list_serializer_class = TaskListSerializer
+
+    async def asave(self, **kwargs):
+        """
+        Async counterpart of `save()` for new tasks, which have no relations to set after the insert.
+        """
+        self.instance = await Task.objects.acreate(**self.validated_data, **kwargs)
+        return self.instance
+
+
+class TaskValuesSerializer:
+    """
+    Read-only counterpart of `serializer_class` for `.values()` rows of plain model fields.
+    It reuses `to_representation` of the readable fields, so the output matches the model serializer,
+    without building a model instance and walking the field tree for every row.
+    """
+
+    serializer_class = TaskModelSerializer
+
+    def __init__(self, context=None):
+        fields = self.serializer_class(context=context).fields.values()
+        self.fields = [
+            (field.field_name, field.source.replace('.', '__'), field.to_representation)
+            for field in fields
+            if not field.write_only
+        ]
+
+    @property
+    def field_names(self):
+        return [field_name for field_name, _, _ in self.fields]
+
+    @property
+    def values_fields(self):
+        return [source for _, source, _ in self.fields]
+
+    @serialization
+    def to_representation(self, rows):
+        return [
+            {
+                field_name: None if row[source] is None else to_representation(row[source])
+                for field_name, source, to_representation in self.fields
+            }
+            for row in rows
+        ]
+
+
+class TaskImportSerializer(TaskModelSerializer):
+    """
+    Validates imported rows with the rules of `TaskModelSerializer`, the owner is set by the importer.
+    """
+
+    created_by = None
+
+    class Meta(TaskModelSerializer.Meta):
+        fields = ('name', 'description', 'status')
+
+
+class TaskImportErrorSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class TaskImportResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    errors = TaskImportErrorSerializer(many=True)
+
+
+class TaskBulkUpdateSerializer(TaskModelSerializer):
+    id = serializers.IntegerField()
+
+
+class TaskBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_ids(self, ids):
+        # the limit is read per request, like in `TaskListSerializer`, so that settings changes apply
+        if len(ids) > settings.TASK_BULK_MAX_SIZE:
+            message = self.fields['ids'].error_messages['max_length']
+            raise serializers.ValidationError(message.format(max_length=settings.TASK_BULK_MAX_SIZE))
+        return ids
+
+
+class TaskBulkDeleteResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    deleted = serializers.BooleanField()
+
+
+class TaskStatusCountsSerializer(serializers.Serializer):
+    to_do = serializers.IntegerField(default=0)
+    done = serializers.IntegerField(default=0)
+    total = serializers.SerializerMethodField()
+
+    def get_total(self, counts) -> int:
+        return sum(counts.values())
+
+
+class TaskStatsSerializer(serializers.Serializer):
+    anonymous = TaskStatusCountsSerializer(help_text=_('Tasks without an owner'))
+    own = TaskStatusCountsSerializer(allow_null=True, help_text=_('Tasks of the user, null for anonymous users'))
+
+
+class TaskChangesSerializer(serializers.Serializer):
+    results = TaskModelSerializer(many=True, help_text=_('Tasks created or updated since the token'))
+    deleted = serializers.ListField(
+        child=serializers.IntegerField(), help_text=_('Ids of tasks deleted or no longer visible since the token')
+    )
+    since = serializers.CharField(help_text=_('Token of the next request'))
+    has_more = serializers.BooleanField(help_text=_('Whether more changes can be fetched right away'))
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from tasks.cache import task_list_cache
+from tasks.models import Task
+
+
+# Sent by bulk writes that bypass model signals, with the list of affected `instances`
+tasks_bulk_saved = Signal()
+
+
+def invalidate_task_list_cache(owner_ids):
+    if task_list_cache.enabled:
+        transaction.on_commit(lambda: task_list_cache.invalidate(owner_ids))
+
+
+@receiver(post_save, sender=Task)
+def invalidate_saved_task(sender, instance, created, **kwargs):
+    owner_ids = {instance.created_by_id}
+    if not created and instance.tracker.has_changed('created_by'):
+        owner_ids.add(instance.tracker.previous('created_by'))
+    invalidate_task_list_cache(owner_ids)
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_deleted_task(sender, instance, **kwargs):
+    invalidate_task_list_cache({instance.created_by_id})
+
+
+@receiver(tasks_bulk_saved)
+def invalidate_bulk_saved_tasks(sender, instances, **kwargs):
+    invalidate_task_list_cache({instance.created_by_id for instance in instances})
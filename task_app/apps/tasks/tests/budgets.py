@@ -0,0 +1,21 @@
+from core.instrumentation import Budget
+from tasks.views import TaskGenericViewSet
+
+
+# Exports are streamed and imports run a batch of queries per TASK_IMPORT_BATCH_SIZE rows, so they are not
+# budgeted. Bulk actions run in a transaction, the SAVEPOINT and RELEASE of nested ones are counted too.
+BUDGETS = {
+    TaskGenericViewSet: {
+        'list': Budget(queries=2, duration=250),
+        'retrieve': Budget(queries=1, duration=100),
+        'create': Budget(queries=1),
+        'update': Budget(queries=2),
+        'partial_update': Budget(queries=2),
+        'destroy': Budget(queries=2),
+        'bulk': Budget(queries=3),
+        'bulk_update': Budget(queries=4),
+        'bulk_destroy': Budget(queries=5),
+        'stats': Budget(queries=1, duration=100),
+        'changes': Budget(queries=3),
+    },
+}
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from tasks.models import Task, TaskCounter, TaskTombstone
+from tasks.tests.factories import TaskFactory
+
+
+class TestImportTasksCommand:
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        path = tmp_path / 'tasks.csv'
+        path.write_text(
+            'name,description,status\n'
+            'first,"multi\nline, description",done\n'
+            'second,,to_do\n'
+            '"quoted ""name""",description,\n'
+            'ünïcødé,description,to_do\n',
+            encoding='utf-8',
+        )
+        return path
+
+    @pytest.mark.parametrize('use_copy', (False, True))
+    def test_import_csv(self, csv_file, use_copy, user, capsys):
+        call_command('import_tasks', str(csv_file), '--user', user.username, '--batch-size', '2', copy=use_copy)
+
+        output = capsys.readouterr()
+        assert 'Created 2 tasks, 2 rows failed' in output.out
+        assert 'Line 4:' in output.err
+        assert 'Line 5:' in output.err
+
+        tasks = Task.objects.order_by('id')
+        assert [(task.name, task.description, task.status, task.created_by) for task in tasks] == [
+            ('first', 'multi\nline, description', Task.STATUS.done, user),
+            ('ünïcødé', 'description', Task.STATUS.to_do, user),
+        ]
+        assert all(task.created_at and task.updated_at for task in tasks)
+
+    def test_copy_stores_anonymous_tasks_and_search_vector(self, tmp_path):
+        path = tmp_path / 'tasks.ndjson'
+        path.write_text('{"name": "weekly report", "description": ""}\n{"name": "report", "description": "x"}\n')
+        call_command('import_tasks', str(path), copy=True)
+
+        assert list(Task.objects.values_list('name', 'created_by')) == [('report', None)]
+        assert Task.objects.search(['report'], fields=['name']).count() == 1
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(CommandError, match='Unknown format'):
+            call_command('import_tasks', str(tmp_path / 'tasks.txt'))
+
+    def test_unknown_user(self, csv_file):
+        with pytest.raises(CommandError, match='does not exist'):
+            call_command('import_tasks', str(csv_file), '--user', 'nobody')
+
+
+class TestRebuildTaskCountersCommand:
+    def test_rebuild(self, user, capsys):
+        TaskFactory.create_batch(2, created_by=user, status=Task.STATUS.done)
+        TaskCounter.objects.update(count=0)
+        call_command('rebuild_task_counters')
+        assert 'Rebuilt 1 task counters' in capsys.readouterr().out
+        assert list(TaskCounter.objects.values_list('created_by', 'status', 'count')) == [
+            (user.id, Task.STATUS.done, 2)
+        ]
+
+
+class TestPruneTaskTombstonesCommand:
+    def test_prune(self, settings, capsys):
+        settings.TASK_TOMBSTONE_RETENTION_DAYS = 2
+        expired, kept = TaskFactory.create_batch(2)
+        Task.objects.filter(id__in=[expired.id, kept.id]).delete()
+        TaskTombstone.objects.filter(task_id=expired.id).update(deleted_at=timezone.now() - timedelta(days=3, hours=1))
+        TaskTombstone.objects.filter(task_id=kept.id).update(deleted_at=timezone.now() - timedelta(days=2, hours=23))
+
+        call_command('prune_task_tombstones')
+        assert 'Deleted 1 task tombstones' in capsys.readouterr().out
+        assert list(TaskTombstone.objects.values_list('task_id', flat=True)) == [kept.id]
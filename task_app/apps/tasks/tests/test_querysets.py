@@ -0,0 +1,163 @@
+import io
+import re
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.db.models import Count
+
+from tasks.imports import NDJSONReader, TaskImporter
+from tasks.models import Task, TaskCounter
+from users.tests.factories import UserFactory
+
+
+TASK_INDEXES = {index.name for index in Task._meta.indexes}
+
+
+def get_status(i):
+    return Task.STATUS.done if i % 10 == 0 else Task.STATUS.to_do
+
+
+def get_used_indexes(plan):
+    return set(re.findall(r'Index (?:Only )?Scan(?: Backward)? (?:using|on) (\w+)', plan))
+
+
+class TestTaskQuerySetIndexes:
+    @pytest.fixture
+    def owner(self):
+        other_users = UserFactory.create_batch(10)
+        Task.objects.bulk_create(
+            Task(name='task', description='', created_by=other_user, status=get_status(i))
+            for other_user in other_users
+            for i in range(500)
+        )
+        Task.objects.bulk_create(
+            Task(name='task', description='', status=get_status(i)) for i in range(50)
+        )
+        owner = UserFactory()
+        Task.objects.bulk_create(Task(name='task', description='', created_by=owner) for _ in range(5))
+        # Rolled back runs leave dead entries behind in the indexes of a reused test database, which skews the
+        # estimated cost of scanning them, so they are rebuilt before collecting statistics.
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX TABLE {Task._meta.db_table}')
+            cursor.execute(f'ANALYZE {Task._meta.db_table}')
+        return owner
+
+    @pytest.mark.parametrize(
+        'filters,ordering,acceptable_indexes',
+        (
+            ({}, ('-id',), {'task_anon_id_idx'}),
+            # a status filter over the anonymous bucket is as cheap on the id index, whichever the planner prefers
+            (
+                {'status': Task.STATUS.done},
+                ('-id',),
+                {'task_anon_status_idx', 'task_anon_id_idx', 'task_created_by_status_idx'},
+            ),
+            ({}, ('created_at', 'id'), {'task_anon_created_at_idx'}),
+            ({}, ('-created_at', '-id'), {'task_anon_created_at_idx'}),
+        )
+    )
+    def test_list_for_anonymous_uses_partial_indexes(self, owner, filters, ordering, acceptable_indexes):
+        # A top-N sort of a tiny bucket is always cheapest, so sorting is disabled to reveal the ordered index
+        # the planner switches to once the bucket grows.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_sort = off')
+        queryset = Task.objects.get_available_for_user(AnonymousUser()).filter(**filters).order_by(*ordering)
+        plan = queryset[:50].explain()
+
+        assert 'Seq Scan' not in plan
+        used_indexes = get_used_indexes(plan)
+        assert used_indexes
+        assert used_indexes <= acceptable_indexes
+
+    @pytest.mark.parametrize(
+        'filters,ordering',
+        (
+            ({}, ('-id',)),
+            ({'status': Task.STATUS.done}, ('-id',)),
+            ({}, ('created_at', 'id')),
+        )
+    )
+    def test_list_for_user_uses_composite_indexes(self, owner, filters, ordering):
+        queryset = Task.objects.get_available_for_user(owner).filter(**filters).order_by(*ordering)
+        plan = queryset[:50].explain()
+
+        assert 'Seq Scan' not in plan
+        used_indexes = get_used_indexes(plan)
+        assert used_indexes
+        assert used_indexes <= TASK_INDEXES
+
+    def test_search_uses_gin_index(self, owner):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        queryset = Task.objects.search(['report'], fields=('name',))
+        plan = queryset.explain()
+
+        assert 'Seq Scan' not in plan
+        assert 'task_search_vector_idx' in plan
+
+
+class TestTaskSearchVector:
+    def test_search_vector_follows_writes(self):
+        task = Task.objects.create(name='weekly report', description='')
+        Task.objects.filter(pk=task.pk).update(description='budget')
+
+        assert list(Task.objects.search(['budget'], fields=('description',))) == [task]
+        assert not Task.objects.search(['budget'], fields=('name',)).exists()
+        assert list(Task.objects.search(['week'], fields=('name',))) == [task]
+
+
+def count_tasks():
+    counts = Task.objects.values_list('created_by', 'status').annotate(Count('id')).order_by()
+    return {(created_by_id, status): count for created_by_id, status, count in counts}
+
+
+def get_counters():
+    counters = TaskCounter.objects.exclude(count=0).values_list('created_by', 'status', 'count')
+    return {(created_by_id, status): count for created_by_id, status, count in counters}
+
+
+class TestTaskCounters:
+    @pytest.fixture
+    def owner(self):
+        owner = UserFactory()
+        Task.objects.bulk_create(
+            Task(name='task', description='', created_by=created_by, status=get_status(i))
+            for created_by in (owner, None)
+            for i in range(15)
+        )
+        return owner
+
+    def test_counters_follow_writes(self, owner):
+        assert get_counters() == count_tasks() == {
+            (owner.id, Task.STATUS.to_do): 13,
+            (owner.id, Task.STATUS.done): 2,
+            (None, Task.STATUS.to_do): 13,
+            (None, Task.STATUS.done): 2,
+        }
+
+        other_user = UserFactory()
+        Task.objects.create(name='task', description='', created_by=other_user)
+        task = Task.objects.filter(created_by=owner, status=Task.STATUS.to_do).first()
+        task.status = Task.STATUS.done
+        task.save()
+        task.created_by = None
+        task.save()
+        task.name = 'renamed'
+        task.save()
+        Task.objects.filter(created_by__isnull=True, status=Task.STATUS.done).update(status=Task.STATUS.to_do)
+        Task.objects.filter(created_by=owner)[0].delete()
+        Task.objects.filter(created_by=None, id__in=Task.objects.filter(created_by=None).values('id')[:3]).delete()
+        assert get_counters() == count_tasks()
+
+    def test_counters_follow_copy_imports_and_deleted_owners(self, owner):
+        stream = io.BytesIO(b'{"name": "a", "description": "a", "status": "done"}\n' * 3)
+        TaskImporter(created_by=owner, use_copy=True).run(NDJSONReader(stream))
+        owner.delete()
+        assert get_counters() == count_tasks() == {(None, Task.STATUS.to_do): 26, (None, Task.STATUS.done): 7}
+
+    def test_rebuild(self, owner):
+        TaskCounter.objects.all().delete()
+        TaskCounter.objects.create(created_by=None, status=Task.STATUS.done, count=100)
+        assert TaskCounter.objects.rebuild() == 4
+        assert get_counters() == count_tasks()
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.serializers import TaskModelSerializer, TaskValuesSerializer
+from tasks.tests.factories import TaskFactory
+from users.tests.factories import UserFactory
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class TestTaskValuesSerializer:
+    @pytest.fixture
+    def tasks(self):
+        return [
+            TaskFactory(name='plain', description='description', status=Task.STATUS.to_do),
+            TaskFactory(name='ünïcødé ✓ "quoted" \\ slash', description='line\nbreak\ttab', status=Task.STATUS.done),
+            TaskFactory(name='', description='', created_by=UserFactory()),
+            TaskFactory(name='micro', created_at=datetime(2024, 2, 29, 23, 59, 59, 123456, tzinfo=timezone.utc)),
+            TaskFactory(name='whole second', created_at=datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        ]
+
+    @pytest.mark.parametrize('time_zone', ('UTC', 'Europe/Berlin', 'America/St_Johns'))
+    def test_output_matches_model_serializer(self, tasks, time_zone, settings):
+        settings.TIME_ZONE = time_zone
+        serializer = TaskValuesSerializer()
+
+        expected = render(TaskModelSerializer(Task.objects.all(), many=True).data)
+        actual = render(serializer.to_representation(Task.objects.values(*serializer.values_fields)))
+        assert actual == expected
+
+    def test_values_fields_are_readable_fields(self):
+        assert TaskValuesSerializer().values_fields == ['id', 'name', 'description', 'status', 'created_at']
+
+
+class TestTaskListResponseMatchesModelSerializer:
+    list_action_url = reverse('api:tasks:tasks-list')
+
+    @pytest.fixture
+    def tasks(self, user):
+        TaskFactory.create_batch(3, created_by=user)
+        TaskFactory.create_batch(4, created_by=None)
+        TaskFactory(name='report report')
+        TaskFactory(name='weekly report')
+        TaskFactory.create_batch(2, created_by=UserFactory())
+
+    @pytest.mark.parametrize(
+        'query',
+        (
+            {},
+            {'page_size': 3},
+            {'status': Task.STATUS.done},
+            {'order_by': 'created_at', 'page_size': 2},
+            {'order_by': '-created_at'},
+            {'search': 'report'},
+        )
+    )
+    @pytest.mark.parametrize('authenticated', (False, True))
+    def test_every_page_matches(self, tasks, query, authenticated, api_client, user):
+        if authenticated:
+            api_client.force_authenticate(user)
+
+        response = api_client.get(self.list_action_url, data=query)
+        while True:
+            ids = [item['id'] for item in response.data['results']]
+            instances = Task.objects.in_bulk(ids)
+            expected = render(TaskModelSerializer([instances[task_id] for task_id in ids], many=True).data)
+            assert render(response.data['results']) == expected
+            if not response.data['next']:
+                break
+            response = api_client.get(response.data['next'])
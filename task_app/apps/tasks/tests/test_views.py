@@ -1,11 +1,24 @@
+import csv
+import io
+import json
+import time
 from datetime import datetime
+from unittest import mock
 
 import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
 from tasks.models import Task
+from tasks.pagination import TaskCursorPagination
 from tasks.tests.factories import TaskFactory
+from tasks.views import TaskGenericViewSet
 from users.tests.factories import UserFactory
 
 
@@ -40,8 +53,8 @@ class TestTaskGenericViewSet:
         task_created_by_authenticated_user = TaskFactory(created_by=user)
         response = api_client.get(self.list_action_url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == objects_count_for_unauthenticated
-        for item in response.data:
+        assert len(response.data['results']) == objects_count_for_unauthenticated
+        for item in response.data['results']:
             assert item['name'] is not None
             assert item['description'] is not None
             assert item['status'] is not None
@@ -57,8 +70,8 @@ class TestTaskGenericViewSet:
         api_client.force_authenticate(user=user)
         response = api_client.get(self.list_action_url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == objects_count_for_authenticated + 1
-        for item in response.data:
+        assert len(response.data['results']) == objects_count_for_authenticated + 1
+        for item in response.data['results']:
             assert item['name'] is not None
             assert item['description'] is not None
             assert item['status'] is not None
@@ -234,9 +247,9 @@ class TestTaskGenericViewSet:
 
         response = api_client.get(self.list_action_url, data=query)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == length
+        assert len(response.data['results']) == length
         if query:
-            assert response.data[0]['status'] == query['status']
+            assert response.data['results'][0]['status'] == query['status']
 
     @pytest.mark.parametrize(
         'query,is_reverse',
@@ -250,9 +263,9 @@ class TestTaskGenericViewSet:
         TaskFactory.create_batch(2)
         response = api_client.get(self.list_action_url, data=query)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 2
-        assert response.data == sorted(
-            response.data,
+        assert len(response.data['results']) == 2
+        assert response.data['results'] == sorted(
+            response.data['results'],
             key=lambda x: datetime.fromisoformat(x['created_at']),
             reverse=is_reverse
         )
@@ -266,15 +279,805 @@ class TestTaskGenericViewSet:
             ({'search': ''}, 2),
             ({'search': 'task'}, 2),
             ({}, 2)
-         )
+        )
     )
-    def search_by_name(self, query, expected_result_cnt, api_client):
+    def test_search_by_name(self, query, expected_result_cnt, api_client):
         TaskFactory(name='task_1')
         TaskFactory(name='task_2')
 
         response = api_client.get(self.list_action_url, data=query)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == expected_result_cnt
+        assert len(response.data['results']) == expected_result_cnt
 
         if expected_result_cnt == 1:
-            assert response.data[0]['name'] == query['search']
+            assert response.data['results'][0]['name'] == query['search']
+
+    def test_list_action_is_paginated_by_cursor(self, api_client):
+        TaskFactory.create_batch(5)
+        response = api_client.get(self.list_action_url, data={'page_size': 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {'next', 'previous', 'results'}
+        assert response.data['previous'] is None
+
+        seen_ids = []
+        next_url = response.data['next']
+        seen_ids.extend(item['id'] for item in response.data['results'])
+        while next_url:
+            response = api_client.get(next_url)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['results']) <= 2
+            seen_ids.extend(item['id'] for item in response.data['results'])
+            next_url = response.data['next']
+
+        assert seen_ids == sorted(Task.objects.values_list('id', flat=True), reverse=True)
+
+    @pytest.mark.parametrize('order_by', ('created_at', '-created_at'))
+    def test_list_action_cursor_follows_order_by(self, order_by, api_client):
+        TaskFactory.create_batch(5)
+        seen = []
+        response = api_client.get(self.list_action_url, data={'page_size': 2, 'order_by': order_by})
+        seen.extend(response.data['results'])
+        while response.data['next']:
+            response = api_client.get(response.data['next'])
+            seen.extend(response.data['results'])
+
+        assert len(seen) == 5
+        assert seen == sorted(
+            seen,
+            key=lambda x: (datetime.fromisoformat(x['created_at']), x['id']),
+            reverse=order_by.startswith('-')
+        )
+
+    def test_list_action_page_size_is_capped(self, api_client):
+        TaskFactory.create_batch(3)
+        with mock.patch.object(TaskCursorPagination, 'max_page_size', 2):
+            response = api_client.get(self.list_action_url, data={'page_size': 100})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 2
+        assert response.data['next'] is not None
+
+    @pytest.mark.parametrize('page_size', (1, 10, 30))
+    def test_list_queries_do_not_depend_on_page_size(self, page_size, api_client, user):
+        TaskFactory.create_batch(30)
+        TaskFactory.create_batch(5, created_by=user)
+        api_client.force_authenticate(user)
+        response = api_client.get(self.list_action_url, data={'page_size': page_size})
+        assert len(response.data['results']) == page_size
+        assert response.stats.queries == 2
+
+    def test_list_action_does_not_count(self, api_client):
+        TaskFactory.create_batch(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(self.list_action_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert not any('COUNT(' in query['sql'].upper() for query in queries.captured_queries)
+
+    def test_list_pagination_does_not_count(self):
+        TaskFactory.create_batch(3)
+        request = Request(APIRequestFactory().get(self.list_action_url))
+        with CaptureQueriesContext(connection) as queries:
+            page = TaskCursorPagination().paginate_queryset(Task.objects.all(), request)
+        assert len(page) == 3
+        assert not any('COUNT(' in query['sql'].upper() for query in queries.captured_queries)
+
+    @pytest.mark.parametrize('search_mode', ('fulltext', 'substring'))
+    def test_search_does_not_match_description(self, search_mode, api_client, settings):
+        settings.TASK_SEARCH_MODE = search_mode
+        TaskFactory(name='groceries', description='buy milk')
+        response = api_client.get(self.list_action_url, data={'search': 'milk'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'] == []
+
+    def test_search_matches_word_prefixes_of_all_terms(self, api_client):
+        matching_task = TaskFactory(name='Quarterly report draft')
+        TaskFactory(name='Quarterly planning')
+        response = api_client.get(self.list_action_url, data={'search': 'quart rep'})
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [matching_task.id]
+
+    def test_search_substring_fallback(self, api_client, settings):
+        settings.TASK_SEARCH_MODE = 'substring'
+        matching_task = TaskFactory(name='Quarterly report draft')
+        response = api_client.get(self.list_action_url, data={'search': 'port'})
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [matching_task.id]
+
+    def test_search_results_are_ranked(self, api_client):
+        weak_match = TaskFactory(name='report on the quarterly figures for the board')
+        strong_match = TaskFactory(name='report report')
+        TaskFactory(name='unrelated')
+        response = api_client.get(self.list_action_url, data={'search': 'report', 'page_size': 1})
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [strong_match.id]
+
+        response = api_client.get(response.data['next'])
+        assert [item['id'] for item in response.data['results']] == [weak_match.id]
+        assert response.data['next'] is None
+
+
+class TestTaskBulkActions:
+    bulk_url = reverse('api:tasks:tasks-bulk')
+
+    def test_bulk_create_succeed(self, api_client, user, django_assert_num_queries):
+        api_client.force_authenticate(user)
+        payload = [{'name': f'task_{i}', 'description': 'description'} for i in range(3)]
+        with django_assert_num_queries(3):  # savepoint, insert, release
+            response = api_client.post(self.bulk_url, payload, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [item['name'] for item in response.data] == ['task_0', 'task_1', 'task_2']
+        assert all(item['id'] for item in response.data)
+        assert Task.objects.filter(created_by=user).count() == 3
+
+    def test_bulk_create_reports_per_item_errors(self, api_client):
+        payload = [{'name': 'task', 'description': 'description'}, {'status': 'abracadabra'}]
+        response = api_client.post(self.bulk_url, payload, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert set(response.data[1]) == {'name', 'description', 'status'}
+        assert not Task.objects.exists()
+
+    def test_bulk_create_respects_max_size(self, api_client, settings):
+        settings.TASK_BULK_MAX_SIZE = 1
+        payload = [{'name': 'task', 'description': 'description'}] * 2
+        response = api_client.post(self.bulk_url, payload, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Task.objects.exists()
+
+    def test_bulk_update_succeed(self, api_client, user):
+        tasks = TaskFactory.create_batch(2, created_by=user, status=Task.STATUS.to_do)
+        api_client.force_authenticate(user)
+        payload = [
+            {'id': tasks[0].id, 'status': Task.STATUS.done},
+            {'id': tasks[1].id, 'name': 'renamed'},
+        ]
+        response = api_client.patch(self.bulk_url, payload, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data] == [tasks[0].id, tasks[1].id]
+
+        tasks[0].refresh_from_db()
+        tasks[1].refresh_from_db()
+        assert tasks[0].status == Task.STATUS.done
+        assert tasks[1].name == 'renamed'
+        assert tasks[1].status == Task.STATUS.to_do
+        assert tasks[1].created_by == user
+
+    def test_bulk_update_rejects_invisible_tasks(self, api_client, user):
+        own_task = TaskFactory(created_by=user, name='own')
+        other_task = TaskFactory(created_by=UserFactory(), name='other')
+        api_client.force_authenticate(user)
+        payload = [
+            {'id': own_task.id, 'name': 'renamed'},
+            {'id': other_task.id, 'name': 'renamed'},
+        ]
+        response = api_client.patch(self.bulk_url, payload, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert 'id' in response.data[1]
+
+        own_task.refresh_from_db()
+        assert own_task.name == 'own'
+
+    def test_bulk_destroy_succeed(self, api_client, user):
+        own_tasks = TaskFactory.create_batch(2, created_by=user)
+        other_task = TaskFactory(created_by=UserFactory())
+        api_client.force_authenticate(user)
+        ids = [own_tasks[0].id, other_task.id, own_tasks[1].id]
+        response = api_client.delete(self.bulk_url, {'ids': ids}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [
+            {'id': own_tasks[0].id, 'deleted': True},
+            {'id': other_task.id, 'deleted': False},
+            {'id': own_tasks[1].id, 'deleted': True},
+        ]
+        assert list(Task.objects.values_list('id', flat=True)) == [other_task.id]
+
+    def test_bulk_destroy_respects_max_size(self, api_client, settings):
+        tasks = TaskFactory.create_batch(2)
+        settings.TASK_BULK_MAX_SIZE = 1
+        response = api_client.delete(self.bulk_url, {'ids': [task.id for task in tasks]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'ids' in response.data
+        assert Task.objects.count() == 2
+
+    def test_bulk_destroy_failed(self, api_client):
+        response = api_client.delete(self.bulk_url, {'ids': []}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestTaskExport:
+    export_url = reverse('api:tasks:tasks-export')
+    list_action_url = reverse('api:tasks:tasks-list')
+
+    @pytest.fixture
+    def tasks(self, user):
+        TaskFactory.create_batch(3, created_by=user, status=Task.STATUS.to_do)
+        TaskFactory(created_by=None, name='weekly report', status=Task.STATUS.done)
+        TaskFactory(created_by=None, name='ünïcødé, "quoted"\nline', description='')
+        TaskFactory(created_by=UserFactory())
+
+    def export(self, api_client, **params):
+        response = api_client.get(self.export_url, data=params)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        return response, b''.join(response.streaming_content)
+
+    @pytest.mark.parametrize(
+        'query',
+        ({}, {'status': Task.STATUS.done}, {'search': 'report'}, {'order_by': 'created_at'}),
+    )
+    def test_ndjson_export_matches_list(self, tasks, query, api_client, user, settings):
+        settings.TASK_EXPORT_CHUNK_SIZE = 2
+        api_client.force_authenticate(user)
+
+        response, content = self.export(api_client, **query)
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert response['Content-Disposition'] == 'attachment; filename="tasks.ndjson"'
+
+        expected = api_client.get(self.list_action_url, data=query).data['results']
+        assert content.endswith(b'\n')
+        assert [json.loads(line) for line in content.splitlines()] == expected
+
+    def test_csv_export(self, tasks, api_client, settings):
+        settings.TASK_EXPORT_CHUNK_SIZE = 1
+        response, content = self.export(api_client, format='csv')
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert response['Content-Disposition'] == 'attachment; filename="tasks.csv"'
+
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        expected = api_client.get(self.list_action_url).data['results']
+        assert [row['id'] for row in rows] == [str(item['id']) for item in expected]
+        assert rows[0]['name'] == 'ünïcødé, "quoted"\nline'
+        assert list(rows[0]) == ['id', 'name', 'description', 'status', 'created_at']
+
+    def test_csv_export_is_negotiated_by_accept_header(self, api_client):
+        response = api_client.get(self.export_url, HTTP_ACCEPT='text/csv')
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert b''.join(response.streaming_content) == b'id,name,description,status,created_at\r\n'
+
+    def test_export_is_streamed_in_chunks(self, tasks, api_client, settings):
+        settings.TASK_EXPORT_CHUNK_SIZE = 1
+        response = api_client.get(self.export_url)
+        assert len(list(response.streaming_content)) == 2
+
+    def test_invalid_filter_is_rejected(self, api_client):
+        response = api_client.get(self.export_url, data={'status': 'abracadabra'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestTaskImport:
+    import_url = reverse('api:tasks:tasks-import')
+
+    def test_ndjson_import(self, api_client, user):
+        api_client.force_authenticate(user)
+        content = b'\n'.join(
+            [
+                b'{"name": "first", "description": "description"}',
+                b'',
+                b'{"name": "second", "description": "description", "status": "done"}',
+                b'{"name": "broken"',
+                b'{"name": "invalid", "description": "description", "status": "abracadabra"}',
+                b'[]',
+            ]
+        )
+        response = api_client.post(self.import_url, content, content_type='application/x-ndjson')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 2
+        assert response.data['failed'] == 3
+        assert [error['line'] for error in response.data['errors']] == [4, 5, 6]
+        assert 'status' in response.data['errors'][1]['errors']
+
+        tasks = Task.objects.order_by('id')
+        assert [(task.name, task.status, task.created_by) for task in tasks] == [
+            ('first', Task.STATUS.to_do, user),
+            ('second', Task.STATUS.done, user),
+        ]
+
+    def test_csv_import_accepts_export(self, api_client, settings):
+        settings.TASK_IMPORT_BATCH_SIZE = 2
+        TaskFactory.create_batch(3, created_by=None)
+        TaskFactory(created_by=None, name='ünïcødé, "quoted"\nline')
+        content = b''.join(api_client.get(reverse('api:tasks:tasks-export'), data={'format': 'csv'}).streaming_content)
+        content += b'5,' + b'x' * 256 + b',description,to_do,\r\n'
+
+        response = api_client.post(self.import_url, content, content_type='text/csv; charset=utf-8')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 4
+        assert response.data['errors'] == [{'line': content.count(b'\n'), 'errors': {'name': [mock.ANY]}}]
+        assert Task.objects.filter(name='ünïcødé, "quoted"\nline').count() == 2
+
+    def test_errors_are_capped(self, api_client, settings):
+        settings.TASK_IMPORT_MAX_ERRORS = 1
+        response = api_client.post(self.import_url, b'{}\n{}\n', content_type='application/x-ndjson')
+        assert response.data['failed'] == 2
+        assert len(response.data['errors']) == 1
+
+    def test_unsupported_media_type(self, api_client):
+        response = api_client.post(self.import_url, {'name': 'task'}, format='json')
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+class TestTaskConditionalGet:
+    list_action_url = reverse('api:tasks:tasks-list')
+    detail_url = 'api:tasks:tasks-detail'
+
+    def test_list_not_modified(self, api_client, django_assert_num_queries):
+        TaskFactory.create_batch(2)
+        response = api_client.get(self.list_action_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'].startswith('"')
+        assert 'Last-Modified' not in response
+
+        with django_assert_num_queries(1):
+            response = api_client.get(self.list_action_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+
+    @pytest.mark.parametrize('change', ('create', 'update', 'queryset_update', 'delete', 'owner_delete'))
+    def test_list_etag_changes_with_visible_tasks(self, change, api_client, user):
+        tasks = TaskFactory.create_batch(2)
+        owned = TaskFactory(created_by=user)
+        etag = api_client.get(self.list_action_url)['ETag']
+
+        if change == 'create':
+            TaskFactory()
+        elif change == 'update':
+            tasks[1].name = 'renamed'
+            tasks[1].save()
+        elif change == 'queryset_update':
+            Task.objects.filter(pk=tasks[1].pk).update(name='renamed')
+        elif change == 'delete':
+            tasks[1].delete()
+        else:
+            user.delete()
+            assert Task.objects.get(pk=owned.pk).created_by is None
+
+        response = api_client.get(self.list_action_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_list_etag_depends_on_query_and_user(self, api_client, user):
+        TaskFactory.create_batch(2)
+        etag = api_client.get(self.list_action_url)['ETag']
+        assert api_client.get(self.list_action_url, data={'status': Task.STATUS.done})['ETag'] != etag
+
+        api_client.force_authenticate(user)
+        assert api_client.get(self.list_action_url)['ETag'] != etag
+
+    def test_list_etag_ignores_invisible_tasks(self, api_client, user):
+        TaskFactory()
+        etag = api_client.get(self.list_action_url)['ETag']
+        TaskFactory(created_by=user)
+
+        response = api_client.get(self.list_action_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_list_etag_waits_for_older_transactions(self, api_client):
+        # a transaction that started before the latest change and may still commit tasks numbered below it
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('BEGIN')
+                cursor.execute('SELECT pg_current_xact_id()')
+                TaskFactory()
+                response = api_client.get(self.list_action_url)
+                assert response.status_code == status.HTTP_200_OK
+                assert 'ETag' not in response
+                cursor.execute('COMMIT')
+        finally:
+            other.close()
+
+        assert 'ETag' in api_client.get(self.list_action_url)
+
+    def test_retrieve_not_modified(self, api_client):
+        task = TaskFactory()
+        detail_action_url = reverse(self.detail_url, args=(task.id,))
+        response = api_client.get(detail_action_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Last-Modified' not in response
+
+        not_modified_response = api_client.get(detail_action_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified_response['ETag'] == response['ETag']
+
+        api_client.patch(detail_action_url, {'name': 'renamed'})
+        response = api_client.get(detail_action_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['name'] == 'renamed'
+
+    def test_retrieve_etag_changes_with_queryset_update(self, api_client):
+        task = TaskFactory()
+        detail_action_url = reverse(self.detail_url, args=(task.id,))
+        etag = api_client.get(detail_action_url)['ETag']
+        Task.objects.filter(pk=task.pk).update(name='renamed')
+
+        response = api_client.get(detail_action_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['name'] == 'renamed'
+
+    def test_bulk_update_changes_etag(self, api_client):
+        task = TaskFactory()
+        etag = api_client.get(self.list_action_url)['ETag']
+        api_client.patch(reverse('api:tasks:tasks-bulk'), [{'id': task.id, 'name': 'renamed'}], format='json')
+
+        response = api_client.get(self.list_action_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestTaskListCache:
+    list_action_url = reverse('api:tasks:tasks-list')
+    detail_url = 'api:tasks:tasks-detail'
+
+    @pytest.fixture(autouse=True, params=('task_list', 'shared'))
+    def enable_cache(self, request, settings):
+        settings.TASK_LIST_CACHE = {**settings.TASK_LIST_CACHE, 'ENABLED': True, 'ALIAS': request.param}
+
+    def test_list_is_served_from_cache(self, api_client, django_assert_num_queries):
+        TaskFactory.create_batch(2)
+        response = api_client.get(self.list_action_url, data={'status': Task.STATUS.done, 'order_by': 'created_at'})
+        assert response.status_code == status.HTTP_200_OK
+
+        with django_assert_num_queries(0):
+            cached_response = api_client.get(
+                self.list_action_url, data={'order_by': 'created_at', 'status': Task.STATUS.done}
+            )
+        assert cached_response.status_code == status.HTTP_200_OK
+        assert cached_response.data == response.data
+        assert cached_response['ETag'] == response['ETag']
+
+        with django_assert_num_queries(0):
+            not_modified_response = api_client.get(
+                self.list_action_url,
+                data={'order_by': 'created_at', 'status': Task.STATUS.done},
+                HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_cache_is_keyed_by_user(self, api_client, user):
+        TaskFactory(created_by=user)
+        assert api_client.get(self.list_action_url).data['results'] == []
+
+        api_client.force_authenticate(user)
+        assert len(api_client.get(self.list_action_url).data['results']) == 1
+
+    @pytest.mark.parametrize('change', ('create', 'update', 'delete', 'bulk_create', 'bulk_update', 'bulk_destroy'))
+    def test_writes_through_viewset_invalidate_cache(self, change, api_client, django_capture_on_commit_callbacks):
+        task = TaskFactory(name='task')
+        api_client.get(self.list_action_url)
+
+        bulk_url = reverse('api:tasks:tasks-bulk')
+        detail_action_url = reverse(self.detail_url, args=(task.id,))
+        with django_capture_on_commit_callbacks(execute=True):
+            if change == 'create':
+                api_client.post(self.list_action_url, {'name': 'created', 'description': 'description'})
+            elif change == 'update':
+                api_client.patch(detail_action_url, {'name': 'renamed'})
+            elif change == 'delete':
+                api_client.delete(detail_action_url)
+            elif change == 'bulk_create':
+                api_client.post(bulk_url, [{'name': 'created', 'description': 'description'}], format='json')
+            elif change == 'bulk_update':
+                api_client.patch(bulk_url, [{'id': task.id, 'name': 'renamed'}], format='json')
+            else:
+                api_client.delete(bulk_url, {'ids': [task.id]}, format='json')
+
+        results = api_client.get(self.list_action_url).data['results']
+        assert sorted(item['name'] for item in results) == sorted(
+            Task.objects.values_list('name', flat=True)
+        )
+
+    def test_orm_changes_invalidate_only_affected_buckets(
+        self, api_client, user, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        other_user = UserFactory()
+        TaskFactory(created_by=user)
+        api_client.force_authenticate(user)
+        api_client.get(self.list_action_url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TaskFactory(created_by=other_user)
+        with django_assert_num_queries(0):
+            api_client.get(self.list_action_url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TaskFactory(created_by=None)
+        assert len(api_client.get(self.list_action_url).data['results']) == 2
+
+    def test_ownership_change_invalidates_previous_bucket(self, api_client, user, django_capture_on_commit_callbacks):
+        task = TaskFactory(created_by=None)
+        assert len(api_client.get(self.list_action_url).data['results']) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            task.created_by = user
+            task.save()
+        assert api_client.get(self.list_action_url).data['results'] == []
+
+    def test_large_entries_are_not_cached(self, api_client, settings, django_assert_num_queries):
+        settings.TASK_LIST_CACHE = {**settings.TASK_LIST_CACHE, 'MAX_ENTRY_SIZE': 10}
+        TaskFactory()
+        api_client.get(self.list_action_url)
+        with django_assert_num_queries(2):
+            api_client.get(self.list_action_url)
+
+
+class TestTaskStats:
+    url = reverse('api:tasks:tasks-stats')
+
+    def test_stats_of_anonymous_user(self, api_client, user):
+        TaskFactory.create_batch(2, status=Task.STATUS.to_do)
+        TaskFactory(status=Task.STATUS.done)
+        TaskFactory(created_by=user)
+        response = api_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'anonymous': {'to_do': 2, 'done': 1, 'total': 3}, 'own': None}
+
+    def test_stats_of_authenticated_user(self, api_client, user, django_assert_num_queries):
+        TaskFactory(status=Task.STATUS.done)
+        TaskFactory(created_by=user, status=Task.STATUS.to_do)
+        TaskFactory(created_by=UserFactory())
+        api_client.force_authenticate(user)
+        with django_assert_num_queries(1):
+            response = api_client.get(self.url)
+        assert response.data == {
+            'anonymous': {'to_do': 0, 'done': 1, 'total': 1},
+            'own': {'to_do': 1, 'done': 0, 'total': 1},
+        }
+
+    def test_stats_follow_writes_through_viewset(self, api_client, user):
+        api_client.force_authenticate(user)
+        bulk_url = reverse('api:tasks:tasks-bulk')
+        created = api_client.post(bulk_url, [{'name': 'task', 'description': 'description'}] * 3, format='json')
+        ids = [task['id'] for task in created.data]
+        api_client.patch(reverse('api:tasks:tasks-detail', args=(ids[0],)), {'status': Task.STATUS.done})
+        api_client.patch(bulk_url, [{'id': ids[1], 'status': Task.STATUS.done}], format='json')
+        api_client.delete(reverse('api:tasks:tasks-detail', args=(ids[2],)))
+        api_client.post(reverse('api:tasks:tasks-list'), {'name': 'task', 'description': 'description'})
+        assert api_client.get(self.url).data['own'] == {'to_do': 1, 'done': 2, 'total': 3}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTaskChanges:
+    url = reverse('api:tasks:tasks-changes')
+
+    def sync(self, api_client, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = api_client.get(self.url, params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    def test_changes_since_token(self, api_client, user):
+        kept, updated, deleted, moved = TaskFactory.create_batch(4)
+        TaskFactory(created_by=UserFactory())
+        data = self.sync(api_client)
+        assert sorted(task['id'] for task in data['results']) == sorted(task.id for task in (kept, updated, deleted, moved))
+        assert data['deleted'] == []
+        assert self.sync(api_client, data['since'])['results'] == []
+
+        created = TaskFactory()
+        updated.name = 'renamed'
+        updated.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        moved.created_by = user
+        moved.save()
+        TaskFactory(created_by=UserFactory())
+        changes = self.sync(api_client, data['since'])
+        assert [task['id'] for task in changes['results']] == [created.id, updated.id]
+        assert changes['results'][1]['name'] == 'renamed'
+        assert changes['deleted'] == [deleted_id, moved.id]
+        assert changes['has_more'] is False
+
+    def test_tasks_visible_to_user_are_not_deleted(self, api_client, user):
+        task = TaskFactory(created_by=user)
+        api_client.force_authenticate(user)
+        since = self.sync(api_client)['since']
+        task.created_by = None
+        task.save()
+        changes = self.sync(api_client, since)
+        assert [item['id'] for item in changes['results']] == [task.id]
+        assert changes['deleted'] == []
+
+    def test_changes_are_paginated(self, api_client):
+        deleted_ids = [task.id for task in TaskFactory.create_batch(3)]
+        since = self.sync(api_client)['since']
+        Task.objects.filter(id__in=deleted_ids).delete()
+        created = TaskFactory.create_batch(2)
+
+        received, deleted, pages = [], [], 0
+        while True:
+            data = self.sync(api_client, since, page_size=2)
+            received += [task['id'] for task in data['results']]
+            deleted += data['deleted']
+            since, pages = data['since'], pages + 1
+            if not data['has_more']:
+                break
+        assert pages == 3
+        assert received == [task.id for task in created]
+        assert deleted == deleted_ids
+        assert self.sync(api_client, since) == {'results': [], 'deleted': [], 'since': since, 'has_more': False}
+
+    def test_changes_committed_late_are_sent_again(self, api_client):
+        # writes of the test wait for the other transaction while it holds a row lock they need, fail instead
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL lock_timeout = '5s'")
+        # a transaction that started writing before the sync and commits after it
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('BEGIN')
+                cursor.execute(
+                    "INSERT INTO tasks_task (name, description, status, created_at, updated_at) "
+                    "VALUES ('late', '', 'to_do', now(), now()) RETURNING id"
+                )
+                late_id = cursor.fetchone()[0]
+                early = TaskFactory(status=Task.STATUS.done)  # the counter of the late task is locked
+                data = self.sync(api_client)
+                assert [task['id'] for task in data['results']] == [early.id]
+                cursor.execute('COMMIT')
+        finally:
+            other.close()
+
+        changes = self.sync(api_client, data['since'])
+        assert [task['id'] for task in changes['results']] == [late_id, early.id]
+
+    def test_expired_token(self, api_client, settings):
+        settings.TASK_TOMBSTONE_RETENTION_DAYS = 1
+        since = self.sync(api_client)['since']
+        TaskFactory.create_batch(2)
+        since_page = self.sync(api_client, since, page_size=1)['since']
+
+        with mock.patch('tasks.changes.time.time', return_value=time.time() + 86400 + 60):
+            for token in (since, since_page):
+                response = api_client.get(self.url, {'since': token})
+                assert response.status_code == status.HTTP_400_BAD_REQUEST
+                assert response.data['since'][0].code == 'expired_token'
+            assert self.sync(api_client)['has_more'] is False
+
+    @pytest.mark.parametrize('since', ('abc', '1.2', '-1', '1.2.3', '12', '1-2.3'))
+    def test_invalid_token(self, api_client, since):
+        response = api_client.get(self.url, {'since': since})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'since' in response.data
+
+
+class TestTaskAsyncViews:
+    list_action_url = reverse('api:tasks:tasks-list')
+
+    @pytest.fixture
+    def token(self, user):
+        return Token.objects.create(user=user)
+
+    @staticmethod
+    def call(actions, request, use_async_handlers=True, **kwargs):
+        view = TaskGenericViewSet.as_view(actions, use_async_handlers=use_async_handlers)
+        assert iscoroutinefunction(view) is use_async_handlers
+        response = async_to_sync(view)(request, **kwargs) if use_async_handlers else view(request, **kwargs)
+        return response.render() if hasattr(response, 'render') else response
+
+    @pytest.mark.parametrize(
+        'query',
+        (
+            {},
+            {'status': Task.STATUS.done},
+            {'order_by': 'created_at', 'page_size': 2},
+            {'search': 'unique'},
+        )
+    )
+    @pytest.mark.parametrize('authenticated', (False, True))
+    def test_list_matches_sync_view(self, query, authenticated, token):
+        TaskFactory.create_batch(3, status=Task.STATUS.done)
+        TaskFactory.create_batch(2, created_by=token.user, name='unique name')
+        headers = {'HTTP_AUTHORIZATION': f'Token {token.key}'} if authenticated else {}
+        factory = APIRequestFactory()
+
+        responses = [
+            self.call({'get': 'list'}, factory.get(self.list_action_url, query, **headers), use_async_handlers=value)
+            for value in (True, False)
+        ]
+        assert responses[0].status_code == status.HTTP_200_OK
+        assert responses[0].content == responses[1].content
+        assert responses[0]['ETag'] == responses[1]['ETag']
+
+    def test_list_follows_cursor(self):
+        TaskFactory.create_batch(5)
+        seen_ids = []
+        url = f'{self.list_action_url}?page_size=2'
+        while url:
+            data = json.loads(self.call({'get': 'list'}, APIRequestFactory().get(url)).content)
+            seen_ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+
+        assert seen_ids == sorted(Task.objects.values_list('id', flat=True), reverse=True)
+
+    def test_list_not_modified(self, django_assert_num_queries):
+        TaskFactory.create_batch(2)
+        with django_assert_num_queries(2):
+            etag = self.call({'get': 'list'}, APIRequestFactory().get(self.list_action_url))['ETag']
+
+        request = APIRequestFactory().get(self.list_action_url, HTTP_IF_NONE_MATCH=etag)
+        with django_assert_num_queries(1):
+            response = self.call({'get': 'list'}, request)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_list_is_served_from_cache(self, settings, django_assert_num_queries):
+        settings.TASK_LIST_CACHE = {**settings.TASK_LIST_CACHE, 'ENABLED': True}
+        TaskFactory.create_batch(2)
+        content = self.call({'get': 'list'}, APIRequestFactory().get(self.list_action_url)).content
+
+        with django_assert_num_queries(0):
+            response = self.call({'get': 'list'}, APIRequestFactory().get(self.list_action_url))
+        assert response.content == content
+
+    def test_retrieve(self, token):
+        task = TaskFactory(created_by=token.user)
+        url = reverse('api:tasks:tasks-detail', args=(task.id,))
+        response = self.call({'get': 'retrieve'}, APIRequestFactory().get(url), pk=task.id)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        request = APIRequestFactory().get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.call({'get': 'retrieve'}, request, pk=task.id)
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content)['id'] == task.id
+
+        request = APIRequestFactory().get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        assert self.call({'get': 'retrieve'}, request, pk=task.id).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_retrieve_invalid_pk(self):
+        response = self.call({'get': 'retrieve'}, APIRequestFactory().get(self.list_action_url), pk='abc')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_create(self, token):
+        request = APIRequestFactory().post(
+            self.list_action_url,
+            {'name': 'async', 'description': 'created'},
+            format='json',
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+        response = self.call({'post': 'create'}, request)
+        assert response.status_code == status.HTTP_201_CREATED
+        task = Task.objects.get()
+        assert json.loads(response.content)['id'] == task.id
+        assert task.created_by == token.user
+
+        request = APIRequestFactory().post(self.list_action_url, {'status': 'abracadabra'}, format='json')
+        assert self.call({'post': 'create'}, request).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_invalid_token_is_rejected(self):
+        request = APIRequestFactory().get(self.list_action_url, HTTP_AUTHORIZATION='Token invalid')
+        response = self.call({'get': 'list'}, request)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'] == 'Token'
+
+    def test_actions_without_async_handler_run_sync(self):
+        task = TaskFactory()
+        url = reverse('api:tasks:tasks-detail', args=(task.id,))
+        response = self.call({'delete': 'destroy'}, APIRequestFactory().delete(url), pk=task.id)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not Task.objects.exists()
+
+
+@pytest.mark.perf
+class TestTaskTimeBudgets:
+    list_action_url = reverse('api:tasks:tasks-list')
+
+    @pytest.fixture(autouse=True)
+    def warm_up(self, api_client):
+        api_client.check_budgets = False
+        api_client.get(self.list_action_url)
+        api_client.check_budgets = True
+
+    def test_list(self, api_client, user):
+        TaskFactory.create_batch(30)
+        TaskFactory.create_batch(30, created_by=user)
+        api_client.force_authenticate(user)
+        assert api_client.get(self.list_action_url, data={'page_size': 30}).status_code == status.HTTP_200_OK
+
+    def test_retrieve(self, api_client):
+        task = TaskFactory()
+        assert api_client.get(reverse('api:tasks:tasks-detail', args=(task.id,))).status_code == status.HTTP_200_OK
+
+    def test_stats(self, api_client):
+        TaskFactory.create_batch(3)
+        assert api_client.get(reverse('api:tasks:tasks-stats')).status_code == status.HTTP_200_OK
@@ -1,16 +1,147 @@
+import io
+
+from django.db import transaction
+from django.utils.http import parse_header_parameters
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, permissions
-from rest_framework.filters import SearchFilter
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import UnsupportedMediaType
+from rest_framework.response import Response
 
-from tasks.filters import TaskFilterBackend, TaskFilterSet
-from tasks.models import Task
-from tasks.serializers import TaskModelSerializer
+from core.renderers import CSVRenderer, NDJSONRenderer
+from core.views import AsyncDispatchMixin, AsyncGenericMixin
+from tasks.changes import TaskChangeFeed
+from tasks.filters import TaskFilterBackend, TaskFilterSet, TaskSearchFilter
+from tasks.imports import READERS, TaskImporter
+from tasks.mixins import CachedListMixin, ConditionalGetMixin, StreamingExportMixin, ValuesListMixin
+from tasks.models import Task, TaskCounter
+from tasks.pagination import TaskCursorPagination
+from tasks.serializers import (
+    TaskModelSerializer,
+    TaskValuesSerializer,
+    TaskBulkUpdateSerializer,
+    TaskBulkDeleteSerializer,
+    TaskBulkDeleteResultSerializer,
+    TaskImportResultSerializer,
+    TaskStatsSerializer,
+    TaskChangesSerializer,
+)
 
 
-class TaskGenericViewSet(viewsets.ModelViewSet):
+class TaskGenericViewSet(
+    AsyncDispatchMixin,
+    AsyncGenericMixin,
+    CachedListMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+    StreamingExportMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = TaskModelSerializer
+    values_serializer_class = TaskValuesSerializer
     permission_classes = (permissions.AllowAny,)
     queryset = Task.objects.all()
-    filter_backends = (TaskFilterBackend, DjangoFilterBackend, SearchFilter)
+    filter_backends = (TaskFilterBackend, DjangoFilterBackend, TaskSearchFilter)
     search_fields = ('name',)
     filterset_class = TaskFilterSet
+    pagination_class = TaskCursorPagination
+    export_filename = 'tasks'
+    throttle_scope = 'task_write'
+
+    def get_throttles(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return ()
+        return super().get_throttles()
+
+    async def acreate(self, request, *_args, **_kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await serializer.asave()
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def get_available_queryset(self):
+        return self.get_queryset().get_available_for_user(self.request.user)
+
+    @extend_schema(request=TaskModelSerializer(many=True), responses={201: TaskModelSerializer(many=True)})
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, *_args, **_kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(request=TaskBulkUpdateSerializer(many=True), responses={200: TaskModelSerializer(many=True)})
+    @bulk.mapping.patch
+    def bulk_update(self, request, *_args, **_kwargs):
+        with transaction.atomic():
+            serializer = TaskBulkUpdateSerializer(
+                self.get_available_queryset().select_for_update(),
+                data=request.data,
+                many=True,
+                partial=True,
+                context=self.get_serializer_context(),
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(request=TaskBulkDeleteSerializer, responses={200: TaskBulkDeleteResultSerializer(many=True)})
+    @bulk.mapping.delete
+    def bulk_destroy(self, request, *_args, **_kwargs):
+        serializer = TaskBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        with transaction.atomic():
+            deleted_ids = set(
+                self.get_available_queryset().filter(id__in=ids).select_for_update().values_list('id', flat=True)
+            )
+            Task.objects.filter(id__in=deleted_ids).delete()
+        results = [{'id': task_id, 'deleted': task_id in deleted_ids} for task_id in ids]
+        return Response(TaskBulkDeleteResultSerializer(results, many=True).data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses={200: TaskStatsSerializer})
+    @action(detail=False, methods=['get'])
+    def stats(self, request, *_args, **_kwargs):
+        counts = TaskCounter.objects.get_available_for_user(request.user).get_counts_by_owner()
+        stats = {
+            'anonymous': counts.get(None, {}),
+            'own': counts.get(request.user.pk, {}) if request.user.is_authenticated else None,
+        }
+        return Response(TaskStatsSerializer(stats).data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('since', str, description='Token returned by the previous request, omit it to sync all'),
+            OpenApiParameter('page_size', int),
+        ],
+        responses={200: TaskChangesSerializer},
+    )
+    @action(detail=False, methods=['get'])
+    def changes(self, request, *_args, **_kwargs):
+        feed = TaskChangeFeed(request.user, page_size=self.paginator.get_page_size(request))
+        page = feed.get_page(request.query_params.get('since'))
+        return Response(TaskChangesSerializer(page, context=self.get_serializer_context()).data)
+
+    @extend_schema(responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR})
+    @action(detail=False, methods=['get'], renderer_classes=(NDJSONRenderer, CSVRenderer))
+    def export(self, request, *_args, **_kwargs):
+        return self.get_export_response(request)
+
+    @extend_schema(
+        request={reader.media_type: OpenApiTypes.BINARY for reader in READERS.values()},
+        responses={200: TaskImportResultSerializer},
+    )
+    @action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def bulk_import(self, request, *_args, **_kwargs):
+        media_type, _ = parse_header_parameters(request.content_type)
+        reader_class = next((reader for reader in READERS.values() if reader.media_type == media_type), None)
+        if reader_class is None:
+            raise UnsupportedMediaType(request.content_type)
+
+        created_by = request.user if request.user.is_authenticated else None
+        result = TaskImporter(created_by=created_by).run(reader_class(request.stream or io.BytesIO()))
+        return Response(TaskImportResultSerializer(result).data, status=status.HTTP_200_OK)
@@ -0,0 +1,198 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+
+class LRUCache:
+    """
+    Bounded in-process cache that evicts the least recently used entry and expires entries after `ttl` seconds.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenCache:
+    """
+    Two-tier token cache: a per-process LRU in front of an optional shared Django cache.
+
+    `revoke()` leaves a marker in the shared cache, and entries are only returned when they were read from the
+    database after the latest marker of their token, so revocations reach the local tier of every process.
+    Markers outlive the entries they revoke. Without a shared cache, other processes keep their entries up to `ttl`.
+    """
+
+    key_prefix = 'auth-token:'
+    revocation_key_prefix = 'auth-token-revoked:'
+
+    def __init__(self, max_size, ttl, shared_cache_alias=None, shared_ttl=None):
+        self.local = LRUCache(max_size, ttl)
+        self.shared_cache_alias = shared_cache_alias
+        self.shared_ttl = shared_ttl
+
+    @property
+    def shared(self):
+        return caches[self.shared_cache_alias] if self.shared_cache_alias else None
+
+    def get(self, key):
+        """
+        Returns the cached value of `key`, or None, and the revocation marker to `set()` a value read on a miss with.
+        """
+        revocation = self.shared.get(self.revocation_key_prefix + key) if self.shared is not None else None
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(self.key_prefix + key)
+            if entry is not None and entry[0] == revocation:
+                self.local.set(key, entry)
+        return self.get_value(entry, revocation), revocation
+
+    async def aget(self, key):
+        revocation = await self.shared.aget(self.revocation_key_prefix + key) if self.shared is not None else None
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = await self.shared.aget(self.key_prefix + key)
+            if entry is not None and entry[0] == revocation:
+                self.local.set(key, entry)
+        return self.get_value(entry, revocation), revocation
+
+    @staticmethod
+    def get_value(entry, revocation):
+        return None if entry is None or entry[0] != revocation else entry[1]
+
+    def set(self, key, value, revocation=None):
+        self.local.set(key, (revocation, value))
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, (revocation, value), self.shared_ttl)
+
+    async def aset(self, key, value, revocation=None):
+        self.local.set(key, (revocation, value))
+        if self.shared is not None:
+            await self.shared.aset(self.key_prefix + key, (revocation, value), self.shared_ttl)
+
+    def revoke(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            # entries copied from the shared tier to a local one at the end of their shared ttl live the longest
+            self.shared.set(self.revocation_key_prefix + key, time.time_ns(), self.local.ttl + self.shared_ttl)
+            self.shared.delete(self.key_prefix + key)
+
+    def clear(self):
+        self.local.clear()
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_AUTH_CACHE['MAX_SIZE'],
+    ttl=settings.TOKEN_AUTH_CACHE['TTL'],
+    shared_cache_alias=settings.TOKEN_AUTH_CACHE['SHARED_CACHE_ALIAS'],
+    shared_ttl=settings.TOKEN_AUTH_CACHE['SHARED_TTL'],
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that resolves tokens from `token_cache` before falling back to the database.
+    Entries are revoked by `users.signals` when a token is deleted or its user is deactivated.
+    `aauthenticate` is the counterpart awaited by `core.views.AsyncDispatchMixin`.
+
+    Entries only hold the `user_fields` of the token's user, the other fields, like the password hash, are
+    deferred and loaded from the database on access.
+    """
+
+    user_fields = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+    def authenticate(self, request):
+        key = self.get_key(request)
+        return None if key is None else self.authenticate_credentials(key)
+
+    async def aauthenticate(self, request):
+        key = self.get_key(request)
+        return None if key is None else await self.aauthenticate_credentials(key)
+
+    def get_key(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        if auth[2:]:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. Token string should not contain invalid characters.')
+            )
+
+    def authenticate_credentials(self, key):
+        user_values, revocation = token_cache.get(key)
+        if user_values is None:
+            user_values = self.get_user_values(key).first()
+            if user_values is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            token_cache.set(key, user_values, revocation)
+        return self.check_token(key, user_values)
+
+    async def aauthenticate_credentials(self, key):
+        user_values, revocation = await token_cache.aget(key)
+        if user_values is None:
+            user_values = await self.get_user_values(key).afirst()
+            if user_values is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            await token_cache.aset(key, user_values, revocation)
+        return self.check_token(key, user_values)
+
+    def get_user_values(self, key):
+        return self.get_model().objects.filter(key=key).values_list(*(f'user__{field}' for field in self.user_fields))
+
+    def check_token(self, key, user_values):
+        model = self.get_model()
+        user_model = model._meta.get_field('user').related_model  # noqa: SLF001
+        values = dict(zip(self.user_fields, user_values, strict=True))
+        # `from_db()` takes the values of the loaded fields in the order of the model
+        fields = [field.attname for field in user_model._meta.concrete_fields if field.attname in values]  # noqa: SLF001
+        user = user_model.from_db(None, fields, [values[field] for field in fields])
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token = model.from_db(None, ['key', 'user_id'], [key, user.pk])
+        token.user = user
+        return (user, token)
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:40
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+# Emails are unique regardless of case, users without an email are left out. The index of `auth.User` is kept
+# out of the migration state, the model belongs to django.contrib.auth.
+CREATE_INDEX = "CREATE UNIQUE INDEX CONCURRENTLY auth_user_email_ci_unique ON auth_user (lower(email)) WHERE email <> ''"
+DROP_INDEX = 'DROP INDEX CONCURRENTLY auth_user_email_ci_unique'
+
+
+def check_duplicate_emails(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.using(schema_editor.connection.alias)
+        .exclude(email='')
+        .values(normalized_email=Lower('email'))
+        .annotate(users=Count('id'))
+        .filter(users__gt=1)
+        .values_list('normalized_email', flat=True)[:10]
+    )
+    if duplicates:
+        raise RuntimeError(f'Emails of several users differ by case only, change them first: {", ".join(duplicates)}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunSQL(sql=CREATE_INDEX, reverse_sql=DROP_INDEX),
+    ]
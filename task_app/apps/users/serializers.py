@@ -1,5 +1,7 @@
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -27,6 +29,11 @@ class UserLoginSerializer(serializers.ModelSerializer):
 
 
 class UserRegisterSerializer(serializers.ModelSerializer):
+    """
+    Creates the user with its token in one transaction, taken usernames and emails are reported from the
+    violated unique constraints. Emails are unique regardless of case, see `users.migrations.0001_user_email_unique`.
+    """
+
     id = serializers.PrimaryKeyRelatedField(read_only=True)
     username = serializers.CharField()
     first_name = serializers.CharField()
@@ -36,6 +43,11 @@ class UserRegisterSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(write_only=True)
     token = serializers.CharField(read_only=True, source='auth_token.key')
 
+    unique_constraint_errors = {
+        'auth_user_username_key': {'username': [User.username.field.error_messages['unique']]},
+        'auth_user_email_ci_unique': {'message': 'Email already taken'},
+    }
+
     class Meta:
         model = User
         fields = ('id', 'username', 'first_name', 'last_name', 'email', 'password', 'password2', 'token')
@@ -45,18 +57,23 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         if instance['password'] != instance['password2']:
             raise ValidationError({'message': 'password and password2 must match'})
 
-        if User.objects.filter(email=instance['email']).exists():
-            raise ValidationError({'message': 'Email already taken'})
-
         return instance
 
     def create(self, validated_data):
         password = validated_data.pop('password')
         _ = validated_data.pop('password2')
-        user = User.objects.create(**validated_data)
-        user.set_password(password)
-        user.save()
-        Token.objects.create(user=user)
+        # hashed before the transaction starts, it is the slowest part of the registration
+        validated_data['password'] = make_password(password)
+        try:
+            with transaction.atomic():
+                user = User.objects.create(**validated_data)
+                Token.objects.create(user=user)
+        except IntegrityError as exc:
+            constraint = getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None)
+            errors = self.unique_constraint_errors.get(constraint)
+            if errors is None:
+                raise
+            raise ValidationError(errors) from exc
         return user
 
 
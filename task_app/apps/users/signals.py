@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.replicas import issue_credentials
+from users.authentication import CachedTokenAuthentication, token_cache
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.revoke(instance.key)
+
+
+@receiver(post_save, sender=Token)
+def pin_created_token(sender, instance, created, **kwargs):
+    # tokens are read from replicas, the first requests with a new token must find it
+    if created:
+        issue_credentials(f'{CachedTokenAuthentication.keyword} {instance.key}')
+
+
+@receiver(post_save, sender=User)
+def invalidate_inactive_user_tokens(sender, instance, **kwargs):
+    if not instance.is_active:
+        for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+            token_cache.revoke(key)
@@ -0,0 +1,11 @@
+from core.instrumentation import Budget
+from users.views import UserAuthenticationCheckAPIView, UserLoginAPIView, UserLogoutAPIView, UserRegisterAPIView
+
+
+BUDGETS = {
+    # inserts of the user and its token, and the SAVEPOINT and RELEASE of their transaction when nested in a test
+    UserRegisterAPIView: {'post': Budget(queries=4)},
+    UserLoginAPIView: {'post': Budget(queries=5)},
+    UserLogoutAPIView: {'post': Budget(queries=2)},
+    UserAuthenticationCheckAPIView: {'get': Budget(queries=1)},
+}
@@ -0,0 +1,147 @@
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import CachedTokenAuthentication, LRUCache, TokenCache, token_cache
+from users.views import UserAuthenticationCheckAPIView
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+class TestCachedTokenAuthentication:
+    auth_check_url = reverse('api:users:auth-check')
+    logout_url = reverse('api:users:logout')
+
+    @pytest.fixture
+    def token(self, user):
+        return Token.objects.create(user=user)
+
+    @pytest.fixture
+    def authenticated_client(self, api_client, token):
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return api_client
+
+    def test_token_is_resolved_from_cache(self, authenticated_client, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(self.auth_check_url)
+        assert response.status_code == status.HTTP_200_OK
+
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(self.auth_check_url)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_invalid_token_is_rejected(self, api_client):
+        api_client.credentials(HTTP_AUTHORIZATION='Token abracadabra')
+        response = api_client.get(self.auth_check_url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_logout_invalidates_cached_token(self, authenticated_client):
+        assert authenticated_client.get(self.auth_check_url).status_code == status.HTTP_200_OK
+
+        response = authenticated_client.post(self.logout_url)
+        assert response.status_code == status.HTTP_200_OK
+
+        response = authenticated_client.get(self.auth_check_url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivation_invalidates_cached_token(self, authenticated_client, user):
+        assert authenticated_client.get(self.auth_check_url).status_code == status.HTTP_200_OK
+
+        user.is_active = False
+        user.save()
+
+        response = authenticated_client.get(self.auth_check_url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_shared_cache_tier_is_used_on_local_miss(self, token, settings):
+        settings.CACHES = {'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        cache = TokenCache(max_size=10, ttl=60, shared_cache_alias='shared', shared_ttl=60)
+        cache.set(token.key, (token.user_id,))
+        cache.local.clear()
+
+        assert cache.get(token.key) == ((token.user_id,), None)
+        assert len(cache.local) == 1
+
+        cache.revoke(token.key)
+        cache.local.clear()
+        value, revocation = cache.get(token.key)
+        assert value is None
+        assert revocation is not None
+
+    def test_revocation_reaches_local_tiers_of_other_processes(self, token, settings):
+        settings.CACHES = {'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        cache, other_cache = (
+            TokenCache(max_size=10, ttl=60, shared_cache_alias='shared', shared_ttl=60) for _ in range(2)
+        )
+        cache.set(token.key, (token.user_id,))
+        assert other_cache.get(token.key)[0] == (token.user_id,)
+        assert len(other_cache.local) == 1
+
+        cache.revoke(token.key)
+        value, revocation = other_cache.get(token.key)
+        assert value is None
+
+        other_cache.set(token.key, (token.user_id,), revocation)
+        assert cache.get(token.key)[0] == (token.user_id,)
+
+    def test_cached_entries_hold_no_password_hash(self, authenticated_client, token, user):
+        assert authenticated_client.get(self.auth_check_url).status_code == status.HTTP_200_OK
+        entry = token_cache.local.get(token.key)
+        assert user.password not in repr(entry)
+
+        authenticated_user, auth = CachedTokenAuthentication().authenticate_credentials(token.key)
+        assert (authenticated_user.pk, authenticated_user.username, auth.key) == (user.pk, user.username, token.key)
+        assert authenticated_user.get_deferred_fields() >= {'password', 'email'}
+
+    def test_async_view_awaits_authentication(self, token, django_assert_num_queries):
+        view = async_to_sync(UserAuthenticationCheckAPIView.as_view(use_async_handlers=True))
+        request = APIRequestFactory().get(self.auth_check_url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        with django_assert_num_queries(1):
+            assert view(request).status_code == status.HTTP_200_OK
+        with django_assert_num_queries(0):
+            assert view(request).status_code == status.HTTP_200_OK
+
+        assert view(APIRequestFactory().get(self.auth_check_url)).status_code == status.HTTP_401_UNAUTHORIZED
+        request = APIRequestFactory().get(self.auth_check_url, HTTP_AUTHORIZATION='Token abracadabra')
+        assert view(request).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_shared_cache_tier_is_awaited_on_local_miss(self, token, settings):
+        settings.CACHES = {'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        cache = TokenCache(max_size=10, ttl=60, shared_cache_alias='shared', shared_ttl=60)
+        async_to_sync(cache.aset)(token.key, (token.user_id,))
+        cache.local.clear()
+
+        assert async_to_sync(cache.aget)(token.key) == ((token.user_id,), None)
+        assert len(cache.local) == 1
+
+
+class TestLRUCache:
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+    def test_expired_entry_is_dropped(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        with mock.patch('users.authentication.time.monotonic', return_value=0):
+            cache.set('a', 1)
+        with mock.patch('users.authentication.time.monotonic', return_value=61):
+            assert cache.get('a') is None
+        assert len(cache) == 0
@@ -8,6 +8,14 @@ from users.tests.factories import TEST_USER_PASSWORD
 
 class TestUserRegisterAPIView:
     action_url = reverse('api:users:register')
+    payload = {
+        'username': 'test_username',
+        'first_name': 'test_first_name',
+        'last_name': 'test_last_name',
+        'email': 'test@mail.com',
+        'password': 'test123',
+        'password2': 'test123',
+    }
 
     def test_post_action_succeed(self, api_client):
         assert not User.objects.exists()
@@ -47,6 +55,29 @@ class TestUserRegisterAPIView:
 
         assert not User.objects.exists()
 
+    def test_password_is_hashed_before_a_single_insert(self, api_client, django_assert_num_queries):
+        with django_assert_num_queries(4):  # savepoint, user, token, release
+            response = api_client.post(self.action_url, data=self.payload)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert User.objects.get().check_password(self.payload['password'])
+
+    def test_taken_email_is_rejected_regardless_of_case(self, api_client, user):
+        response = api_client.post(self.action_url, data={**self.payload, 'email': user.email.upper()})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'message': 'Email already taken'}
+        assert User.objects.count() == 1
+        assert Token.objects.count() == 0
+
+    def test_taken_username_is_rejected(self, api_client, user):
+        response = api_client.post(self.action_url, data={**self.payload, 'username': user.username})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'username': ['A user with that username already exists.']}
+
+    def test_users_without_email_do_not_conflict(self):
+        User.objects.create(username='first')
+        User.objects.create(username='second')
+        assert User.objects.filter(email='').count() == 2
+
 
 class TestUserLoginAPIView:
     action_url = reverse('api:users:login')
@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from core.views import AsyncDispatchMixin
 from users.serializers import (
     UserRegisterSerializer,
     UserLoginSerializer,
@@ -14,6 +15,7 @@ from users.serializers import (
 
 class UserRegisterAPIView(APIView):
     permission_classes = (AllowAny,)
+    throttle_scope = 'register'
 
     @extend_schema(request=UserRegisterSerializer, responses={201: UserRegisterSerializer})
     def post(self, request, *_args, **_kwargs):
@@ -25,6 +27,7 @@ class UserRegisterAPIView(APIView):
 
 class UserLoginAPIView(APIView):
     permission_classes = (AllowAny,)
+    throttle_scope = 'login'
 
     def get_serializer_context(self):
         return {'request': self.request}
@@ -48,7 +51,7 @@ class UserLogoutAPIView(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-class UserAuthenticationCheckAPIView(APIView):
+class UserAuthenticationCheckAPIView(AsyncDispatchMixin, APIView):
     """Returns 200 if user is authenticated."""
 
     permission_classes = (IsAuthenticated,)
@@ -56,3 +59,6 @@ class UserAuthenticationCheckAPIView(APIView):
     @extend_schema(responses={200: EmptyBodySerializer})
     def get(self, *_args, **_kwargs):
         return Response(status=status.HTTP_200_OK)
+
+    async def aget(self, *_args, **_kwargs):
+        return Response(status=status.HTTP_200_OK)